@@ -0,0 +1,86 @@
+"""
+瞬ジェネ AIアナリストの集計ロジック
+Streamlitに依存しない純粋なpandas/NumPyの関数群
+"""
+
+from analytics.abtest import (
+    AB_TEST_LABELS,
+    BASELINE_VARIANT,
+    SIGNIFICANCE_LEVELS,
+    ab_test_stats,
+    daily_variant_cvr,
+    label_test_targets,
+    significance_marks,
+)
+from analytics.alerts import (
+    ALERT_COMPARISONS,
+    ALERT_MA_WINDOW,
+    ALERT_METRICS,
+    ALERT_MIN_DAYS,
+    ALERT_RULES,
+    ALERT_SEGMENTS,
+    evaluate_alerts,
+    kpi_changes,
+)
+from analytics.bitmap import BITMAP_BLOCK_ROWS, BITMAP_DIMENSIONS, Bitmap, BitmapIndex
+from analytics.breakdown import BREAKDOWN_AGGREGATIONS, BREAKDOWN_AVERAGES, session_breakdown
+from analytics.cache import LRUCache, estimate_nbytes
+from analytics.channels import CHANNEL_RULES, classify_channels
+from analytics.cube import (
+    CUBE_AVERAGES,
+    CUBE_DIMENSIONS,
+    CUBE_MEASURES,
+    CUBE_SKETCHES,
+    build_cube,
+    daily_rollup,
+    query_cube,
+    rollup,
+    summarize_cube,
+    update_cube,
+)
+from analytics.enrich import enrich_events
+from analytics.filters import FilterSpec, apply_filter, filter_rows
+from analytics.funnel import page_event_stats, page_funnel, page_stay_distribution
+from analytics.heatmap import WEEKDAYS, weekday_hour_pivot, weekday_hour_stats
+from analytics.metrics import (
+    PAGE_CLICK_TARGETS,
+    ab_test_metrics,
+    alert_metrics,
+    count_rows,
+    heatmap_metrics,
+    kpi_metrics,
+    option_counts,
+    page_metrics,
+    segment_metrics,
+    select_cube,
+    select_events,
+    select_sessions,
+)
+from analytics.periods import (
+    DateIndex,
+    build_date_index,
+    period_bounds,
+    slice_last_days,
+    slice_period,
+    sort_by_date,
+)
+from analytics.rates import add_rates, rate_array, safe_rate
+from analytics.realtime import REALTIME_WINDOW_HOURS, RealtimeWindow
+from analytics.sessions import (
+    ENGAGED_STAY_MS,
+    FINAL_CTA_PAGE,
+    FV_RETAINED_PAGE,
+    build_session_facts,
+    summarize_sessions,
+    summarize_totals,
+)
+from analytics.sketch import (
+    HLL_PRECISION,
+    SketchTable,
+    build_sketches,
+    count_distinct,
+    estimate_cardinality,
+    merge_sketches,
+    standard_error,
+)
+from analytics.snapshot import DatasetSnapshot, SnapshotRefresher, build_snapshot
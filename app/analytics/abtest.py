@@ -0,0 +1,101 @@
+"""
+A/Bテストの集計
+テスト種別×バリアントごとのセッション指標・バリアントAとのCVR差・有意差の判定と、日別のCVR推移を求める
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.breakdown import session_breakdown
+from analytics.rates import add_rates
+
+# A/Bテスト種別（ab_test_target）の表示名。ここにない値はテスト対象外（'-'）として扱う
+AB_TEST_LABELS = {
+    'hero_image': 'FVテスト',
+    'cta_button': 'CTAテスト',
+    'headline': 'ヘッドラインテスト',
+    'layout': 'レイアウトテスト',
+    'copy': 'コピーテスト',
+    'form': 'フォームテスト',
+    'video': '動画テスト'
+}
+
+# CVR差分の基準にするバリアント
+BASELINE_VARIANT = 'A'
+
+# 有意差の表示: (p値の上限, 記号)。上から順に判定し、どれにも当てはまらなければ '-'
+SIGNIFICANCE_LEVELS = [(0.01, '★★★'), (0.05, '★★'), (0.1, '★')]
+
+
+def label_test_targets(values: pd.Series, labels=AB_TEST_LABELS) -> pd.Series:
+    """ab_test_target をテスト種別の表示名にする（テスト対象外は '-'）"""
+    return values.astype(object).map(labels).fillna('-')
+
+
+def significance_marks(p_values) -> np.ndarray:
+    """p値を有意差の記号（★★★ / ★★ / ★ / -）にする"""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    return np.select(
+        [p_values < level for level, _ in SIGNIFICANCE_LEVELS],
+        [mark for _, mark in SIGNIFICANCE_LEVELS],
+        default='-',
+    ).astype(object)
+
+
+def ab_test_stats(facts: pd.DataFrame, events: pd.DataFrame = None, labels=AB_TEST_LABELS) -> pd.DataFrame:
+    """
+    テスト種別×バリアントごとの指標
+
+    Args:
+        facts: build_session_facts の戻り値（フィルター済みでもよい）
+        events: イベントデータ。p_value 列があればグループの先頭の値をp値にする（ない場合は1.0）
+        labels: ab_test_target の表示名
+
+    Returns:
+        pd.DataFrame: ab_test_target（表示名）, ab_variant, session_breakdown の列, p_value,
+        conversion_rate・fv_retention_rate・final_cta_rate（%）, cvr_diff（同じテスト種別のバリアントAとのCVRの差, pt。
+        Aがないテスト種別は NaN）, significance（有意差の記号）, confidence（1 - p値）。テスト対象外の行は含まない
+    """
+    keys = ['ab_test_target', 'ab_variant']
+    facts = facts.assign(ab_test_target=label_test_targets(facts['ab_test_target'], labels))
+    stats = session_breakdown(facts, keys)
+
+    if events is not None and 'p_value' in events.columns:
+        events = events.assign(ab_test_target=label_test_targets(events['ab_test_target'], labels))
+        p_values = events.groupby(keys, observed=True)['p_value'].first()
+        stats['p_value'] = p_values.reindex(pd.MultiIndex.from_frame(stats[keys])).to_numpy()
+    else:
+        stats['p_value'] = 1.0
+    stats['p_value'] = stats['p_value'].fillna(1.0)
+
+    add_rates(stats, {
+        'conversion_rate': ('conversions', 'sessions'),
+        'fv_retention_rate': ('fv_retained', 'sessions'),
+        'final_cta_rate': ('final_cta_reached', 'sessions'),
+    })
+    stats = stats[stats['ab_test_target'] != '-'].reset_index(drop=True)
+
+    baseline = stats['conversion_rate'].where(stats['ab_variant'] == BASELINE_VARIANT)
+    stats['cvr_diff'] = stats['conversion_rate'] - baseline.groupby(stats['ab_test_target']).transform('first')
+    stats['significance'] = significance_marks(stats['p_value'])
+    stats['confidence'] = 1 - stats['p_value']
+    return stats
+
+
+def daily_variant_cvr(events: pd.DataFrame, labels=AB_TEST_LABELS) -> pd.DataFrame:
+    """
+    日別・テスト種別・バリアント別のセッション数・CV数・CVR（control とテスト対象外は除く）
+
+    Returns:
+        pd.DataFrame: event_date（日付）, ab_test_target（表示名）, ab_variant, sessions, conversions, cvr（%）
+    """
+    keys = ['event_date', 'ab_test_target', 'ab_variant']
+    events = events.assign(ab_test_target=label_test_targets(events['ab_test_target'], labels))
+    ab_events = events[(events['ab_test_target'] != '-') & (events['ab_variant'] != 'control')]
+    ab_events = ab_events.assign(event_date=pd.to_datetime(ab_events['event_date']).dt.date)
+
+    daily_sessions = ab_events.groupby(keys, observed=True)['session_id'].nunique().reset_index(name='sessions')
+    daily_conversions = ab_events[ab_events['cv_type'].notna()].groupby(keys, observed=True)['session_id'].nunique().reset_index(name='conversions')
+
+    daily = pd.merge(daily_sessions, daily_conversions, on=keys, how='left').fillna({'conversions': 0})
+    return add_rates(daily, {'cvr': ('conversions', 'sessions')})
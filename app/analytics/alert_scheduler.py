@@ -0,0 +1,322 @@
+"""
+アラートのバックグラウンド評価と通知
+データの新しいバージョン（日・時間単位のデータの追加）ごとに、前回評価した日より後の完了した日だけを evaluate_alerts で判定し、
+検知したアラートをローカルのストアに保存してから通知先（シンク）に送る。
+データの最終日は集計途中（その日のイベントがまだ届く）なので評価せず、翌日のデータが届いてから評価する。
+同じアラート（セグメント・指標・比較・日付）は1回だけ保存し、同じセグメント・指標・比較のアラートは
+クールダウン期間内に同じ重要度以下で再び検知しても通知しない。アラートページはストアを読むだけで再計算しない
+"""
+
+import json
+import os
+import logging
+import threading
+import urllib.request
+from datetime import datetime
+
+import pandas as pd
+
+from analytics.alerts import ALERT_RULES, ALERT_SEGMENTS, evaluate_alerts
+from analytics.datasource import APP_DIR
+from analytics.periods import slice_period
+
+# 検知したアラートの保存先（ダッシュボードとワーカーで共有する）
+ALERT_STORE_DIR = os.path.join(APP_DIR, "data", "alerts")
+
+# 同じセグメント・指標・比較のアラートを再び通知しない期間（データの日数）
+ALERT_COOLDOWN_DAYS = 3
+
+# アラートの一覧と評価の状態を保存するファイル
+_ALERTS_FILE = 'alerts.parquet'
+_STATE_FILE = '_STATE.json'
+
+# 通知の状態: pending（未通知・送信失敗）, notified（通知済み）, suppressed（クールダウン中のため通知しない）
+ALERT_STATUSES = ['pending', 'notified', 'suppressed']
+
+
+def _replace(path, write):
+    """一時ファイルに書いてから差し替える（読み込み側は古いか新しいかのどちらか一方を読む）"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class AlertStore:
+    """
+    検知したアラートと評価の状態のローカルストア（ディレクトリ）
+
+    アラートは evaluate_alerts の列に status（ALERT_STATUSES）と notified_at（通知した時刻）を加えた表で持つ。
+    書き込みは1つのスケジューラーだけが行い、読み込みはどのプロセスからでもよい
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    def read(self) -> pd.DataFrame:
+        """保存済みのアラート（なければ空の表）"""
+        path = os.path.join(self.store_dir, _ALERTS_FILE)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=['event_date', 'level', 'metric', 'comparison', 'status', 'notified_at'])
+        return pd.read_parquet(path)
+
+    def state(self) -> dict:
+        """
+        評価の状態: version（評価したデータのバージョン）, evaluated_until（評価した最終日）,
+        enough_data（検知に必要な日数があったか）, evaluated_at（評価した時刻）。未評価なら空の辞書
+        """
+        path = os.path.join(self.store_dir, _STATE_FILE)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def latest(self):
+        """
+        最新の評価日のアラート
+
+        Returns:
+            pd.DataFrame | None: 未評価、またはデータが ALERT_MIN_DAYS 日に満たなかった場合は None
+        """
+        if not self.state().get('enough_data'):
+            return None
+        alerts = self.read()
+        if alerts.empty:
+            return alerts
+        return alerts[alerts['event_date'] == alerts['event_date'].max()].reset_index(drop=True)
+
+    def write(self, alerts: pd.DataFrame, state: dict):
+        """アラートを書いてから状態を書く（状態だけが新しくなることはない）"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        _replace(os.path.join(self.store_dir, _ALERTS_FILE), lambda path: alerts.to_parquet(path, index=False))
+
+        def write_state(path):
+            with open(path, 'w') as f:
+                json.dump(state, f, ensure_ascii=False)
+
+        _replace(os.path.join(self.store_dir, _STATE_FILE), write_state)
+
+
+class FileSink:
+    """通知を JSON Lines のファイルに追記するシンク（Webhookの代わりにローカルで確認する用）"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alerts):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False, default=str) + "\n")
+
+
+class WebhookSink:
+    """通知を {"alerts": [...]} のJSONとしてWebhook（Slackの Incoming Webhook 互換の受け口など）にPOSTするシンク"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        body = json.dumps({'alerts': alerts}, ensure_ascii=False, default=str).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def _alert_keys(alerts: pd.DataFrame):
+    """セグメント・指標・比較（同じアラートかどうかの判定に使う列）"""
+    return [col for col in alerts.columns if col not in ('event_date', 'level', 'change', 'baseline', 'current', 'sessions', 'status', 'notified_at')]
+
+
+def merge_alerts(stored: pd.DataFrame, detected: pd.DataFrame, since) -> pd.DataFrame:
+    """
+    since 以降の日付を評価し直した結果を保存済みのアラートに反映する
+
+    since 以降の保存済みのアラートは detected で置き換える。同じアラート（キー・日付・重要度）が保存済みなら
+    status と notified_at を引き継ぎ、新しいアラートは pending にする
+    """
+    detected = detected.assign(status='pending', notified_at=pd.NaT)
+    if stored.empty:
+        return detected
+    since = pd.Timestamp(since)
+    kept = stored[stored['event_date'] < since]
+    previous = stored[stored['event_date'] >= since]
+    keys = _alert_keys(detected) + ['event_date', 'level']
+    carried = detected.drop(columns=['status', 'notified_at']).merge(
+        previous[keys + ['status', 'notified_at']], on=keys, how='left'
+    )
+    carried['status'] = carried['status'].fillna('pending')
+    return pd.concat([kept, carried], ignore_index=True)
+
+
+def apply_cooldown(alerts: pd.DataFrame, levels, cooldown_days=ALERT_COOLDOWN_DAYS) -> pd.DataFrame:
+    """
+    pending のアラートのうち、同じキーのアラートを cooldown_days 日以内に同じか高い重要度で通知済みのものを suppressed にする
+
+    Args:
+        levels: 重要度の高い順のリスト
+    """
+    pending = alerts['status'] == 'pending'
+    notified = alerts[alerts['status'] == 'notified']
+    if not pending.any() or notified.empty:
+        return alerts
+    keys = _alert_keys(alerts)
+    rank = {level: i for i, level in enumerate(levels)}
+    candidates = alerts[pending].reset_index().merge(notified[keys + ['event_date', 'level']], on=keys, suffixes=('', '_notified'))
+    age = candidates['event_date'] - candidates['event_date_notified']
+    suppressed = (
+        (age >= pd.Timedelta(0)) & (age < pd.Timedelta(days=cooldown_days))
+        & (candidates['level_notified'].map(rank) <= candidates['level'].map(rank))
+    )
+    alerts = alerts.copy()
+    alerts.loc[candidates.loc[suppressed, 'index'].unique(), 'status'] = 'suppressed'
+    return alerts
+
+
+class AlertScheduler:
+    """
+    データの新しいバージョンごとにアラートを評価し、保存・通知するスケジューラー
+
+    評価するのは完了した日（データの最終日より前の日）だけで、初回は完了した最新日だけを、
+    2回目以降は前回評価した最終日より後の完了した日を評価する（完了した日が増えていなければ評価しない）。
+    データのバージョンが変わっていなくても、送信に失敗した pending のアラートがあれば送り直す
+
+    Args:
+        snapshot: 現在の DatasetSnapshot を返す関数（SnapshotRefresher.snapshot など）
+        store: AlertStore
+        sink: send(alerts) を持つ通知先（FileSink / WebhookSink）。alerts は通知するアラートの辞書のリスト
+        interval: 評価する間隔（秒）
+        rules, segments: evaluate_alerts の検知ルールとセグメント
+        cooldown_days: apply_cooldown のクールダウン期間
+
+    Example:
+        scheduler = AlertScheduler(lambda: refresher.snapshot, AlertStore("data/alerts"), FileSink("data/alerts/outbox.jsonl"))
+        scheduler.start()
+        alerts = scheduler.store.latest()   # アラートページはストアを読むだけ
+    """
+
+    def __init__(self, snapshot, store: AlertStore, sink, interval=60, rules=ALERT_RULES, segments=ALERT_SEGMENTS,
+                 cooldown_days=ALERT_COOLDOWN_DAYS):
+        self._snapshot = snapshot
+        self.store = store
+        self.sink = sink
+        self.interval = interval
+        self.rules = rules
+        self.segments = segments
+        self.cooldown_days = cooldown_days
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def evaluate(self) -> int:
+        """新しいデータを評価して保存し、pending のアラートを通知する。通知した件数を返す"""
+        with self._lock:
+            snapshot = self._snapshot()
+            if snapshot is None:
+                return 0
+            state = self.store.state()
+            alerts = self.store.read()
+            version = str(snapshot.version)
+
+            if state.get('version') != version:
+                # 最終日は集計途中なので、その前日までの完了した日だけを評価する
+                cube = snapshot.cube
+                complete_until = cube['event_date'].max() - pd.Timedelta(days=1) if len(cube) else None
+                complete = slice_period(cube, snapshot.cube_date_index, end_date=complete_until) if len(cube) else cube
+                latest = complete['event_date'].max() if len(complete) else None
+                evaluated_until = state.get('evaluated_until') if state.get('enough_data') else None
+                since = None
+                # データが差し替わって期間が戻った場合（evaluated_until > latest）は完了した最新日から評価し直す
+                if evaluated_until is not None and latest is not None and pd.Timestamp(evaluated_until) <= latest:
+                    since = pd.Timestamp(evaluated_until) + pd.Timedelta(days=1)
+
+                if since is not None and since > latest:
+                    # 完了した日が増えていない（最終日のデータが増えただけ）
+                    state = {**state, 'version': version}
+                else:
+                    detected = evaluate_alerts(complete, self.rules, self.segments, since=since)
+                    state = {
+                        'version': version,
+                        'evaluated_until': None if detected is None else str(latest.date()),
+                        'enough_data': detected is not None,
+                    }
+                    if detected is not None:
+                        alerts = merge_alerts(alerts, detected, since if since is not None else latest)
+                        alerts = apply_cooldown(alerts, list(dict.fromkeys(self.rules['level'])), self.cooldown_days)
+                state['evaluated_at'] = datetime.now().isoformat(timespec='seconds')
+
+            pending = alerts['status'] == 'pending'
+            sent = 0
+            if pending.any():
+                try:
+                    self.sink.send(alerts[pending].drop(columns=['status', 'notified_at']).to_dict('records'))
+                    alerts.loc[pending, 'status'] = 'notified'
+                    alerts.loc[pending, 'notified_at'] = pd.Timestamp.now()
+                    sent = int(pending.sum())
+                finally:
+                    # 送信に失敗しても評価結果は保存する（pending のまま次回送り直す）
+                    self.store.write(alerts, state)
+            else:
+                self.store.write(alerts, state)
+            return sent
+
+    def start(self):
+        """最初の評価をしてから（まだなければ）、定期評価のスレッドを開始する"""
+        if not self.store.state():
+            self.evaluate()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="alert-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.evaluate()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logging.getLogger(__name__).exception("アラートの評価・通知に失敗しました")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from analytics.datasource import BIGQUERY_DATASET_DIR, DUMMY_DATA_PATH, DUMMY_DATASET_DIR, DataSource
+    from analytics.snapshot import SnapshotRefresher
+
+    parser = argparse.ArgumentParser(description="アラートを定期的に評価して保存・通知する（ダッシュボードとは別プロセスのワーカー）")
+    parser.add_argument("csv_path", nargs="?", default=DUMMY_DATA_PATH,
+                        help="イベントデータのCSV（BigQuery・イベントコレクターを指定しない場合に読む。既定はダッシュボードと同じ）")
+    parser.add_argument("dataset_dir", nargs="?", default=DUMMY_DATASET_DIR, help="CSVを変換したParquetデータセットの保存先")
+    parser.add_argument("store_dir", nargs="?", default=ALERT_STORE_DIR, help="アラートの保存先（既定はダッシュボードと同じ）")
+    parser.add_argument("--bigquery-table", default=os.environ.get("BIGQUERY_EVENTS_TABLE"),
+                        help="BigQueryのイベントテーブル（既定は環境変数 BIGQUERY_EVENTS_TABLE）")
+    parser.add_argument("--bigquery-dir", default=BIGQUERY_DATASET_DIR,
+                        help="BigQueryから取得したイベントのローカルキャッシュ（既定はダッシュボードと同じ）")
+    parser.add_argument("--collector-dir", default=os.environ.get("COLLECTOR_DATASET_DIR"),
+                        help="イベントコレクターの書き出し先（既定は環境変数 COLLECTOR_DATASET_DIR）")
+    parser.add_argument("--webhook-url", help="通知先のWebhook（省略時は store_dir/outbox.jsonl に追記）")
+    parser.add_argument("--interval", type=float, default=60, help="評価する間隔（秒）")
+    parser.add_argument("--once", action="store_true", help="1回だけ評価して終了する")
+    args = parser.parse_args()
+
+    # ダッシュボード（views.common.DATA_SOURCE）と同じ順に取得元を選ぶ
+    source = DataSource(
+        args.csv_path, args.dataset_dir,
+        bigquery_table=args.bigquery_table,
+        bigquery_dir=args.bigquery_dir,
+        collector_dir=args.collector_dir,
+    )
+    refresher = SnapshotRefresher(source.fingerprint, source.build, args.interval).start()
+    sink = WebhookSink(args.webhook_url) if args.webhook_url else FileSink(os.path.join(args.store_dir, "outbox.jsonl"))
+    scheduler = AlertScheduler(lambda: refresher.snapshot, AlertStore(args.store_dir), sink, args.interval)
+    sent = scheduler.evaluate()
+    print(f"✅ アラートを評価しました: {sent} 件通知 → {args.store_dir}")
+    if not args.once:
+        scheduler.start()
+        threading.Event().wait()
@@ -0,0 +1,185 @@
+"""
+日別KPIの急変の検知
+ロールアップキューブの行をセグメント（デバイス × チャネル × LP などの切り口の組み合わせ）× 日付の配列に合計し、
+全指標の前日比と直前7日間の移動平均との比を配列演算でまとめて求めてから、ALERT_RULES の各ルールと比べる。
+全体（切り口なし）の前日比は BigQuery の v_alerts ビューと同じ計算
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.filters import ALL
+from analytics.rates import rate_array
+
+# 移動平均の日数
+ALERT_MA_WINDOW = 7
+# 検知に必要な日数（最新日と、移動平均に使う直前の日）
+ALERT_MIN_DAYS = ALERT_MA_WINDOW + 1
+
+# 検知する指標: {指標名: (分子の列, 分母の列)}。分母が None の指標はキューブの列の合計そのもの
+ALERT_METRICS = {
+    'sessions': ('sessions', None),
+    'cvr': ('conversions', 'sessions'),
+    'fv_retention_rate': ('fv_retained', 'sessions'),
+    'final_cta_rate': ('final_cta_reached', 'sessions'),
+    'avg_load_time_ms': ('load_time_ms_sum', 'load_time_ms_count'),
+}
+
+# 比較の種類: dod（前日比）, vs_ma7（直前 ALERT_MA_WINDOW 日間の平均との比）
+ALERT_COMPARISONS = ['dod', 'vs_ma7']
+
+# 検知するセグメント（キューブの列の組み合わせ）。() は全体。各組み合わせの値ごとに1セグメントになる
+ALERT_SEGMENTS = [
+    (),
+    ('device_type',),
+    ('channel',),
+    ('page_location',),
+    ('device_type', 'channel', 'page_location'),
+]
+
+# 検知ルール（重要度の高い順。同じセグメント・日付・指標・比較では最初に一致したルールだけを採用）
+# lower <= 変化率 < upper で、比較の基準（前日・移動平均）のセッション数が min_sessions 以上のときにアラートにする
+ALERT_RULES = pd.DataFrame(
+    [
+        ('high', 'cvr', 'dod', -np.inf, -0.5, 30),
+        ('high', 'sessions', 'dod', -np.inf, -0.5, 30),
+        ('medium', 'cvr', 'dod', -0.5, -0.3, 30),
+        ('medium', 'sessions', 'dod', -0.5, -0.3, 30),
+        ('medium', 'cvr', 'vs_ma7', -np.inf, -0.3, 30),
+        ('medium', 'sessions', 'vs_ma7', -np.inf, -0.3, 30),
+        ('medium', 'fv_retention_rate', 'vs_ma7', -np.inf, -0.2, 30),
+        ('medium', 'final_cta_rate', 'vs_ma7', -np.inf, -0.3, 30),
+        ('medium', 'avg_load_time_ms', 'vs_ma7', 0.5, np.inf, 30),
+    ],
+    columns=['level', 'metric', 'comparison', 'lower', 'upper', 'min_sessions'],
+)
+
+
+def _segment_totals(rows: pd.DataFrame, dimensions, dates: np.ndarray, columns):
+    """
+    キューブの行を (セグメント × 日付) の2次元配列に合計する
+
+    Returns:
+        (keys, totals): keys はセグメントごとの dimensions の値（dimensions の値が欠損の行は除く）、
+        totals は {列名: セグメント数 × 日数の配列}
+    """
+    if dimensions:
+        grouped = rows.groupby(list(dimensions), observed=True)
+        # dimensions の値が欠損の行は ngroup が NaN になるので -1 にする（整数のまま valid で除く）
+        segment = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        keys = grouped.size().index.to_frame(index=False)
+    else:
+        segment = np.zeros(len(rows), dtype=np.int64)
+        keys = pd.DataFrame(index=range(1))
+    valid = segment >= 0
+    day = dates.searchsorted(rows['event_date'].to_numpy())
+    cells = segment[valid] * len(dates) + day[valid]
+    shape = (len(keys), len(dates))
+    totals = {
+        col: np.bincount(cells, weights=rows[col].to_numpy(dtype=np.float64)[valid], minlength=shape[0] * shape[1]).reshape(shape)
+        for col in columns
+    }
+    return keys, totals
+
+
+def _moving_average(values: np.ndarray) -> np.ndarray:
+    """各日の直前 ALERT_MA_WINDOW 日間（最初の日は欠損）の平均（日付が2次元目）"""
+    cumsum = np.concatenate([np.zeros((len(values), 1)), np.cumsum(values, axis=1)], axis=1)
+    end = np.arange(values.shape[1])
+    start = np.maximum(end - ALERT_MA_WINDOW, 0)
+    return rate_array(cumsum[:, end] - cumsum[:, start], end - start, fill=np.nan)
+
+
+def kpi_changes(totals: dict) -> dict:
+    """
+    指標ごとの値・比較の基準・変化率
+
+    Args:
+        totals: {キューブの列名: セグメント数 × 日数の配列}（日付は連続した日の昇順）
+
+    Returns:
+        dict: {指標名: {'value', 'dod_base', 'dod', 'vs_ma7_base', 'vs_ma7'}}。値はすべて totals と同じ形の配列。
+        *_base は比較の基準（前日の値・直前7日間の平均）、dod / vs_ma7 は基準に対する変化率（基準が0・欠損の場合は0）
+    """
+    changes = {}
+    for metric, (numerator, denominator) in ALERT_METRICS.items():
+        if numerator not in totals or (denominator is not None and denominator not in totals):
+            continue
+        value = totals[numerator] if denominator is None else rate_array(totals[numerator], totals[denominator])
+        previous = np.full(value.shape, np.nan)
+        previous[:, 1:] = value[:, :-1]
+        average = _moving_average(value)
+        changes[metric] = {
+            'value': value,
+            'dod_base': previous,
+            'dod': rate_array(value - previous, previous),
+            'vs_ma7_base': average,
+            'vs_ma7': rate_array(value - average, average),
+        }
+    return changes
+
+
+def evaluate_alerts(rows: pd.DataFrame, rules: pd.DataFrame = ALERT_RULES, segments=ALERT_SEGMENTS, since=None):
+    """
+    ルールに当てはまる指標の急変を全セグメントについて求める
+
+    Args:
+        rows: build_cube / query_cube の戻り値
+        rules: ALERT_RULES と同じ列を持つ検知ルール
+        segments: ALERT_SEGMENTS と同じ形式の切り口の組み合わせ
+        since: この日付以降の各日を判定する（省略時は最新日だけ）
+
+    Returns:
+        pd.DataFrame | None: 1件1行で、event_date, segments に現れる切り口の列（使っていない切り口は ALL）,
+        level, metric, comparison, change（変化率）, baseline（前日の値・直前7日間の平均）, current（当日の値）,
+        sessions（比較の基準のセッション数）の列。日付・重要度・セグメントの順に並ぶ。
+        データの期間が ALERT_MIN_DAYS 日に満たない場合は None
+    """
+    if rows.empty:
+        return None
+    first, last = rows['event_date'].min(), rows['event_date'].max()
+    dates = pd.date_range(first.normalize(), last.normalize(), freq='D').to_numpy()
+    if len(dates) < ALERT_MIN_DAYS:
+        return None
+    evaluated = np.arange(len(dates) - 1 if since is None else dates.searchsorted(np.datetime64(pd.Timestamp(since)), 'left'), len(dates))
+
+    columns = {col for spec in ALERT_METRICS.values() for col in spec if col is not None and col in rows.columns}
+    dimensions = list(dict.fromkeys(dim for segment in segments for dim in segment))
+    levels = list(dict.fromkeys(rules['level']))
+    found = []
+    for segment in segments:
+        keys, totals = _segment_totals(rows, segment, dates, sorted(columns))
+        changes = kpi_changes(totals)
+        for rule in rules.itertuples(index=False):
+            if rule.metric not in changes:
+                continue
+            metric = changes[rule.metric]
+            change = metric[rule.comparison][:, evaluated]
+            base_sessions = changes['sessions'][f'{rule.comparison}_base'][:, evaluated]
+            hit = (rule.lower <= change) & (change < rule.upper) & (base_sessions >= rule.min_sessions)
+            seg, day = np.nonzero(hit)
+            if not len(seg):
+                continue
+            alerts = keys.iloc[seg].reset_index(drop=True)
+            alerts['event_date'] = dates[evaluated[day]]
+            alerts['level'] = rule.level
+            alerts['metric'] = rule.metric
+            alerts['comparison'] = rule.comparison
+            alerts['change'] = change[seg, day]
+            alerts['baseline'] = metric[f'{rule.comparison}_base'][seg, evaluated[day]]
+            alerts['current'] = metric['value'][seg, evaluated[day]]
+            alerts['sessions'] = base_sessions[seg, day]
+            alerts['_segment'] = segments.index(segment)
+            alerts['_key'] = seg
+            found.append(alerts)
+
+    result_columns = ['event_date', *dimensions, 'level', 'metric', 'comparison', 'change', 'baseline', 'current', 'sessions']
+    if not found:
+        return pd.DataFrame(columns=result_columns)
+    alerts = pd.concat(found, ignore_index=True)
+    alerts = alerts.drop_duplicates(['_segment', '_key', 'event_date', 'metric', 'comparison'])
+    alerts['_level'] = alerts['level'].map({level: i for i, level in enumerate(levels)})
+    alerts = alerts.sort_values(['event_date', '_level', '_segment', '_key'], kind='stable')
+    for dim in dimensions:
+        alerts[dim] = alerts[dim].astype(object).where(alerts[dim].notna(), ALL) if dim in alerts else ALL
+    return alerts[result_columns].reset_index(drop=True)
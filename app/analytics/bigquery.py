@@ -0,0 +1,236 @@
+"""
+BigQueryからのイベントデータ取得
+BigQuery Storage Read API でイベントテーブルをArrow形式で読み込み、storage と同じ
+日付パーティション付きParquetデータセットにローカルキャッシュする。
+2回目以降は前回取得した最新の event_timestamp（ハイウォーターマーク）から BIGQUERY_LATE_ARRIVAL だけ遡った時刻以降の行だけを取得し、
+遅れて届いた行を取り込む（読み直した行のうちローカルキャッシュにある行は除く）
+"""
+
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from analytics.storage import EVENT_SCHEMA, OPTIONAL_COLUMNS, PARTITIONING
+
+# 取得済みの最新 event_timestamp を記録するファイル（'_'始まりなのでデータセットの走査対象外）
+_HIGH_WATER_MARK = '_HIGH_WATER_MARK'
+
+# 遅れてテーブルに届く行を取り込むため、ハイウォーターマークから遡って読み直す幅（これより遅れた行は取り込まない）
+BIGQUERY_LATE_ARRIVAL = pd.Timedelta(hours=6)
+
+# 同じイベントかどうかの判定に使う列（読み直した行とローカルキャッシュの行の突き合わせ）
+_EVENT_KEY = ['event_timestamp', 'session_id', 'event_name']
+
+
+class StorageReadSource:
+    """
+    BigQuery Storage Read API でテーブルを読むイベントソース
+
+    クエリを実行せずにテーブルを直接読むため、スキャン料金ではなく読み込んだ行・列の分だけ課金される。
+    google-cloud-bigquery-storage は読み込み時に初めてimportする（ダミーデータのみの環境では不要）
+
+    Args:
+        table_id: "project.dataset.table" 形式のテーブル（events_flat_tbl と同じ列構成）
+        billing_project: 読み込みセッションを作成するプロジェクト（省略時はテーブルのプロジェクト）
+        client: BigQueryReadClient 互換のクライアント（テスト用の差し替え。省略時は既定の認証情報で作成）
+    """
+
+    def __init__(self, table_id, billing_project=None, client=None):
+        self.project, self.dataset, self.table = table_id.split('.')
+        self.billing_project = billing_project or self.project
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            from google.cloud.bigquery_storage import BigQueryReadClient
+            self._client = BigQueryReadClient()
+        return self._client
+
+    def read(self, columns, since=None) -> pa.Table:
+        """columns の列について、event_timestamp が since 以降の行を読み込む（since=None は全行）"""
+        from google.cloud.bigquery_storage import types
+
+        client = self._get_client()
+        session = client.create_read_session(
+            parent=f"projects/{self.billing_project}",
+            read_session=types.ReadSession(
+                table=f"projects/{self.project}/datasets/{self.dataset}/tables/{self.table}",
+                data_format=types.DataFormat.ARROW,
+                read_options=types.ReadSession.TableReadOptions(
+                    selected_fields=list(columns),
+                    row_restriction=row_restriction(since),
+                ),
+            ),
+        )
+        tables = [client.read_rows(stream.name).to_arrow(session) for stream in session.streams]
+        if not tables:
+            return EVENT_SCHEMA.empty_table().select(list(columns))
+        return pa.concat_tables(tables)
+
+
+class ArrowTableSource:
+    """
+    メモリ上のArrowテーブルを返すイベントソース（BigQueryの代わりに差分取得の動作確認・テストに使う）
+
+    Example:
+        source = ArrowTableSource(table)
+        sync_events(source, "data/events")   # 全件
+        source.append(new_rows)
+        sync_events(source, "data/events")   # new_rows のうち未取得の行だけ（遅れて届いた行も含む）
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.reads = []
+
+    def append(self, table: pa.Table):
+        self.table = pa.concat_tables([self.table, table.cast(self.table.schema)])
+
+    def read(self, columns, since=None) -> pa.Table:
+        self.reads.append(since)
+        table = self.table
+        if since is not None:
+            timestamps = table['event_timestamp']
+            table = table.filter(pc.greater_equal(timestamps, pa.scalar(since.to_pydatetime(), timestamps.type)))
+        return table.select(list(columns))
+
+
+def row_restriction(since=None) -> str:
+    """
+    Storage Read API の row_restriction（SQLのWHERE句相当）
+
+    event_date の条件も付けて、日付パーティション分割されたテーブルでは古いパーティションを読まないようにする
+    """
+    if since is None:
+        return ""
+    since = pd.Timestamp(since)
+    return (
+        f"event_date >= DATE '{since.date().isoformat()}' "
+        f"AND event_timestamp >= TIMESTAMP '{since.isoformat(sep=' ')}'"
+    )
+
+
+def read_high_water_mark(dataset_dir):
+    """取得済みの最新 event_timestamp（未取得なら None）"""
+    path = os.path.join(dataset_dir, _HIGH_WATER_MARK)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return pd.Timestamp(f.read().strip())
+
+
+def last_synced(dataset_dir):
+    """
+    最後にイベントを追加した時刻（ハイウォーターマークのファイルの更新時刻, ns。未取得なら None）
+    遅れて届いた行だけを追加してハイウォーターマークが変わらなかった場合も変わる
+    """
+    path = os.path.join(dataset_dir, _HIGH_WATER_MARK)
+    if not os.path.exists(path):
+        return None
+    return os.stat(path).st_mtime_ns
+
+
+def _write_high_water_mark(dataset_dir, value):
+    path = os.path.join(dataset_dir, _HIGH_WATER_MARK)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(pd.Timestamp(value).isoformat())
+    os.replace(tmp_path, path)
+
+
+def _conform(table: pa.Table) -> pa.Table:
+    """BigQueryの型（TIMESTAMPはUTCのタイムゾーン付き等）を EVENT_SCHEMA に揃える。ない列はNULLで埋める"""
+    columns = []
+    for field in EVENT_SCHEMA:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table[field.name]
+        if pa.types.is_timestamp(column.type) and column.type.tz is not None:
+            column = column.cast(pa.timestamp(column.type.unit))
+        columns.append(column.cast(field.type))
+    return pa.Table.from_arrays(columns, schema=EVENT_SCHEMA)
+
+
+def _drop_stored(table: pa.Table, dataset_dir, since) -> pa.Table:
+    """table の行のうち、ローカルキャッシュの since 以降にある行（_EVENT_KEY が同じ行）を除く"""
+    timestamp_type = EVENT_SCHEMA.field('event_timestamp').type
+    dataset = ds.dataset(dataset_dir, schema=EVENT_SCHEMA, format='parquet', partitioning=PARTITIONING)
+    stored = dataset.to_table(
+        columns=_EVENT_KEY,
+        filter=(ds.field('event_date') >= pa.scalar(since.date(), pa.date32()))
+        & (ds.field('event_timestamp') >= pa.scalar(since.to_pydatetime(), timestamp_type)),
+    )
+    if stored.num_rows == 0:
+        return table
+    stored_keys = pd.MultiIndex.from_frame(stored.to_pandas())
+    new = ~pd.MultiIndex.from_frame(table.select(_EVENT_KEY).to_pandas()).isin(stored_keys)
+    return table.filter(pa.array(new))
+
+
+def sync_events(source, dataset_dir, late_arrival=BIGQUERY_LATE_ARRIVAL) -> int:
+    """
+    ソースからハイウォーターマークの late_arrival 前以降のイベントを取得し、未取得の行だけをローカルのParquetデータセットに追記する
+
+    ハイウォーターマーク直前の区間を読み直すので、前回の取得後に遅れてテーブルに届いた行も取り込める。
+    読み直した行のうちローカルキャッシュにある行（_EVENT_KEY が同じ行）は追記しない。
+    取得した行は event_timestamp 順に並べ、取得ごとに新しいファイルとして各日付パーティションに書き出す
+    （ファイル名に取得時刻を入れるので、read_events では同じ日付内で取得順に並ぶ）。
+    データの書き込みが終わってからハイウォーターマークを更新する。
+
+    Args:
+        source: read(columns, since) -> pa.Table を持つイベントソース（StorageReadSource / ArrowTableSource）
+        dataset_dir: ローカルキャッシュの保存先（storage.read_events でそのまま読める）
+        late_arrival: ハイウォーターマークから遡って読み直す幅
+
+    Returns:
+        int: 追加したイベント数
+    """
+    os.makedirs(dataset_dir, exist_ok=True)
+    high_water_mark = read_high_water_mark(dataset_dir)
+    since = None if high_water_mark is None else high_water_mark - pd.Timedelta(late_arrival)
+
+    # OPTIONAL_COLUMNS（ダミーデータにだけある列）はテーブルにないので読まず、_conform でNULLを入れる
+    table = source.read([name for name in EVENT_SCHEMA.names if name not in OPTIONAL_COLUMNS], since)
+    if table.num_rows == 0:
+        return 0
+    table = _conform(table)
+    if since is not None:
+        table = _drop_stored(table, dataset_dir, since)
+        if table.num_rows == 0:
+            return 0
+    table = table.sort_by('event_timestamp')
+
+    ds.write_dataset(
+        table,
+        dataset_dir,
+        format='parquet',
+        partitioning=PARTITIONING,
+        existing_data_behavior='overwrite_or_ignore',
+        basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+    )
+    latest = pd.Timestamp(pc.max(table['event_timestamp']).as_py())
+    _write_high_water_mark(dataset_dir, latest if high_water_mark is None else max(latest, high_water_mark))
+    return table.num_rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from analytics.storage import read_events
+
+    parser = argparse.ArgumentParser(description="BigQueryのイベントテーブルを差分取得してParquetにキャッシュする")
+    parser.add_argument("table_id", help="project.dataset.table")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("--billing-project")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    added = sync_events(StorageReadSource(args.table_id, args.billing_project), args.dataset_dir)
+    events = read_events(args.dataset_dir, columns=['session_id'])
+    print(f"✅ 取得完了: {added} イベント追加（合計 {len(events)} イベント, {datetime.now() - started}）→ {args.dataset_dir}")
@@ -0,0 +1,175 @@
+"""
+属性値ごとのビットマップインデックス
+イベントデータ・セッションファクトの各フィルター列（LP・デバイス・新規/リピート・CV/非CV・チャネル・参照元/メディア・
+A/Bテストのバリアント）について、値ごとに「その値を持つ行」のビットマップを作っておく。
+フィルターの組み合わせはビットマップの AND、件数はビットの数（popcount）で求めるので、絞り込んだDataFrameを作らない。
+ビットマップは BITMAP_BLOCK_ROWS 行ごとのブロックに分け、1行もないブロックは持たない（出現の少ない値ほど小さくなる）
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.filters import ALL, FilterSpec
+from analytics.periods import DateIndex, period_bounds
+
+# インデックスを作る列（データにない列は作らない）
+BITMAP_DIMENSIONS = [
+    'page_location', 'device_type', 'user_type', 'conversion_status', 'channel', 'source_medium', 'ab_variant',
+]
+
+# 1ブロックの行数（64の倍数）
+BITMAP_BLOCK_ROWS = 1 << 16
+_BLOCK_WORDS = BITMAP_BLOCK_ROWS // 64
+
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    """真偽値の配列をブロック数 × _BLOCK_WORDS の uint64 配列に詰める（行 i はブロック i // BITMAP_BLOCK_ROWS）"""
+    packed = np.packbits(mask, bitorder='little')
+    block_count = -(-len(mask) // BITMAP_BLOCK_ROWS)
+    words = np.zeros(block_count * BITMAP_BLOCK_ROWS // 8, dtype=np.uint8)
+    words[:len(packed)] = packed
+    return words.view('<u8').reshape(block_count, _BLOCK_WORDS)
+
+
+class Bitmap(NamedTuple):
+    """
+    行の集合。blocks[i] 番目のブロック（行 blocks[i] * BITMAP_BLOCK_ROWS から）のビットが words[i] に入っている。
+    blocks は昇順で、含まれないブロック（すべて0）は持たない
+    """
+    length: int
+    blocks: np.ndarray
+    words: np.ndarray
+
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> 'Bitmap':
+        """真偽値の配列から作る"""
+        words = _pack(mask)
+        blocks = np.flatnonzero(words.any(axis=1))
+        return cls(len(mask), blocks, words[blocks])
+
+    @classmethod
+    def from_range(cls, length: int, lo: int, hi: int) -> 'Bitmap':
+        """行 lo 〜 hi - 1 の集合"""
+        if hi <= lo:
+            return cls(length, np.empty(0, dtype=np.int64), np.empty((0, _BLOCK_WORDS), dtype=np.uint64))
+        first, last = lo // BITMAP_BLOCK_ROWS, (hi - 1) // BITMAP_BLOCK_ROWS
+        words = np.full((last - first + 1, _BLOCK_WORDS), np.iinfo(np.uint64).max, dtype=np.uint64)
+        # 両端のブロックだけ範囲外のビットを落とす
+        for i in {0, last - first}:
+            offset = (first + i) * BITMAP_BLOCK_ROWS
+            rows = np.arange(offset, offset + BITMAP_BLOCK_ROWS)
+            words[i] = _pack((rows >= lo) & (rows < hi))[0]
+        return cls(length, np.arange(first, last + 1), words)
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        blocks, mine, theirs = np.intersect1d(self.blocks, other.blocks, assume_unique=True, return_indices=True)
+        words = self.words[mine] & other.words[theirs]
+        keep = words.any(axis=1)
+        return Bitmap(self.length, blocks[keep], words[keep])
+
+    def count(self) -> int:
+        """行数（popcount の合計）"""
+        return int(np.bitwise_count(self.words).sum())
+
+    def rows(self) -> np.ndarray:
+        """行の位置（昇順。filter_rows と同じ形式）"""
+        bits = np.unpackbits(self.words.view(np.uint8), axis=1, bitorder='little')
+        block, offset = np.nonzero(bits)
+        return self.blocks[block] * BITMAP_BLOCK_ROWS + offset
+
+    @property
+    def nbytes(self) -> int:
+        return self.blocks.nbytes + self.words.nbytes
+
+
+class BitmapIndex:
+    """
+    データの列ごと・値ごとのビットマップと日付インデックス
+
+    期間は日付インデックスの行範囲、属性条件は値のビットマップで表し、すべての AND をとる。
+    データ（スナップショットの events / sessions）は読み取り専用なので、一度作ったら変わらない
+
+    Args:
+        df: event_date 昇順に並んだデータ（イベントデータまたはセッションファクト）
+        date_index: df['event_date'] から作った DateIndex
+        dimensions: インデックスを作る列
+
+    Example:
+        index = BitmapIndex(snapshot.sessions, snapshot.session_date_index)
+        index.count(spec)                          # 条件に一致するセッション数
+        index.value_counts(spec, 'device_type')    # デバイスごとのセッション数（spec の device_type は無視する）
+    """
+
+    def __init__(self, df: pd.DataFrame, date_index: DateIndex, dimensions=BITMAP_DIMENSIONS):
+        self.length = len(df)
+        self.date_index = date_index
+        self.values = {}
+        self.bitmaps = {}
+        for col in dimensions:
+            if col not in df.columns:
+                continue
+            values = df[col] if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].astype('category')
+            codes = values.cat.codes.to_numpy()
+            self.values[col] = values.cat.categories
+            self.bitmaps[col] = [Bitmap.from_mask(codes == code) for code in range(len(values.cat.categories))]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bitmap.nbytes for bitmaps in self.bitmaps.values() for bitmap in bitmaps)
+
+    def bitmap(self, col, value) -> Bitmap:
+        """列 col が value の行（値がなければ空）"""
+        categories = self.values[col]
+        if value not in categories:
+            return Bitmap.from_range(self.length, 0, 0)
+        return self.bitmaps[col][categories.get_loc(value)]
+
+    def select(self, spec: FilterSpec, **selections) -> Bitmap:
+        """
+        条件に一致する行
+
+        Args:
+            spec: フィルター条件
+            selections: 追加の条件（ab_variant など spec にない列や、spec の条件にさらに重ねる条件）。
+                None・空文字・"すべて" は絞り込まない。spec と同じ列で別の値を指定すると一致する行はない
+
+        Raises:
+            KeyError: インデックスを作っていない列で絞り込む場合
+        """
+        result = Bitmap.from_range(self.length, *period_bounds(self.date_index, spec.start_date, spec.end_date))
+        conditions = [
+            *spec.selections().items(),
+            *((col, value) for col, value in selections.items() if value and value != ALL),
+        ]
+        # ブロック数の少ないビットマップから AND をとると、途中の結果が早く小さくなる
+        for bitmap in sorted((self.bitmap(col, value) for col, value in conditions), key=lambda b: len(b.blocks)):
+            result = result & bitmap
+        return result
+
+    def count(self, spec: FilterSpec, **selections) -> int:
+        """条件に一致する行数"""
+        return self.select(spec, **selections).count()
+
+    def rows(self, spec: FilterSpec, **selections) -> np.ndarray:
+        """条件に一致する行の位置（filter_rows と同じ結果）"""
+        return self.select(spec, **selections).rows()
+
+    def value_counts(self, spec: FilterSpec, col, **selections) -> pd.Series:
+        """
+        条件に一致する行の、列 col の値ごとの行数（ドロップダウンの件数表示用）
+
+        spec・selections の col の条件は無視する（選んでいる値以外の件数も出す）
+
+        Returns:
+            pd.Series: インデックスは col の値（昇順。0件の値も含む）
+        """
+        if col in FilterSpec._fields:
+            spec = spec._replace(**{col: None})
+        selections.pop(col, None)
+        base = self.select(spec, **selections)
+        return pd.Series(
+            [(base & bitmap).count() for bitmap in self.bitmaps[col]],
+            index=self.values[col], name=col, dtype=np.int64,
+        )
@@ -0,0 +1,65 @@
+"""
+セッションブレークダウン
+任意の切り口（1列または列の組み合わせ）について、セッション数・CV数・FV残存数・最終CTA到達数・
+エンゲージ数・クリック数と平均値を、セッションファクトの1回のグループ化でまとめて集計する
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.rates import rate_array
+
+# 集計列: (ファクトの列, 集計関数)
+BREAKDOWN_AGGREGATIONS = {
+    'sessions': ('session_id', 'size'),
+    'users': ('user_pseudo_id', 'nunique'),
+    'conversions': ('converted', 'sum'),
+    'clicks': ('clicks', 'sum'),
+    'fv_retained': ('fv_retained', 'sum'),
+    'final_cta_reached': ('final_cta_reached', 'sum'),
+    'engaged': ('engaged', 'sum'),
+    'stay_ms_sum': ('stay_ms_sum', 'sum'),
+    'stay_ms_count': ('stay_ms_count', 'sum'),
+    'max_page_reached_sum': ('max_page_reached_sum', 'sum'),
+    'max_page_reached_count': ('max_page_reached_count', 'sum'),
+    'completion_rate_sum': ('completion_rate_sum', 'sum'),
+    'completion_rate_count': ('completion_rate_count', 'sum'),
+    'avg_max_page': ('max_page', 'mean'),
+}
+
+# 平均値の列: (合計の列, 件数の列)。イベント単位の平均（元データの groupby().mean() と同じ値）になる
+BREAKDOWN_AVERAGES = {
+    'avg_stay_ms': ('stay_ms_sum', 'stay_ms_count'),
+    'avg_page_reached': ('max_page_reached_sum', 'max_page_reached_count'),
+    'avg_completion_rate': ('completion_rate_sum', 'completion_rate_count'),
+}
+
+
+def session_breakdown(facts: pd.DataFrame, by, observed=True) -> pd.DataFrame:
+    """
+    セッションファクトを by ごとに集計する
+
+    CV・FV残存・最終CTA到達・エンゲージはセッション単位のフラグの合計なので、
+    条件ごとにイベントデータを絞り込んで nunique してマージする必要がない
+
+    Args:
+        facts: build_session_facts の戻り値（フィルター済みでもよい）。
+            セッション内で値が変わる切り口は build_session_facts(events, by=...) で作ったファクトを渡す
+        by: 切り口の列名または列名のリスト
+        observed: カテゴリ型の切り口で、該当セッションのないカテゴリを除くか（pd.cut の区間をすべて表示する場合は False）
+
+    Returns:
+        pd.DataFrame: by の列と BREAKDOWN_AGGREGATIONS・BREAKDOWN_AVERAGES の列を持つ集計表（by の昇順）。
+        件数の列は整数
+    """
+    aggregations = {
+        name: (column, func)
+        for name, (column, func) in BREAKDOWN_AGGREGATIONS.items()
+        if column in facts.columns
+    }
+    stats = facts.groupby(by, observed=observed).agg(**aggregations).reset_index()
+
+    for name, (total, count) in BREAKDOWN_AVERAGES.items():
+        if total in stats.columns:
+            stats[name] = rate_array(stats[total], stats[count], fill=np.nan)
+    return stats
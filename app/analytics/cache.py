@@ -0,0 +1,77 @@
+"""
+件数とメモリ量に上限を持つLRUキャッシュ
+Streamlitのサーバープロセスに常駐させ、集計結果をフィルター条件ごとに再利用する
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def estimate_nbytes(value) -> int:
+    """キャッシュに載せる値のおおよそのメモリ量（バイト）"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(index=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    最近使われていないものから追い出すキャッシュ
+
+    エントリ数が max_entries を、推定メモリ量の合計が max_bytes を超えないように古いエントリを削除する。
+    1エントリで max_bytes を超える値はキャッシュせずにそのまま返す。
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        """key のキャッシュがあればそれを、なければ compute() の結果を保存して返す"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        nbytes = estimate_nbytes(value)
+        if nbytes > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while len(self._entries) > self.max_entries or self._nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self) -> dict:
+        """hits, misses, entries, nbytes を返す（監視・チューニング用）"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'nbytes': self._nbytes}
@@ -0,0 +1,41 @@
+"""
+カテゴリ型（辞書エンコード）列の補助関数
+文字列比較の代わりに整数コードで判定・集計するために使う
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def factorize(values: pd.Series):
+    """
+    欠損値も1つの値として整数コード化する。カテゴリ型は既存のコードをそのまま使う
+
+    Returns:
+        (codes, uniques): uniques[codes] が元の値になる
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        codes = values.cat.codes.to_numpy().astype(np.int64)
+        codes[codes < 0] = len(categories)
+        return codes, np.append(np.asarray(categories, dtype=object), np.nan)
+    return pd.factorize(values, use_na_sentinel=False)
+
+
+def categorical_from_codes(codes: np.ndarray, labels, index=None, name=None) -> pd.Series:
+    """
+    ユニーク値ごとのラベルと行ごとのコードからカテゴリ型の列を作る（カテゴリは昇順）
+
+    Args:
+        codes: 各行が labels の何番目かを表す整数配列
+        labels: ユニーク値ごとのラベル（同じラベルが複数回現れてもよい）
+    """
+    labels = np.asarray(labels, dtype=object)
+    categories, label_codes = np.unique(labels.astype(str), return_inverse=True)
+    values = pd.Categorical.from_codes(label_codes[codes], categories=categories)
+    return pd.Series(values, index=index, name=name)
+
+
+def code_of(values: pd.Series, value) -> int:
+    """カテゴリ型の列で value に対応するコード（存在しなければ -1）"""
+    return int(values.cat.categories.get_indexer([value])[0])
@@ -0,0 +1,92 @@
+"""
+流入チャネルの判定
+utm_source / utm_medium / リファラ有無の組み合わせごとに1回だけルールを評価し、
+結果をイベント全行に展開する
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.categorical import categorical_from_codes, factorize
+
+SNS_SOURCES = ('facebook', 'instagram', 'twitter', 'x.com', 't.co', 'linkedin', 'tiktok', 'youtube')
+
+# チャネル判定ルール（上から順に評価し、最初に一致した行のチャネルを採用）
+# medium / source は小文字で比較する値の集合、None は条件なし
+# referrer は True=リファラあり / False=リファラなし / None=条件なし
+# 1行の中の条件はすべて満たす必要がある（AND）。OR条件は行を分けて書く
+CHANNEL_RULES = pd.DataFrame(
+    [
+        # mediumがcpc, ppc, paidsearchの場合。sourceが検索エンジン系であることを優先。
+        ('Paid Search', ('cpc', 'ppc', 'paidsearch'), None, None),
+        ('Paid Social', ('paid_social', 'paidsocial', 'social_ad'), None, None),
+        ('Paid Video', ('paidvideo', 'paid_video'), None, None),
+        ('Display', ('display', 'banner', 'cpm'), None, None),
+        ('Organic Search', ('organic',), None, None),
+        # mediumがsocial、またはsourceが主要SNSの場合
+        ('Organic Social', ('social',), None, None),
+        ('Organic Social', None, SNS_SOURCES, None),
+        ('Direct', ('(none)',), ('(direct)',), None),
+        ('Email', ('email',), None, None),
+        ('Referral', ('referral',), None, None),
+    ],
+    columns=['channel', 'medium', 'source', 'referrer'],
+)
+
+DEFAULT_CHANNEL = 'Other'  # どの条件にも当てはまらない場合
+
+
+def _classify_combos(combos: pd.DataFrame, rules: pd.DataFrame) -> np.ndarray:
+    """一意な (source, medium, referrer有無) の組み合わせにルールを np.select で適用する"""
+    # 欠損値は従来の str() 変換と同じく 'nan' として扱う
+    source = combos['utm_source'].astype(str).str.lower()
+    medium = combos['utm_medium'].astype(str).str.lower()
+    has_referrer = combos['_has_referrer'].to_numpy()
+
+    conditions = []
+    for rule in rules.itertuples(index=False):
+        cond = np.ones(len(combos), dtype=bool)
+        if rule.medium is not None:
+            cond &= medium.isin(rule.medium).to_numpy()
+        if rule.source is not None:
+            cond &= source.isin(rule.source).to_numpy()
+        if rule.referrer is not None:
+            cond &= has_referrer == bool(rule.referrer)
+        conditions.append(cond)
+
+    return np.select(conditions, rules['channel'].tolist(), default=DEFAULT_CHANNEL)
+
+
+def classify_channels(df: pd.DataFrame, rules: pd.DataFrame = CHANNEL_RULES) -> pd.Series:
+    """
+    イベントデータの各行に流入チャネルを割り当てる
+
+    Args:
+        df: utm_source, utm_medium を持つイベントデータ（page_referrer は任意）
+        rules: CHANNEL_RULES と同じ形式のルール表
+
+    Returns:
+        pd.Series: df と同じインデックスを持つカテゴリ型のチャネル列
+    """
+    if 'page_referrer' in df.columns:
+        has_referrer = df['page_referrer'].notna().to_numpy()
+    else:
+        has_referrer = np.zeros(len(df), dtype=bool)
+
+    # 列ごとに factorize して整数コードを合成し、組み合わせ単位に畳み込む
+    # （判定はユニークな組み合わせの数だけ行う）
+    source_codes, source_uniques = factorize(df['utm_source'])
+    medium_codes, medium_uniques = factorize(df['utm_medium'])
+    combined = (source_codes.astype(np.int64) * len(medium_uniques) + medium_codes) * 2 + has_referrer
+    codes, combo_keys = pd.factorize(combined)
+
+    combos = pd.DataFrame(
+        {
+            'utm_source': np.asarray(source_uniques, dtype=object)[combo_keys // 2 // len(medium_uniques)],
+            'utm_medium': np.asarray(medium_uniques, dtype=object)[combo_keys // 2 % len(medium_uniques)],
+            '_has_referrer': (combo_keys % 2).astype(bool),
+        }
+    )
+    combo_channels = _classify_combos(combos, rules)
+
+    return categorical_from_codes(codes, combo_channels, index=df.index, name='channel')
@@ -0,0 +1,329 @@
+"""
+ローカルのイベントコレクター
+LPのトラッカーが送るイベント（dummy_data.csv と同じ列の JSON）を HTTP で受け取り、リクエストごとに
+Arrow の配列演算でまとめて検証してからメモリに溜め、一定時間・一定件数ごとに storage と同じ
+日付パーティション付きParquetデータセットに書き出す。書き出しは '_' 始まりの作業ディレクトリに書いてから
+各パーティションへ移すので、ダッシュボード（read_events）は書きかけのファイルを読まない。
+外部サービスに依存しないので、ローカルで負荷試験できる
+
+    python -m analytics.collector data/collected --port 8765
+    curl -X POST --data-binary @events.ndjson http://localhost:8765/collect
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.json as pajson
+
+from analytics.storage import EVENT_SCHEMA, PARTITIONING
+
+# イベントを受け付けるパス
+COLLECT_PATH = '/collect'
+
+# 書き出す間隔（秒）と、間隔を待たずに書き出す件数
+COLLECTOR_FLUSH_INTERVAL = 2.0
+COLLECTOR_BATCH_ROWS = 50_000
+# 書き出し待ちの件数の上限。超えるリクエストは 503（Retry-After）で断り、送信側に再送させる
+COLLECTOR_MAX_PENDING = 500_000
+# 1リクエストの本文の上限（バイト）
+COLLECTOR_MAX_BODY = 16 << 20
+
+# 値が必須の列
+COLLECTOR_REQUIRED = ['event_timestamp', 'event_name', 'session_id']
+# 値の範囲: {列名: (下限, 上限)}。None は制限なし。欠損値は範囲外として扱わない
+COLLECTOR_RANGES = {
+    'page_num_dom': (1, None),
+    'max_page_reached': (1, None),
+    'stay_ms': (0, None),
+    'total_duration_ms': (0, None),
+    'load_time_ms': (0, None),
+    'click_x_rel': (0, 1),
+    'click_y_rel': (0, 1),
+    'scroll_pct': (0, 1),
+    'completion_rate': (0, 1),
+}
+# 値の候補: {列名: 取りうる値}。欠損値は候補外として扱わない
+COLLECTOR_VALUES = {
+    'direction': ['forward', 'backward'],
+}
+
+# 最後に書き出した時刻と累計件数を記録するファイル（ダッシュボードが更新の検知に使う）
+_LAST_FLUSH = '_LAST_FLUSH'
+# 書き出し中のファイルを置く作業ディレクトリ（'_'始まりなのでデータセットの走査対象外）
+_STAGING = '_staging'
+
+# JSONのパース時の型。辞書型と日付は文字列として読み、検証後に EVENT_SCHEMA へキャストする
+_JSON_SCHEMA = pa.schema([
+    field.with_type(pa.string()) if pa.types.is_dictionary(field.type) or pa.types.is_date(field.type) else field
+    for field in EVENT_SCHEMA
+])
+_PARSE_OPTIONS = pajson.ParseOptions(explicit_schema=_JSON_SCHEMA, unexpected_field_behavior='ignore')
+
+
+def parse_events(body: bytes) -> pa.Table:
+    """
+    リクエストの本文（改行区切りの JSON、または JSON の配列）をパースする
+
+    Raises:
+        ValueError: JSON として読めない、または列の型に変換できない値がある場合
+    """
+    body = body.strip()
+    if body.startswith(b'['):
+        body = b"\n".join(json.dumps(event).encode('utf-8') for event in json.loads(body))
+    if not body:
+        return _JSON_SCHEMA.empty_table()
+    try:
+        return pajson.read_json(io.BytesIO(body), parse_options=_PARSE_OPTIONS)
+    except (pa.ArrowInvalid, json.JSONDecodeError) as e:
+        raise ValueError(str(e)) from e
+
+
+def validate_events(table: pa.Table):
+    """
+    必須の列・値の範囲・値の候補をまとめて検証し、EVENT_SCHEMA の型に揃える
+
+    event_date がない行は event_timestamp の日付で埋める
+
+    Returns:
+        (valid, rejected): valid は条件を満たす行のテーブル（EVENT_SCHEMA）、rejected は条件を満たさない行数
+    """
+    valid = pa.array([True] * table.num_rows) if table.num_rows else pa.array([], pa.bool_())
+    for name in COLLECTOR_REQUIRED:
+        valid = pc.and_(valid, pc.is_valid(table[name]))
+    for name, (lower, upper) in COLLECTOR_RANGES.items():
+        column = table[name]
+        if lower is not None:
+            valid = pc.and_(valid, pc.fill_null(pc.greater_equal(column, lower), True))
+        if upper is not None:
+            valid = pc.and_(valid, pc.fill_null(pc.less_equal(column, upper), True))
+    for name, values in COLLECTOR_VALUES.items():
+        column = table[name]
+        valid = pc.and_(valid, pc.or_(pc.is_null(column), pc.is_in(column, pa.array(values))))
+
+    rejected = table.num_rows - pc.sum(valid).as_py() if table.num_rows else 0
+    table = table.filter(valid)
+    event_date = pc.coalesce(table['event_date'], pc.strftime(table['event_timestamp'], format='%Y-%m-%d'))
+    table = table.set_column(table.schema.get_field_index('event_date'), 'event_date', event_date)
+    return table.cast(EVENT_SCHEMA), rejected
+
+
+def read_last_flush(dataset_dir):
+    """最後に書き出した時刻と累計件数（未書き出しなら None）"""
+    path = os.path.join(dataset_dir, _LAST_FLUSH)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip()
+
+
+class EventCollector:
+    """
+    検証済みのイベントを溜めて、micro-batch でParquetデータセットに書き出す
+
+    offer はどのスレッドから呼んでもよい。書き出し待ちが max_pending 件を超える場合は受け付けない（バックプレッシャー）。
+    書き出しは専用のスレッドが flush_interval 秒ごと、または batch_rows 件溜まったときに行う
+
+    Args:
+        dataset_dir: 書き出し先（storage.read_events でそのまま読める）
+    """
+
+    def __init__(self, dataset_dir, flush_interval=COLLECTOR_FLUSH_INTERVAL, batch_rows=COLLECTOR_BATCH_ROWS,
+                 max_pending=COLLECTOR_MAX_PENDING):
+        self.dataset_dir = dataset_dir
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+        self.max_pending = max_pending
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.last_error = None
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending_rows
+
+    def offer(self, table: pa.Table, rejected=0) -> bool:
+        """検証済みのイベントを書き出し待ちに加える。上限を超える場合は加えずに False"""
+        with self._lock:
+            if self._pending_rows + table.num_rows > self.max_pending:
+                return False
+            if table.num_rows:
+                self._pending.append(table)
+                self._pending_rows += table.num_rows
+            self.accepted += table.num_rows
+            self.rejected += rejected
+            if self._pending_rows >= self.batch_rows:
+                self._wakeup.set()
+            return True
+
+    def flush(self) -> int:
+        """書き出し待ちのイベントを書き出す。書き出した件数を返す"""
+        with self._flush_lock:
+            with self._lock:
+                tables, self._pending = self._pending, []
+            if not tables:
+                return 0
+            table = pa.concat_tables(tables).sort_by('event_timestamp')
+            staging = os.path.join(self.dataset_dir, _STAGING, str(time.time_ns()))
+            try:
+                self._write(table, staging)
+            except Exception:
+                # 書き出せなかった分は捨てずに戻し、次回書き出し直す
+                with self._lock:
+                    self._pending = tables + self._pending
+                raise
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+            with self._lock:
+                self._pending_rows -= table.num_rows
+            self.written += table.num_rows
+            tmp_path = os.path.join(self.dataset_dir, f"{_LAST_FLUSH}.tmp")
+            with open(tmp_path, 'w') as f:
+                f.write(f"{pd.Timestamp.now().isoformat()} {self.written}")
+            os.replace(tmp_path, os.path.join(self.dataset_dir, _LAST_FLUSH))
+            return table.num_rows
+
+    def _write(self, table: pa.Table, staging):
+        ds.write_dataset(
+            table,
+            staging,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f"part-{time.time_ns()}-{{i}}.parquet",
+        )
+        # 書き終わったファイルだけを各パーティションに移す（同じファイルシステム内の rename）
+        for directory, _, files in os.walk(staging):
+            target = os.path.join(self.dataset_dir, os.path.relpath(directory, staging))
+            for name in files:
+                os.makedirs(target, exist_ok=True)
+                os.replace(os.path.join(directory, name), os.path.join(target, name))
+
+    def stats(self) -> dict:
+        return {
+            'accepted': self.accepted, 'rejected': self.rejected, 'written': self.written,
+            'pending': self._pending_rows, 'max_pending': self.max_pending,
+        }
+
+    def start(self):
+        """書き出しのスレッドを開始する"""
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="event-collector", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """書き出しのスレッドを止め、残りを書き出す"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logging.getLogger(__name__).exception("イベントの書き出しに失敗しました")
+
+
+def _handler(collector: EventCollector):
+    class CollectorHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, body: dict, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Access-Control-Allow-Origin', '*')
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_OPTIONS(self):
+            self.send_response(204)
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_GET(self):
+            if self.path != '/health':
+                return self._reply(404, {'error': 'not found'})
+            self._reply(200, collector.stats())
+
+        def do_POST(self):
+            if self.path != COLLECT_PATH:
+                return self._reply(404, {'error': 'not found'})
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > COLLECTOR_MAX_BODY:
+                self.close_connection = True
+                return self._reply(413, {'error': f'body exceeds {COLLECTOR_MAX_BODY} bytes'})
+            body = self.rfile.read(length)
+            try:
+                table, rejected = validate_events(parse_events(body))
+            except ValueError as e:
+                return self._reply(400, {'error': str(e)})
+            if not collector.offer(table, rejected):
+                return self._reply(503, {'error': 'too many pending events'}, {'Retry-After': '1'})
+            self._reply(200, {'accepted': table.num_rows, 'rejected': rejected})
+
+        def log_message(self, format, *args):
+            pass
+
+    return CollectorHandler
+
+
+def serve(collector: EventCollector, host='127.0.0.1', port=8765) -> ThreadingHTTPServer:
+    """コレクターのHTTPサーバーを作る（serve_forever で待ち受ける）"""
+    return ThreadingHTTPServer((host, port), _handler(collector))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LPのトラッカーからイベントを受け取り、Parquetデータセットに書き出す")
+    parser.add_argument("dataset_dir", help="書き出し先（ダッシュボードの COLLECTOR_DATASET_DIR と同じにする）")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--flush-interval", type=float, default=COLLECTOR_FLUSH_INTERVAL, help="書き出す間隔（秒）")
+    parser.add_argument("--batch-rows", type=int, default=COLLECTOR_BATCH_ROWS, help="間隔を待たずに書き出す件数")
+    parser.add_argument("--max-pending", type=int, default=COLLECTOR_MAX_PENDING, help="書き出し待ちの件数の上限")
+    args = parser.parse_args()
+
+    collector = EventCollector(args.dataset_dir, args.flush_interval, args.batch_rows, args.max_pending).start()
+    server = serve(collector, args.host, args.port)
+    print(f"✅ イベントを受け付けています: http://{args.host}:{args.port}{COLLECT_PATH} → {args.dataset_dir}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.stop()
+        print(f"📊 {collector.stats()}")
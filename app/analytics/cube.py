@@ -0,0 +1,167 @@
+"""
+ロールアップキューブ
+セッションファクトを (日付 × フィルターの各ディメンション) の粒度で事前集計しておき、
+期間・属性フィルター付きのKPIや日別・属性別の集計を、セッション単位ではなくキューブの行の合計で求める。
+ユニークユーザー数は足し合わせられないので、セルごとの HyperLogLog スケッチをマージして推定する。
+完了率・時間帯などキューブで表せない指標はセッションファクトやイベントデータから計算する
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from analytics.filters import FilterSpec, filter_rows
+from analytics.periods import DateIndex
+from analytics.rates import rate_array
+from analytics.sessions import summarize_totals
+from analytics.sketch import build_sketches, concat_sketches, count_distinct, select_cells
+
+# キューブの粒度。event_date と FilterSpec の属性フィルター（同じ列名）に、ページパス（LPと1対1）と広告分析の切り口を加えたもの
+CUBE_DIMENSIONS = [
+    'event_date', 'page_location', 'page_path', 'device_type', 'user_type', 'conversion_status',
+    'channel', 'source_medium', 'utm_campaign', 'utm_content',
+]
+
+# 集計列: (ファクトの列, 集計関数)。どれも合計なので、キューブの行をさらに足し合わせて任意の粒度に集計できる
+CUBE_MEASURES = {
+    'sessions': ('session_id', 'size'),
+    'conversions': ('converted', 'sum'),
+    'clicks': ('clicks', 'sum'),
+    'fv_retained': ('fv_retained', 'sum'),
+    'final_cta_reached': ('final_cta_reached', 'sum'),
+    'engaged': ('engaged', 'sum'),
+    'stay_ms_sum': ('stay_ms_sum', 'sum'),
+    'stay_ms_count': ('stay_ms_count', 'sum'),
+    'max_page_reached_sum': ('max_page_reached_sum', 'sum'),
+    'max_page_reached_count': ('max_page_reached_count', 'sum'),
+    'max_page_sum': ('max_page', 'sum'),
+    'max_page_count': ('max_page', 'count'),
+    'load_time_ms_sum': ('load_time_ms_sum', 'sum'),
+    'load_time_ms_count': ('load_time_ms_count', 'sum'),
+}
+
+# ユニーク数の列: セルごとに HyperLogLog スケッチを持つファクトの列
+# （セッション数は各セッションがちょうど1つのセルに入るので、sessions の合計で正確に求まる）
+CUBE_SKETCHES = {
+    'users': 'user_pseudo_id',
+}
+
+# 平均値の列: (合計の列, 件数の列)。avg_stay_ms・avg_page_reached・avg_max_page は session_breakdown と同じ値になる
+CUBE_AVERAGES = {
+    'avg_stay_ms': ('stay_ms_sum', 'stay_ms_count'),
+    'avg_page_reached': ('max_page_reached_sum', 'max_page_reached_count'),
+    'avg_max_page': ('max_page_sum', 'max_page_count'),
+    'avg_load_time_ms': ('load_time_ms_sum', 'load_time_ms_count'),
+}
+
+
+def build_cube(facts: pd.DataFrame):
+    """
+    セッションファクトをキューブの粒度で集計する
+
+    Args:
+        facts: build_session_facts の戻り値
+
+    Returns:
+        (cube, sketches): cube は CUBE_DIMENSIONS と CUBE_MEASURES の列を持つ集計表（event_date 昇順、行番号がセル番号）。
+        ディメンションが欠損のセッションも欠損値の行として残す。
+        sketches は CUBE_SKETCHES の列名ごとの SketchTable
+    """
+    dimensions = [col for col in CUBE_DIMENSIONS if col in facts.columns]
+    measures = {name: spec for name, spec in CUBE_MEASURES.items() if spec[0] in facts.columns}
+    grouped = facts.groupby(dimensions, observed=True, dropna=False, sort=False)
+    cube = grouped.agg(**measures).reset_index()
+
+    # グループの出現順 → 日付順の行番号に付け替えて、各セッションのセル番号にする
+    order = np.argsort(cube['event_date'].to_numpy(), kind='stable')
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    cells = position[grouped.ngroup().to_numpy()]
+
+    sketches = {
+        name: build_sketches(cells, facts[column])
+        for name, column in CUBE_SKETCHES.items()
+        if column in facts.columns
+    }
+    return cube.iloc[order].reset_index(drop=True), sketches
+
+
+def _concat_cubes(frames) -> pd.DataFrame:
+    """カテゴリ型のディメンションのカテゴリを揃えてから連結する（揃えないと object 型になる）"""
+    frames = [frame.copy() for frame in frames]
+    for col in CUBE_DIMENSIONS:
+        columns = [frame[col] for frame in frames if col in frame.columns]
+        if not columns or not all(isinstance(values.dtype, pd.CategoricalDtype) for values in columns):
+            continue
+        categories = union_categoricals(columns, sort_categories=True).categories
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def update_cube(cube: pd.DataFrame, sketches: dict, facts: pd.DataFrame, since):
+    """
+    since 以降の日付だけを集計し直してキューブを更新する
+
+    新しい日のデータが追加されたときに、過去の日付の行とスケッチは集計し直さずに使い回す
+
+    Args:
+        cube, sketches: build_cube / update_cube の戻り値
+        facts: 追加分を含むセッションファクト（since より前の行は使わない）
+        since: この日付以降の行を facts から集計し直す
+
+    Returns:
+        (cube, sketches): build_cube と同じ
+    """
+    since = np.datetime64(pd.Timestamp(since), 'ns')
+    # キューブは日付順なので、since より前の行は先頭から kept 行
+    kept = int(np.searchsorted(cube['event_date'].to_numpy(), since, 'left'))
+    added, added_sketches = build_cube(facts[facts['event_date'].to_numpy() >= since])
+    sketches = {
+        name: concat_sketches([select_cells(table, kept), added_sketches[name]], [0, kept])
+        for name, table in sketches.items()
+        if name in added_sketches
+    }
+    return _concat_cubes([cube.iloc[:kept], added]), sketches
+
+
+def query_cube(cube: pd.DataFrame, spec: FilterSpec, date_index: DateIndex = None) -> pd.DataFrame:
+    """フィルター条件に一致するキューブの行（列名が FilterSpec と同じなので filter_rows をそのまま使う）"""
+    return cube.iloc[filter_rows(cube, spec, date_index)]
+
+
+def rollup(rows: pd.DataFrame, by, sketches=None) -> pd.DataFrame:
+    """
+    キューブの行を by ごとに合計する
+
+    Args:
+        rows: build_cube / query_cube の戻り値（インデックスがセル番号）
+        by: 切り口の列名または列名のリスト（欠損値のグループは除く）
+        sketches: build_cube のスケッチ。渡すと CUBE_SKETCHES の列（ユニーク数の推定値）も求める
+
+    Returns:
+        pd.DataFrame: by の列と CUBE_MEASURES・CUBE_AVERAGES（・CUBE_SKETCHES）の列（by の昇順）。
+        列名は session_breakdown と共通
+    """
+    measures = [name for name in CUBE_MEASURES if name in rows.columns]
+    grouped = rows.groupby(by, observed=True)
+    stats = grouped[measures].sum().reset_index()
+    if sketches:
+        groups = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+        for name, table in sketches.items():
+            stats[name] = count_distinct(table, rows.index.to_numpy(), groups, len(stats))
+    for name, (total, count) in CUBE_AVERAGES.items():
+        if total in stats.columns:
+            stats[name] = rate_array(stats[total], stats[count], fill=np.nan)
+    return stats
+
+
+def daily_rollup(rows: pd.DataFrame) -> pd.DataFrame:
+    """キューブの行をセッション開始日（日付列）ごとに合計する"""
+    return rollup(rows.assign(日付=rows['event_date'].dt.date), '日付')
+
+
+def summarize_cube(rows: pd.DataFrame) -> dict:
+    """キューブの行の合計から主要KPIを求める（summarize_sessions と同じ戻り値）"""
+    return summarize_totals(rows[list(CUBE_MEASURES)].sum())
+
@@ -0,0 +1,85 @@
+"""
+イベントデータの取得元
+ダミーデータ（CSVを変換したParquet）・BigQueryのローカルキャッシュ・イベントコレクターの書き出し先のどれを読むかを
+DataSource にまとめ、更新の検知（フィンガープリント）と読み込み・スナップショットの組み立てを取得元によらず同じ手順で行う。
+ダッシュボード（views.common）とアラートのワーカー（analytics.alert_scheduler）は同じ設定から同じデータを読む
+"""
+
+import os
+from typing import NamedTuple
+
+import pandas as pd
+
+from analytics.bigquery import StorageReadSource, last_synced, read_high_water_mark, sync_events
+from analytics.collector import read_last_flush
+from analytics.enrich import enrich_events
+from analytics.snapshot import DatasetSnapshot, build_snapshot
+from analytics.storage import ensure_dataset, read_events
+
+# アプリのディレクトリ（app/）。データの既定の置き場所はここを基準にするので、
+# ダッシュボードとアラートのワーカーは起動したディレクトリによらず同じデータを読む
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# ダミーデータのCSVと、それを変換したParquetデータセット（event_date=YYYY-MM-DD/ で日付パーティション分割）
+DUMMY_DATA_PATH = os.path.join(APP_DIR, "dummy_data.csv")
+DUMMY_DATASET_DIR = os.path.join(APP_DIR, "data", "events")
+# BigQueryから取得したイベントのローカルキャッシュ
+BIGQUERY_DATASET_DIR = os.path.join(APP_DIR, "data", "bigquery_events")
+
+
+class DataSource(NamedTuple):
+    """
+    イベントデータの取得元。bigquery_table、collector_dir、CSV の順に、最初に設定されているものを使う
+
+    Args:
+        csv_path: ダミーデータのCSV
+        dataset_dir: CSVを変換したParquetデータセット
+        bigquery_table: BigQueryのイベントテーブル（"project.dataset.table"）
+        bigquery_dir: BigQueryから取得したイベントのローカルキャッシュ
+        collector_dir: イベントコレクター（python -m analytics.collector）の書き出し先
+        columns: 読み込む列（None の場合は全列）
+    """
+    csv_path: str
+    dataset_dir: str
+    bigquery_table: str = None
+    bigquery_dir: str = None
+    collector_dir: str = None
+    columns: tuple = None
+
+    @property
+    def append_only(self) -> bool:
+        """データが追記だけで更新されるか（BigQuery・イベントコレクター）"""
+        return bool(self.bigquery_table or self.collector_dir)
+
+    def fingerprint(self):
+        """
+        データの更新を検知するためのキー（CSVはパス・更新時刻・サイズ、BigQueryはテーブルと取得済みの最新時刻・最後に追加した時刻、
+        イベントコレクターは書き出し先と最後の書き出し）
+        BigQueryの場合は前回取得分以降（遅れて届いた行を含む）の未取得のイベントを取得してローカルキャッシュに追加してから返す
+        """
+        if self.bigquery_table:
+            sync_events(StorageReadSource(self.bigquery_table), self.bigquery_dir)
+            return (self.bigquery_table, str(read_high_water_mark(self.bigquery_dir)), last_synced(self.bigquery_dir))
+        if self.collector_dir:
+            return (self.collector_dir, read_last_flush(self.collector_dir))
+        stat = os.stat(self.csv_path)
+        return (self.csv_path, stat.st_mtime_ns, stat.st_size)
+
+    def load(self) -> pd.DataFrame:
+        """
+        イベントデータを読み込む
+        BigQueryのテーブルはローカルキャッシュから、イベントコレクターは書き出し先から、
+        ダミーデータは初回およびCSV更新時にParquetへ変換してから読む
+        """
+        columns = None if self.columns is None else list(self.columns)
+        if self.bigquery_table:
+            return read_events(self.bigquery_dir, columns=columns)
+        if self.collector_dir:
+            return read_events(self.collector_dir, columns=columns)
+        return read_events(ensure_dataset(self.csv_path, self.dataset_dir), columns=columns)
+
+    def build(self, version, previous: DatasetSnapshot = None) -> DatasetSnapshot:
+        """
+        分析用データ（派生列付与済み）からスナップショットを作る（SnapshotRefresher の build に渡す）
+        追記だけのデータでは、ロールアップキューブは前のスナップショットの最終日付近だけを集計し直す
+        """
+        return build_snapshot(version, enrich_events(self.load()), previous if self.append_only else None)
@@ -0,0 +1,85 @@
+"""
+イベントデータへの派生列の付与
+読み込み直後の生データから、各ページが前提とする列をすべて付与した分析用データを作る
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.categorical import categorical_from_codes, factorize
+from analytics.channels import classify_channels
+from analytics.periods import sort_by_date
+
+
+def _fillna(values: pd.Series, fill_value) -> pd.Series:
+    """カテゴリ型でも使える fillna（補完値が未登録ならカテゴリに追加し、カテゴリの昇順を保つ）"""
+    if isinstance(values.dtype, pd.CategoricalDtype) and fill_value not in values.cat.categories:
+        categories = sorted([*values.cat.categories, fill_value])
+        values = values.cat.add_categories([fill_value]).cat.reorder_categories(categories)
+    return values.fillna(fill_value)
+
+
+def _replace(values: pd.Series, old, new) -> pd.Series:
+    """カテゴリ型ではカテゴリ名の変更だけで値を置換する"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        if old not in values.cat.categories:
+            return values
+        if new not in values.cat.categories:
+            values = values.cat.rename_categories({old: new})
+            return values.cat.reorder_categories(sorted(values.cat.categories))
+        values = values.astype(object)
+    return values.replace(old, new)
+
+
+def _combine_labels(left: pd.Series, right: pd.Series, sep: str) -> pd.Series:
+    """2列の値を "左{sep}右" に結合したカテゴリ列を作る（文字列結合はユニークな組み合わせの数だけ）"""
+    left_codes, left_uniques = factorize(left)
+    right_codes, right_uniques = factorize(right)
+    codes, pair_keys = pd.factorize(left_codes.astype(np.int64) * len(right_uniques) + right_codes)
+    labels = [
+        f"{left_uniques[key // len(right_uniques)]}{sep}{right_uniques[key % len(right_uniques)]}"
+        for key in pair_keys
+    ]
+    return categorical_from_codes(codes, labels, index=left.index)
+
+
+def enrich_events(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    生のイベントデータに派生列を付与する（引数のDataFrameは変更しない）
+
+    付与する列:
+        user_type: 新規 / リピート
+        conversion_status: セッション内にCVがあれば コンバージョン、なければ 非コンバージョン
+        channel: 流入チャネル（analytics.channels.CHANNEL_RULES で判定）
+        utm_source_display: twitter を X に置換し、欠損を (direct) にした参照元
+        source_medium: "参照元 / メディア" の表示用文字列
+
+    utm_medium の欠損は (none) に置換し、direct なのに medium がある行は除外する。
+    付与する列はすべてカテゴリ型（カテゴリは昇順）
+
+    Returns:
+        pd.DataFrame: 派生列付与後の新しいDataFrame（event_date 昇順。期間は slice_period で切り出せる）
+    """
+    # コンバージョンしたセッションIDのリストを作成
+    conversion_session_ids = raw_df.loc[raw_df['cv_type'].notna(), 'session_id'].unique()
+
+    # 2値の列はコードから直接カテゴリ型を作る
+    enriched = raw_df.assign(
+        user_type=categorical_from_codes(
+            (raw_df['ga_session_number'] == 1).to_numpy().astype(np.int8), ['リピート', '新規'], index=raw_df.index
+        ),
+        conversion_status=categorical_from_codes(
+            raw_df['session_id'].isin(conversion_session_ids).to_numpy().astype(np.int8),
+            ['非コンバージョン', 'コンバージョン'],
+            index=raw_df.index,
+        ),
+        # チャネル判定は欠損補完前の utm_medium で行う
+        channel=classify_channels(raw_df),
+        utm_source_display=_fillna(_replace(raw_df['utm_source'], 'twitter', 'X'), '(direct)'),
+        utm_medium=_fillna(raw_df['utm_medium'], '(none)'),
+    )
+    enriched['source_medium'] = _combine_labels(enriched['utm_source_display'], enriched['utm_medium'], ' / ')
+
+    # 論理的に不自然な組み合わせを除外 (例: direct / cpc)
+    unnatural = (enriched['utm_source_display'] == '(direct)') & (enriched['utm_medium'] != '(none)')
+    return sort_by_date(enriched[~unnatural])
@@ -0,0 +1,81 @@
+"""
+共通フィルターエンジン
+各ページのフィルター（期間・LP・デバイス・新規/リピート・CV/非CV・チャネル・参照元/メディア）を
+FilterSpec にまとめ、期間は日付インデックスで切り出し、残りの条件は1つのマスクで判定する
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.categorical import code_of
+from analytics.periods import DateIndex, period_bounds
+
+ALL = "すべて"
+
+
+class FilterSpec(NamedTuple):
+    """
+    フィルター条件。ハッシュ可能なのでキャッシュのキーにそのまま使える
+
+    属性フィルターは列名と同じ名前で、None・空文字・"すべて" は絞り込まないことを表す
+    """
+    start_date: object = None
+    end_date: object = None
+    page_location: object = None
+    device_type: object = None
+    user_type: object = None
+    conversion_status: object = None
+    channel: object = None
+    source_medium: object = None
+
+    def selections(self) -> dict:
+        """有効な属性フィルターを {列名: 値} で返す"""
+        return {
+            col: value
+            for col, value in self._asdict().items()
+            if col not in ('start_date', 'end_date') and value and value != ALL
+        }
+
+
+def filter_rows(df: pd.DataFrame, spec: FilterSpec, date_index: DateIndex = None) -> np.ndarray:
+    """
+    条件に一致する行の位置（df.iloc で使える整数配列）を返す
+
+    期間は date_index があれば二分探索で行範囲に絞り、属性条件はその範囲について
+    カテゴリのコード比較で1つのマスクにまとめて判定する（途中のDataFrameは作らない）
+
+    Args:
+        df: 絞り込むデータ（イベントデータまたはセッションファクト）
+        spec: フィルター条件
+        date_index: df['event_date'] から作った DateIndex
+    """
+    if date_index is not None:
+        lo, hi = period_bounds(date_index, spec.start_date, spec.end_date)
+        mask = np.ones(hi - lo, dtype=bool)
+    else:
+        lo, hi = 0, len(df)
+        mask = np.ones(len(df), dtype=bool)
+        dates = df['event_date'].to_numpy()
+        if spec.start_date is not None:
+            mask &= dates >= np.datetime64(pd.Timestamp(spec.start_date), 'ns')
+        if spec.end_date is not None:
+            mask &= dates <= np.datetime64(pd.Timestamp(spec.end_date), 'ns')
+
+    for col, value in spec.selections().items():
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            code = code_of(values, value)
+            if code < 0:
+                return np.empty(0, dtype=np.int64)
+            mask &= values.cat.codes.to_numpy()[lo:hi] == code
+        else:
+            mask &= values.to_numpy()[lo:hi] == value
+
+    return lo + np.flatnonzero(mask)
+
+
+def apply_filter(df: pd.DataFrame, spec: FilterSpec, date_index: DateIndex = None) -> pd.DataFrame:
+    """filter_rows で一致した行を取り出す"""
+    return df.iloc[filter_rows(df, spec, date_index)]
@@ -0,0 +1,133 @@
+"""
+LPのページ別ファネル
+ページごとに全イベントを絞り込んで nunique する代わりに、セッションごとの最大到達ページの
+bincount と逆順の累積和で到達数・離脱数を、ページ番号ごとの bincount で閲覧数・逆行数・平均滞在時間を
+まとめて求める
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.rates import rate_array
+
+
+def _page_numbers(values: pd.Series) -> np.ndarray:
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _unique_sessions(pages: np.ndarray, session_codes: np.ndarray, n_sessions: int, minlength: int) -> np.ndarray:
+    """ページ番号ごとのユニークセッション数（(ページ, セッション) の組を重複除去して数える）"""
+    if len(pages) == 0:
+        return np.zeros(minlength, dtype=np.int64)
+    pairs = pd.unique(pages * n_sessions + session_codes)
+    return np.bincount(pairs // n_sessions, minlength=minlength)
+
+
+def _page_events(events: pd.DataFrame, page_count=None):
+    """page_num_dom が 1..page_count のイベントについて、ページ番号・セッションコード・有効行のマスクを返す"""
+    pages = _page_numbers(events['page_num_dom'])
+    if page_count is None:
+        page_count = int(np.nanmax(pages)) if np.isfinite(pages).any() else 0
+    session_codes, sessions = pd.factorize(events['session_id'])
+    valid = (pages >= 1) & (pages <= page_count) & (session_codes >= 0)
+    return page_count, pages[valid].astype(np.int64), session_codes[valid], len(sessions), valid
+
+
+def page_funnel(facts: pd.DataFrame, page_count=None) -> pd.DataFrame:
+    """
+    セッションファクトの最大到達ページから、ページごとの到達数・離脱数を求める
+
+    ページ p の到達数は最大到達ページが p 以上のセッション数、離脱数は最大到達ページがちょうど p のセッション数
+
+    Args:
+        facts: build_session_facts の戻り値（フィルター済みでもよい）
+        page_count: 集計するページ数（省略時は最大到達ページの最大値）。これより先まで進んだセッションも到達数に含める
+
+    Returns:
+        pd.DataFrame: page (1..page_count), reached, exited, exit_rate（離脱数÷到達数, %）。
+        facts に滞在時間の合計・件数があれば exit_avg_stay_ms（そのページで離脱したセッションのイベントの平均滞在時間）も持つ
+    """
+    max_pages = _page_numbers(facts['max_page'])
+    valid = max_pages >= 0
+    max_pages = max_pages[valid].astype(np.int64)
+    if page_count is None:
+        page_count = int(max_pages.max()) if len(max_pages) else 0
+
+    counts = np.bincount(max_pages, minlength=page_count + 1)
+    reached = np.cumsum(counts[::-1])[::-1][1:page_count + 1]
+    exited = counts[1:page_count + 1]
+
+    funnel = pd.DataFrame({'page': np.arange(1, page_count + 1), 'reached': reached, 'exited': exited})
+    funnel['exit_rate'] = rate_array(exited, reached, 100)
+    if 'stay_ms_sum' in facts.columns:
+        stay_sum = np.bincount(max_pages, weights=facts['stay_ms_sum'].to_numpy(dtype=np.float64)[valid], minlength=page_count + 1)
+        stay_count = np.bincount(max_pages, weights=facts['stay_ms_count'].to_numpy(dtype=np.float64)[valid], minlength=page_count + 1)
+        funnel['exit_avg_stay_ms'] = rate_array(stay_sum[1:page_count + 1], stay_count[1:page_count + 1], fill=np.nan)
+    return funnel
+
+
+def page_event_stats(events: pd.DataFrame, page_count=None, flags=None) -> pd.DataFrame:
+    """
+    イベントデータを1回走査して page_num_dom ごとの指標を求める
+
+    Args:
+        events: イベントデータ（フィルター済みでもよい）
+        page_count: 集計するページ数（省略時は page_num_dom の最大値）
+        flags: {列名: イベントごとの真偽値の配列}。ページごとに真のイベント数を数えて列として追加する
+            （例: CTAクリックのイベント）
+
+    Returns:
+        pd.DataFrame: page (1..page_count), events, views（閲覧セッション数）, backflow_sessions（逆行したセッション数）,
+        backflow_rate（%）, avg_stay_ms, avg_load_time_ms（イベントがないページは NaN）と flags の列
+    """
+    page_count, pages, session_codes, n_sessions, valid = _page_events(events, page_count)
+    minlength = page_count + 1
+
+    stats = pd.DataFrame({'page': np.arange(1, minlength)})
+    stats['events'] = np.bincount(pages, minlength=minlength)[1:]
+    stats['views'] = _unique_sessions(pages, session_codes, n_sessions, minlength)[1:]
+    backward = (events['direction'] == 'backward').to_numpy()[valid]
+    stats['backflow_sessions'] = _unique_sessions(pages[backward], session_codes[backward], n_sessions, minlength)[1:]
+    stats['backflow_rate'] = rate_array(stats['backflow_sessions'], stats['views'], 100)
+
+    for column, name in (('stay_ms', 'avg_stay_ms'), ('load_time_ms', 'avg_load_time_ms')):
+        values = events[column].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+        present = ~np.isnan(values)
+        total = np.bincount(pages[present], weights=values[present], minlength=minlength)[1:]
+        count = np.bincount(pages[present], minlength=minlength)[1:]
+        stats[name] = rate_array(total, count, fill=np.nan)
+
+    for name, mask in (flags or {}).items():
+        stats[name] = np.bincount(pages[np.asarray(mask)[valid]], minlength=minlength)[1:]
+    return stats
+
+
+def page_stay_distribution(events: pd.DataFrame, segments, page_count=None) -> pd.DataFrame:
+    """
+    ページごとの滞在時間帯別セッション構成比
+
+    各ページで滞在時間のあるイベントを持つセッションのうち、滞在時間帯 [min_ms, max_ms) のイベントを持つセッションの割合（%）。
+    max_page_reached はそのイベントのページ以上なので、ページにイベントがあるセッションはそのページに到達している
+
+    Args:
+        events: イベントデータ（フィルター済みでもよい）
+        segments: [(列名, min_ms, max_ms), ...]
+        page_count: 集計するページ数（省略時は page_num_dom の最大値）
+
+    Returns:
+        pd.DataFrame: page (1..page_count), sessions（滞在時間のあるセッション数）と segments の列名ごとの割合
+    """
+    page_count, pages, session_codes, n_sessions, valid = _page_events(events, page_count)
+    minlength = page_count + 1
+
+    stay = events['stay_ms'].to_numpy(dtype=np.float64, na_value=np.nan)[valid]
+    present = ~np.isnan(stay)
+    pages, session_codes, stay = pages[present], session_codes[present], stay[present]
+
+    distribution = pd.DataFrame({'page': np.arange(1, minlength)})
+    distribution['sessions'] = _unique_sessions(pages, session_codes, n_sessions, minlength)[1:]
+    for name, min_ms, max_ms in segments:
+        in_segment = (stay >= min_ms) & (stay < max_ms)
+        counts = _unique_sessions(pages[in_segment], session_codes[in_segment], n_sessions, minlength)[1:]
+        distribution[name] = rate_array(counts, distribution['sessions'], 100)
+    return distribution
@@ -0,0 +1,39 @@
+"""
+曜日×時間帯のヒートマップ
+イベントの時刻で分けたセッションファクトを1回集計して、曜日・時間帯ごとのセッション数・CV数・CVRを求める
+"""
+
+import pandas as pd
+
+from analytics.breakdown import session_breakdown
+from analytics.rates import add_rates
+from analytics.sessions import build_session_facts
+
+# 曜日の並び（月曜始まり。dow_name の値は pandas の day_name()）
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def weekday_hour_stats(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    イベントの曜日×時間帯ごとのセッション数・CV数・CVR
+
+    セッションが複数の時間帯にまたがる場合は、それぞれの時間帯で1セッションとして数える
+
+    Returns:
+        pd.DataFrame: hour, dow_name（順序付きカテゴリ）, sessions, conversions, conversion_rate（%）。曜日・時間帯の順
+    """
+    timed = events.assign(
+        hour=events['event_timestamp'].dt.hour,
+        dow_name=events['event_timestamp'].dt.day_name(),
+    )
+    facts = build_session_facts(timed, by=['hour', 'dow_name'])
+    stats = add_rates(session_breakdown(facts, ['hour', 'dow_name']), {'conversion_rate': ('conversions', 'sessions')})
+    stats = stats[['hour', 'dow_name', 'sessions', 'conversions', 'conversion_rate']].assign(
+        dow_name=pd.Categorical(stats['dow_name'], categories=WEEKDAYS, ordered=True),
+    )
+    return stats.sort_values(['dow_name', 'hour'])
+
+
+def weekday_hour_pivot(stats: pd.DataFrame, values='conversion_rate') -> pd.DataFrame:
+    """weekday_hour_stats の戻り値を 曜日（WEEKDAYS の順）× 時間帯 の表にする"""
+    return stats.pivot_table(index='dow_name', columns='hour', values=values, observed=False).reindex(WEEKDAYS)
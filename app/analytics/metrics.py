@@ -0,0 +1,153 @@
+"""
+データセットとフィルター条件に対する分析指標
+各ページで表示する指標（KPIカード・ページ別ファネル・セグメント別統計・A/Bテスト・ヒートマップ・アラート・件数）を
+DatasetSnapshot と FilterSpec から求める。Streamlitに依存しないので、ベンチマークやバッチ処理、
+別プロセスでの並列実行からも画面と同じ計算を呼び出せる。
+row_cache（LRUCache）を渡すと、フィルター条件に一致する行位置を (スナップショットのバージョン, テーブル名, FilterSpec)
+ごとに再利用する
+"""
+
+import pandas as pd
+
+from analytics.abtest import ab_test_stats, daily_variant_cvr
+from analytics.alerts import evaluate_alerts
+from analytics.cube import query_cube, rollup, summarize_cube
+from analytics.filters import FilterSpec, filter_rows
+from analytics.funnel import page_event_stats, page_funnel
+from analytics.heatmap import weekday_hour_stats
+from analytics.rates import add_rates
+from analytics.snapshot import DatasetSnapshot
+
+# ページ別に数えるクリックの種類: {名前: クリックした要素の elem_classes の正規表現}。
+# page_metrics は {名前}_clicks（クリック数）と {名前}_click_rate（ビュー数に対する率）の列を持つ
+PAGE_CLICK_TARGETS = {
+    'cta': 'cta|btn-primary',
+    'floating': 'floating',
+    'exit_popup': 'exit',
+}
+
+
+def _rows(snapshot: DatasetSnapshot, table, spec: FilterSpec, row_cache=None):
+    frame, date_index = {
+        'events': (snapshot.events, snapshot.date_index),
+        'sessions': (snapshot.sessions, snapshot.session_date_index),
+    }[table]
+    if row_cache is None:
+        return frame.iloc[filter_rows(frame, spec, date_index)]
+    rows = row_cache.get_or_compute(
+        (snapshot.version, table, spec), lambda: filter_rows(frame, spec, date_index)
+    )
+    return frame.iloc[rows]
+
+
+def _bitmaps(snapshot: DatasetSnapshot, table):
+    return {'events': snapshot.event_bitmaps, 'sessions': snapshot.session_bitmaps}[table]
+
+
+def count_rows(snapshot: DatasetSnapshot, table, spec: FilterSpec, **selections) -> int:
+    """
+    フィルター条件に一致する行数（table は 'events' または 'sessions'）
+    ビットマップインデックスの popcount で数えるので、行を取り出さない。selections は BitmapIndex.select を参照
+    """
+    return _bitmaps(snapshot, table).count(spec, **selections)
+
+
+def option_counts(snapshot: DatasetSnapshot, spec: FilterSpec, column, table='sessions', **selections) -> pd.Series:
+    """
+    フィルター条件に一致する行数を column の値ごとに返す（BitmapIndex.value_counts の戻り値）
+    spec の column の条件は無視するので、ドロップダウンの各選択肢を選んだ場合の件数になる
+    """
+    return _bitmaps(snapshot, table).value_counts(spec, column, **selections)
+
+
+def select_events(snapshot: DatasetSnapshot, spec: FilterSpec, row_cache=None) -> pd.DataFrame:
+    """フィルター条件に一致するイベントデータ"""
+    return _rows(snapshot, 'events', spec, row_cache)
+
+
+def select_sessions(snapshot: DatasetSnapshot, spec: FilterSpec, row_cache=None) -> pd.DataFrame:
+    """フィルター条件に一致するセッションファクト"""
+    return _rows(snapshot, 'sessions', spec, row_cache)
+
+
+def select_cube(snapshot: DatasetSnapshot, spec: FilterSpec) -> pd.DataFrame:
+    """フィルター条件に一致するロールアップキューブの行"""
+    return query_cube(snapshot.cube, spec, snapshot.cube_date_index)
+
+
+def kpi_metrics(snapshot: DatasetSnapshot, spec: FilterSpec, kpi_cache=None) -> dict:
+    """
+    KPIカードの指標（summarize_cube の戻り値）
+    kpi_cache（LRUCache）を渡すと (スナップショットのバージョン, FilterSpec) ごとにキャッシュする。
+    その場合、戻り値の辞書はキャッシュと共有しているので変更しないこと
+    """
+    if kpi_cache is None:
+        return summarize_cube(select_cube(snapshot, spec))
+    return kpi_cache.get_or_compute(
+        (snapshot.version, spec), lambda: summarize_cube(select_cube(snapshot, spec))
+    )
+
+
+def page_metrics(snapshot: DatasetSnapshot, spec: FilterSpec, page_count, row_cache=None) -> pd.DataFrame:
+    """
+    ページ別のファネルとイベント指標
+
+    到達・離脱はセッションごとの最大到達ページから、ビュー数・逆行・滞在時間・クリック数はイベントを1回走査して求める
+
+    Returns:
+        pd.DataFrame: page_event_stats と page_funnel の列（page で結合）と、PAGE_CLICK_TARGETS の種類ごとの
+        クリック数（*_clicks）・ビュー数に対する率（*_click_rate, %）
+    """
+    events = select_events(snapshot, spec, row_cache)
+    is_click = (events['event_name'] == 'click').to_numpy()
+    flags = {
+        f'{name}_clicks': is_click & events['elem_classes'].str.contains(pattern, na=False).to_numpy()
+        for name, pattern in PAGE_CLICK_TARGETS.items()
+    }
+    funnel = page_funnel(select_sessions(snapshot, spec, row_cache), page_count)
+    stats = page_event_stats(events, page_count, flags=flags).merge(funnel, on='page')
+    return add_rates(stats, {f'{name}_click_rate': (f'{name}_clicks', 'views') for name in PAGE_CLICK_TARGETS})
+
+
+def segment_metrics(snapshot: DatasetSnapshot, spec: FilterSpec, by) -> pd.DataFrame:
+    """
+    切り口（キューブの列）ごとのセッション指標。切り口が欠損している行は除く
+
+    Returns:
+        pd.DataFrame: rollup の列と conversion_rate, click_rate, fv_retention_rate, final_cta_rate, engagement_rate（%）
+    """
+    rows = select_cube(snapshot, spec)
+    stats = rollup(rows.dropna(subset=[by] if isinstance(by, str) else by), by)
+    return add_rates(stats, {
+        'conversion_rate': ('conversions', 'sessions'),
+        'click_rate': ('clicks', 'sessions'),
+        'fv_retention_rate': ('fv_retained', 'sessions'),
+        'final_cta_rate': ('final_cta_reached', 'sessions'),
+        'engagement_rate': ('engaged', 'sessions'),
+    })
+
+
+def ab_test_metrics(snapshot: DatasetSnapshot, spec: FilterSpec, row_cache=None):
+    """
+    A/Bテストのテスト種別×バリアント別の指標と日別のCVR推移
+
+    Returns:
+        (stats, daily): ab_test_stats と daily_variant_cvr の戻り値
+    """
+    events = select_events(snapshot, spec, row_cache)
+    stats = ab_test_stats(select_sessions(snapshot, spec, row_cache), events)
+    return stats, daily_variant_cvr(events)
+
+
+def heatmap_metrics(snapshot: DatasetSnapshot, spec: FilterSpec, row_cache=None) -> pd.DataFrame:
+    """曜日×時間帯ごとのセッション数・CV数・CVR（weekday_hour_stats の戻り値）"""
+    return weekday_hour_stats(select_events(snapshot, spec, row_cache))
+
+
+def alert_metrics(snapshot: DatasetSnapshot, spec: FilterSpec = None, since=None):
+    """
+    全体と ALERT_SEGMENTS の各セグメントの日別KPIの急変（evaluate_alerts の戻り値）
+    spec を省略すると全データで判定する。since を省略すると最新日だけを判定する
+    """
+    rows = snapshot.cube if spec is None else select_cube(snapshot, spec)
+    return evaluate_alerts(rows, since=since)
@@ -0,0 +1,68 @@
+"""
+日付インデックスによる期間の切り出し
+event_date 昇順に並んだデータについて日付→行オフセットの対応表を持ち、
+期間フィルターを全行の比較ではなく二分探索＋スライスで行う
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex(NamedTuple):
+    """dates[i] の行は offsets[i]:offsets[i + 1] に並んでいる"""
+    dates: np.ndarray
+    offsets: np.ndarray
+
+
+def sort_by_date(df: pd.DataFrame, column='event_date') -> pd.DataFrame:
+    """日付順に並べる（同じ日付内の行順は保つ）。並んでいれば何もしない"""
+    if df[column].is_monotonic_increasing:
+        return df
+    return df.sort_values(column, kind='stable')
+
+
+def build_date_index(event_dates: pd.Series) -> DateIndex:
+    """
+    昇順に並んだ日付列から日付→行オフセットの対応表を作る
+
+    Args:
+        event_dates: sort_by_date 済みのデータの日付列（datetime64）
+    """
+    values = event_dates.to_numpy(dtype='datetime64[ns]')
+    if len(values) == 0:
+        return DateIndex(values, np.zeros(1, dtype=np.int64))
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return DateIndex(values[starts], np.append(starts, len(values)))
+
+
+def period_bounds(date_index: DateIndex, start_date=None, end_date=None):
+    """期間 [start_date, end_date]（両端含む）に該当する行範囲 (開始, 終了) を返す"""
+    dates, offsets = date_index
+    lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date), 'ns'), 'left')
+    hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date), 'ns'), 'right')
+    if hi < lo:
+        hi = lo
+    return int(offsets[lo]), int(offsets[hi])
+
+
+def slice_period(df: pd.DataFrame, date_index: DateIndex, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    期間に該当する行だけを取り出す（期間外の行は参照しない）
+
+    Args:
+        df: build_date_index の元になったデータ
+        date_index: build_date_index の戻り値
+        start_date, end_date: 期間（両端含む）。None の場合はその側を制限しない
+    """
+    lo, hi = period_bounds(date_index, start_date, end_date)
+    return df.iloc[lo:hi]
+
+
+def slice_last_days(df: pd.DataFrame, date_index: DateIndex, days: int) -> pd.DataFrame:
+    """データの最終日から遡って days 日分（最終日を含む）の行を取り出す"""
+    if len(date_index.dates) == 0:
+        return df.iloc[0:0]
+    start_date = date_index.dates[-1] - np.timedelta64(days - 1, 'D')
+    return slice_period(df, date_index, start_date)
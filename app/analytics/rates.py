@@ -0,0 +1,59 @@
+"""
+率（CVR・CTR・到達率など）の計算
+集計表の「件数 ÷ セッション数」を行ごとの apply ではなくNumPyの配列演算でまとめて計算する
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def safe_rate(numerator, denominator):
+    """ゼロ除算を回避して率を計算する (inf対応)"""
+    if isinstance(denominator, pd.Series):
+        # 分母が0の場所をnanに置き換えてから計算し、結果のinf/nanを0で埋める
+        denominator_safe = denominator.replace(0, np.nan)
+        rate = numerator.divide(denominator_safe)
+        return rate.replace([np.inf, -np.inf], np.nan).fillna(0)
+    # denominatorが単一の数値の場合
+    return numerator / denominator if denominator != 0 else 0.0
+
+
+def rate_array(numerator, denominator, scale=1.0, fill=0.0) -> np.ndarray:
+    """
+    numerator / denominator * scale を配列で計算する
+
+    分母が0・欠損の要素や結果が有限でない要素は fill にする。
+    numerator と denominator はブロードキャストできる形であればよい（2次元で複数列を一度に計算できる）
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    valid = denominator != 0
+    out = np.zeros(numerator.shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=valid)
+    if scale != 1.0:
+        out *= scale
+    out[~(valid & np.isfinite(out))] = fill
+    return out
+
+
+def add_rates(df: pd.DataFrame, rates: dict, scale=100) -> pd.DataFrame:
+    """
+    集計表に率の列をまとめて追加する（df を直接更新して返す）
+
+    Args:
+        df: 件数の列を持つ集計表
+        rates: {追加する列名: (分子の列名, 分母の列名)}
+        scale: 率に掛ける値（既定はパーセント表示の100）
+
+    Example:
+        add_rates(stats, {'CVR': ('CV数', 'セッション数'), 'CTR': ('クリック数', 'セッション数')})
+    """
+    if not rates:
+        return df
+    numerators = np.column_stack([df[num].to_numpy(dtype=np.float64, na_value=np.nan) for num, _ in rates.values()])
+    denominators = np.column_stack([df[den].to_numpy(dtype=np.float64, na_value=np.nan) for _, den in rates.values()])
+    values = rate_array(numerators, denominators, scale)
+    for i, column in enumerate(rates):
+        df[column] = values[:, i]
+    return df
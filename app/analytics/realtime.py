@@ -0,0 +1,202 @@
+"""
+リアルタイムビューのスライディングウィンドウ集計
+直近 N 時間のイベントを1分ごとのスロットのリングバッファに集計しておき、新しく届いたイベントだけを集計に加える。
+直近1時間のKPIや10分ごとの推移はウィンドウ内のスロットだけから求めるので、履歴全体の件数によらない
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analytics.periods import slice_period
+from analytics.sessions import FV_RETAINED_PAGE
+
+# リングバッファに保持する時間数
+REALTIME_WINDOW_HOURS = 3
+
+# スロットごとの合計: 滞在時間・読込時間の合計と件数（欠損は数えない）
+_SUMS = ['stay_ms_sum', 'stay_ms_count', 'load_time_ms_sum', 'load_time_ms_count']
+
+
+def _minutes(timestamps: pd.Series) -> np.ndarray:
+    """エポックからの経過分"""
+    return timestamps.to_numpy(dtype='datetime64[ns]').astype('datetime64[m]').astype(np.int64)
+
+
+class RealtimeWindow:
+    """
+    直近 hours 時間のイベントの1分ごとの集計（リングバッファ）
+
+    スロットは「分 % スロット数」の位置にあり、保持している分が異なるスロットは古いものとして扱う
+    （追加時に上書きし、集計時には読まない）。セッション数・到達ページ数・FV残存率は分をまたいで
+    同じセッションを数えないよう、スロットごとにセッション（session_id のハッシュ）とその分の最大到達ページを持つ。
+    追加と集計はスレッドセーフ
+
+    Example:
+        window = RealtimeWindow(hours=3)
+        window.append(new_events)          # ストリームから届いたイベント
+        window.summary(minutes=60)         # 直近1時間のKPI
+        window.trend(minutes=60, bin_minutes=10)
+    """
+
+    def __init__(self, hours=REALTIME_WINDOW_HOURS):
+        self.slot_count = hours * 60
+        self._lock = threading.Lock()
+        self.version = None
+        self._clear()
+
+    def _clear(self):
+        self._slot_minutes = np.full(self.slot_count, -1, dtype=np.int64)
+        self._sums = np.zeros((self.slot_count, len(_SUMS)))
+        self._sessions = [[] for _ in range(self.slot_count)]
+        self.latest = None
+
+    def _reset_slots(self, minutes: np.ndarray):
+        slots = minutes % self.slot_count
+        stale = self._slot_minutes[slots] != minutes
+        for slot, minute in zip(slots[stale], minutes[stale]):
+            self._slot_minutes[slot] = minute
+            self._sums[slot] = 0
+            self._sessions[slot] = []
+
+    def append(self, events: pd.DataFrame) -> int:
+        """
+        イベントを集計に加える（event_timestamp, session_id, max_page_reached, stay_ms, load_time_ms の列を使う）
+
+        ウィンドウより古いイベントは捨てる。到着順は問わない（ウィンドウ内であれば過去の分にも加える）
+
+        Returns:
+            int: 集計に加えたイベント数
+        """
+        if events.empty:
+            return 0
+        minute = _minutes(events['event_timestamp'])
+        with self._lock:
+            head = max(minute.max(), self._slot_minutes.max())
+            keep = minute > head - self.slot_count
+            if not keep.any():
+                return 0
+            events, minute = events[keep], minute[keep]
+            minutes = np.unique(minute)
+            self._reset_slots(minutes)
+            slot = minute % self.slot_count
+
+            stay = events['stay_ms'].to_numpy(dtype=np.float64, na_value=np.nan)
+            load = events['load_time_ms'].to_numpy(dtype=np.float64, na_value=np.nan)
+            for i, values in enumerate([
+                np.nan_to_num(stay), ~np.isnan(stay), np.nan_to_num(load), ~np.isnan(load),
+            ]):
+                np.add.at(self._sums[:, i], slot, values)
+
+            # 分 × セッションごとの最大到達ページ（分の昇順に並べてからスロットごとに分ける）
+            per_session = pd.DataFrame({
+                'minute': minute,
+                'session': pd.util.hash_array(events['session_id'].astype(str).to_numpy()),
+                'page': events['max_page_reached'].to_numpy(dtype=np.float64, na_value=np.nan),
+            }).groupby(['minute', 'session'], sort=True)['page'].max().reset_index()
+            bounds = np.searchsorted(per_session['minute'].to_numpy(), minutes, side='right')
+            sessions, pages = per_session['session'].to_numpy(), per_session['page'].to_numpy()
+            start = 0
+            for minute_value, end in zip(minutes, bounds):
+                self._sessions[minute_value % self.slot_count].append((sessions[start:end], pages[start:end]))
+                start = end
+
+            latest = events['event_timestamp'].max()
+            self.latest = latest if self.latest is None else max(self.latest, latest)
+            return int(keep.sum())
+
+    def sync(self, snapshot) -> int:
+        """
+        スナップショットの新しいイベント（前回までに加えた最新時刻より後）を加える
+
+        初回は直近 slot_count 分だけを読み込む。データが差し替わって最新時刻が戻った場合は作り直す。
+        日付インデックスで最新時刻の前日以降の行だけを参照するので、履歴全体は走査しない
+
+        Returns:
+            int: 集計に加えたイベント数
+        """
+        if snapshot.version == self.version:
+            return 0
+        events = snapshot.events
+        dates = snapshot.date_index.dates
+        if not len(dates):
+            return 0
+        recent = slice_period(events, snapshot.date_index, dates[-1] - np.timedelta64(self.slot_count // 1440 + 1, 'D'))
+        newest = recent['event_timestamp'].max()
+        latest = self.latest
+        if latest is not None and newest < latest:
+            with self._lock:
+                self._clear()
+            latest = None
+        if latest is None:
+            rows = recent[recent['event_timestamp'] > newest - pd.Timedelta(minutes=self.slot_count)]
+        else:
+            rows = slice_period(events, snapshot.date_index, pd.Timestamp(latest).normalize() - pd.Timedelta(days=1))
+            rows = rows[rows['event_timestamp'] > latest]
+        added = self.append(rows)
+        self.version = snapshot.version
+        return added
+
+    def _window(self, minutes):
+        """
+        最新時刻の minutes 分前から最新時刻までにかかる分（最新の分と minutes 分前の分を含む）のうちデータのある分と、そのスロット
+        """
+        head = self._slot_minutes.max()
+        if head < 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        wanted = np.arange(head - min(minutes, self.slot_count - 1), head + 1)
+        slots = wanted % self.slot_count
+        valid = self._slot_minutes[slots] == wanted
+        return wanted[valid], slots[valid]
+
+    @staticmethod
+    def _session_pages(session_lists):
+        """スロットのセッションを重複なくまとめ、セッションごとの最大到達ページを返す"""
+        parts = [part for parts in session_lists for part in parts]
+        if not parts:
+            return np.empty(0)
+        sessions = np.concatenate([s for s, _ in parts])
+        pages = np.concatenate([p for _, p in parts])
+        order = np.argsort(sessions, kind='stable')
+        sessions, pages = sessions[order], pages[order]
+        starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+        return np.fmax.reduceat(pages, starts)
+
+    def summary(self, minutes=60):
+        """
+        直近 minutes 分のKPI
+
+        Returns:
+            dict | None: sessions, avg_pages（セッションごとの最大到達ページの平均）, avg_stay_sec, fv_retention（%）,
+            avg_load_ms。イベントがない場合は None
+        """
+        with self._lock:
+            _, slots = self._window(minutes)
+            pages = self._session_pages([self._sessions[slot] for slot in slots])
+            sums = self._sums[slots].sum(axis=0)
+        if not len(pages):
+            return None
+        totals = dict(zip(_SUMS, sums))
+        with np.errstate(invalid='ignore'):
+            return {
+                'sessions': len(pages),
+                'avg_pages': np.nanmean(pages) if (~np.isnan(pages)).any() else np.nan,
+                'avg_stay_sec': totals['stay_ms_sum'] / totals['stay_ms_count'] / 1000 if totals['stay_ms_count'] else 0,
+                'fv_retention': (pages >= FV_RETAINED_PAGE).sum() / len(pages) * 100,
+                'avg_load_ms': totals['load_time_ms_sum'] / totals['load_time_ms_count'] if totals['load_time_ms_count'] else np.nan,
+            }
+
+    def trend(self, minutes=60, bin_minutes=10) -> pd.DataFrame:
+        """直近 minutes 分の bin_minutes 分ごと（時刻で区切る）のユニークセッション数（minute_bin, sessions の列）"""
+        with self._lock:
+            wanted, slots = self._window(minutes)
+            bins = wanted // bin_minutes * bin_minutes
+            rows = [
+                (bin_start, len(self._session_pages([self._sessions[slot] for slot in slots[bins == bin_start]])))
+                for bin_start in np.unique(bins)
+            ]
+        return pd.DataFrame({
+            'minute_bin': pd.to_datetime(np.array([start for start, _ in rows], dtype=np.int64), unit='m'),
+            'sessions': np.array([count for _, count in rows], dtype=np.int64),
+        })
@@ -0,0 +1,123 @@
+"""
+セッション単位のファクトテーブル
+イベントデータを1セッション1行に集約し、KPIカードやブレークダウンの集計元にする
+"""
+
+import numpy as np
+import pandas as pd
+
+from analytics.periods import sort_by_date
+from analytics.rates import rate_array
+
+# FV残存・最終CTA到達・エンゲージメントの判定しきい値
+FV_RETAINED_PAGE = 2
+FINAL_CTA_PAGE = 10
+ENGAGED_STAY_MS = 30000
+
+# セッションの属性として先頭イベントの値を採用する列
+SESSION_ATTRIBUTE_COLUMNS = [
+    'user_pseudo_id', 'page_location', 'page_path', 'device_type',
+    'user_type', 'conversion_status', 'channel', 'source_medium',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content',
+    'ab_variant', 'ab_test_target',
+]
+
+
+def build_session_facts(df: pd.DataFrame, by=None) -> pd.DataFrame:
+    """
+    イベントデータからセッションファクトテーブルを作成する
+
+    Args:
+        df: channel や source_medium などの派生列を付与済みのイベントデータ
+        by: セッション内で値が変わるイベント単位の列（例: スクロール率の区間）で分ける場合の列名またはそのリスト。
+            指定すると (by, session_id) ごとに1行になる
+
+    Returns:
+        pd.DataFrame: session_id ごとに1行（セッション開始日の昇順）。CV・FV残存・最終CTA到達・
+        エンゲージのフラグと、クリック数・滞在時間・到達ページ・完了率・読込時間の合計と件数を持つ
+    """
+    keys = ([by] if isinstance(by, str) else list(by or [])) + ['session_id']
+    events = df.assign(
+        _is_cv=df['cv_type'].notna(),
+        _is_click=df['event_name'] == 'click',
+    )
+    grouped = events.groupby(keys, sort=False, observed=True)
+
+    facts = grouped.agg(
+        first_timestamp=('event_timestamp', 'min'),
+        event_date=('event_date', 'min'),
+        converted=('_is_cv', 'any'),
+        max_page=('max_page_reached', 'max'),
+        max_stay_ms=('stay_ms', 'max'),
+        clicks=('_is_click', 'sum'),
+        stay_ms_sum=('stay_ms', 'sum'),
+        stay_ms_count=('stay_ms', 'count'),
+        max_page_reached_sum=('max_page_reached', 'sum'),
+        max_page_reached_count=('max_page_reached', 'count'),
+        completion_rate_sum=('completion_rate', 'sum'),
+        completion_rate_count=('completion_rate', 'count'),
+        load_time_ms_sum=('load_time_ms', 'sum'),
+        load_time_ms_count=('load_time_ms', 'count'),
+    )
+
+    attribute_cols = [col for col in SESSION_ATTRIBUTE_COLUMNS if col in events.columns and col not in keys]
+    facts = facts.join(grouped[attribute_cols].first())
+
+    facts['fv_retained'] = facts['max_page'] >= FV_RETAINED_PAGE
+    facts['final_cta_reached'] = facts['max_page'] >= FINAL_CTA_PAGE
+    facts['engaged'] = facts['max_stay_ms'] >= ENGAGED_STAY_MS
+    return sort_by_date(facts.reset_index()).reset_index(drop=True)
+
+
+def summarize_totals(totals) -> dict:
+    """
+    セッション数と各指標の合計・件数から主要KPIを計算する
+
+    Args:
+        totals: sessions, conversions, clicks, fv_retained, final_cta_reached, stay_ms_sum, stay_ms_count,
+            max_page_sum, max_page_count, load_time_ms_sum, load_time_ms_count を持つ辞書（またはSeries）
+
+    Returns:
+        dict: sessions, conversions, conversion_rate, clicks, click_rate, avg_stay_time,
+        avg_pages_reached, fv_retention_rate, final_cta_rate, avg_load_time
+    """
+    sessions = int(totals['sessions'])
+    conversions = int(totals['conversions'])
+    clicks = int(totals['clicks'])
+    counts = [conversions, clicks, int(totals['fv_retained']), int(totals['final_cta_reached'])]
+    conversion_rate, click_rate, fv_retention_rate, final_cta_rate = rate_array(counts, sessions, 100)
+    avg_stay_ms, avg_pages_reached, avg_load_time = rate_array(
+        [totals['stay_ms_sum'], totals['max_page_sum'], totals['load_time_ms_sum']],
+        [totals['stay_ms_count'], totals['max_page_count'], totals['load_time_ms_count']],
+        fill=np.nan,
+    )
+
+    return {
+        'sessions': sessions,
+        'conversions': conversions,
+        'conversion_rate': conversion_rate,
+        'clicks': clicks,
+        'click_rate': click_rate,
+        'avg_stay_time': avg_stay_ms / 1000,
+        'avg_pages_reached': avg_pages_reached,
+        'fv_retention_rate': fv_retention_rate,
+        'final_cta_rate': final_cta_rate,
+        'avg_load_time': avg_load_time,
+    }
+
+
+def summarize_sessions(facts: pd.DataFrame) -> dict:
+    """ファクトテーブルから主要KPIを集計する（合計のみで計算。戻り値は summarize_totals と同じ）"""
+    return summarize_totals({
+        'sessions': len(facts),
+        'conversions': facts['converted'].sum(),
+        'clicks': facts['clicks'].sum(),
+        'fv_retained': facts['fv_retained'].sum(),
+        'final_cta_reached': facts['final_cta_reached'].sum(),
+        'stay_ms_sum': facts['stay_ms_sum'].sum(),
+        'stay_ms_count': facts['stay_ms_count'].sum(),
+        'max_page_sum': facts['max_page'].sum(),
+        'max_page_count': facts['max_page'].count(),
+        'load_time_ms_sum': facts['load_time_ms_sum'].sum(),
+        'load_time_ms_count': facts['load_time_ms_count'].sum(),
+    })
@@ -0,0 +1,136 @@
+"""
+データセットのスナップショット
+イベントデータ・セッションファクト・ロールアップキューブと各日付インデックス・ビットマップインデックスを1つのまとまりとして作り、
+バックグラウンドのスレッドで次のバージョンを組み立ててから参照を差し替える。
+リクエスト（Streamlitの再実行）は開始時に取得したスナップショットを最後まで使うので、
+組み立て中も差し替え後も、1回の表示の中で古いデータと新しいデータが混ざることはない
+"""
+
+import logging
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from analytics.bitmap import BitmapIndex
+from analytics.cube import build_cube, update_cube
+from analytics.periods import DateIndex, build_date_index
+from analytics.sessions import build_session_facts
+
+
+class DatasetSnapshot(NamedTuple):
+    """
+    ある時点のデータセット一式（読み取り専用として扱う）
+
+    version はデータのバージョン（フィンガープリント）。集計結果のキャッシュキーに含める
+    """
+    version: object
+    events: pd.DataFrame
+    date_index: DateIndex
+    sessions: pd.DataFrame
+    session_date_index: DateIndex
+    cube: pd.DataFrame
+    cube_sketches: dict
+    cube_date_index: DateIndex
+    event_bitmaps: BitmapIndex
+    session_bitmaps: BitmapIndex
+
+
+def build_snapshot(version, events: pd.DataFrame, previous: DatasetSnapshot = None, lookback_days=1) -> DatasetSnapshot:
+    """
+    派生列付与済みのイベントデータからスナップショットを作る
+
+    Args:
+        version: データのバージョン
+        events: enrich_events の戻り値
+        previous: 前のスナップショット。データが追記されただけの場合に渡すと、ロールアップキューブは
+            前のキューブの最終日から lookback_days 日前以降だけを集計し直す（日付をまたぐセッションや
+            最終日の途中までのデータが後から増えても、その範囲は集計し直されるので全件から作った場合と一致する）
+    """
+    sessions = build_session_facts(events)
+    if previous is not None and len(previous.cube_date_index.dates):
+        since = previous.cube_date_index.dates[-1] - np.timedelta64(lookback_days, 'D')
+        cube, cube_sketches = update_cube(previous.cube, previous.cube_sketches, sessions, since)
+    else:
+        cube, cube_sketches = build_cube(sessions)
+
+    date_index = build_date_index(events['event_date'])
+    session_date_index = build_date_index(sessions['event_date'])
+    return DatasetSnapshot(
+        version=version,
+        events=events,
+        date_index=date_index,
+        sessions=sessions,
+        session_date_index=session_date_index,
+        cube=cube,
+        cube_sketches=cube_sketches,
+        cube_date_index=build_date_index(cube['event_date']),
+        event_bitmaps=BitmapIndex(events, date_index),
+        session_bitmaps=BitmapIndex(sessions, session_date_index),
+    )
+
+
+class SnapshotRefresher:
+    """
+    データの更新を定期的に確認し、新しいスナップショットをバックグラウンドで作って差し替える
+
+    組み立てが終わるまでは前のスナップショットを返し続け、終わったら参照を1回の代入で差し替える。
+    組み立てに失敗した場合は前のスナップショットを使い続け、例外を last_error に残す
+
+    Args:
+        fingerprint: データのバージョンを返す関数（差分取得などの更新処理もここで行ってよい）
+        build: build(version, previous) -> DatasetSnapshot。previous は現在のスナップショット（初回は None）
+        interval: 更新を確認する間隔（秒）
+
+    Example:
+        refresher = SnapshotRefresher(fingerprint, build, interval=60)
+        refresher.start()
+        snapshot = refresher.snapshot   # 1回の処理の中ではこのスナップショットだけを使う
+    """
+
+    def __init__(self, fingerprint, build, interval=60):
+        self._fingerprint = fingerprint
+        self._build = build
+        self.interval = interval
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    @property
+    def snapshot(self) -> DatasetSnapshot:
+        """現在のスナップショット（参照の読み出しだけなので、差し替え中でも古いか新しいかのどちらか一方が返る）"""
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """データのバージョンが変わっていれば新しいスナップショットを作って差し替える。差し替えたら True"""
+        with self._refresh_lock:
+            version = self._fingerprint()
+            current = self._snapshot
+            if current is not None and current.version == version:
+                return False
+            self._snapshot = self._build(version, current)
+            return True
+
+    def start(self):
+        """最初のスナップショットを作ってから（まだなければ）、更新確認のスレッドを開始する"""
+        if self._snapshot is None:
+            self.refresh()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logging.getLogger(__name__).exception("データの更新に失敗しました（前のデータを使い続けます）")
@@ -0,0 +1,214 @@
+"""
+イベントデータの列指向ストレージ
+CSVエクスポートを日付パーティション付きのParquetデータセットに変換し、
+必要な列・期間だけを読み込む
+"""
+
+import hashlib
+import os
+import shutil
+import time
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# イベントデータの固定スキーマ（BigQueryのevents_flat_tblと同じ列構成）
+# 種類の少ない文字列列は辞書エンコードし、読み込み時にpandasのカテゴリ型になる
+EVENT_SCHEMA = pa.schema([
+    ('event_date', pa.date32()),
+    ('event_timestamp', pa.timestamp('us')),
+    ('event_timestamp_jst', pa.timestamp('us')),
+    ('event_name', _CATEGORY),
+    ('user_pseudo_id', pa.string()),
+    ('ga_session_id', pa.int64()),
+    ('ga_session_number', pa.int32()),
+    ('session_id', pa.string()),
+    ('page_location', _CATEGORY),
+    ('page_referrer', _CATEGORY),
+    ('page_path', _CATEGORY),
+    ('prev_page_path', _CATEGORY),
+    ('page_num_dom', pa.int32()),
+    ('original_page_num', pa.int32()),
+    ('stay_ms', pa.int64()),
+    ('total_duration_ms', pa.int64()),
+    ('load_time_ms', pa.int64()),
+    ('max_page_reached', pa.int32()),
+    ('completion_rate', pa.float64()),
+    ('total_pages', pa.int32()),
+    ('click_x_rel', pa.float64()),
+    ('click_y_rel', pa.float64()),
+    ('elem_tag', _CATEGORY),
+    ('elem_id', _CATEGORY),
+    ('elem_classes', _CATEGORY),
+    ('scroll_pct', pa.float64()),
+    ('utm_source', _CATEGORY),
+    ('utm_medium', _CATEGORY),
+    ('utm_campaign', _CATEGORY),
+    ('utm_content', _CATEGORY),
+    ('device_type', _CATEGORY),
+    ('direction', _CATEGORY),
+    ('navigation_method', _CATEGORY),
+    ('link_url', _CATEGORY),
+    ('video_src', _CATEGORY),
+    ('session_variant', _CATEGORY),
+    ('presence_test_variant', _CATEGORY),
+    ('creative_test_variant', _CATEGORY),
+    ('ab_variant', _CATEGORY),
+    ('ab_test_target', _CATEGORY),
+    ('ab_test_type', _CATEGORY),
+    ('cv_type', _CATEGORY),
+    ('p_value', pa.float64()),
+    ('cv_value', pa.float64()),
+    ('value', pa.float64()),
+])
+
+# 元データにないことがある列（A/Bテストのp値はダミーデータにだけある）。ない場合はNULLで埋める
+OPTIONAL_COLUMNS = ['p_value']
+
+PARTITIONING = ds.partitioning(pa.schema([('event_date', pa.date32())]), flavor='hive')
+
+# 変換済みであることを示すマーカー（'_'始まりのファイルはデータセットの走査対象外）
+_INGEST_MARKER = '_INGESTED'
+# スキーマが変わったら変換し直すため、マーカーにスキーマのハッシュを記録する
+_SCHEMA_HASH = hashlib.sha1(str(EVENT_SCHEMA).encode('utf-8')).hexdigest()[:12]
+
+
+def _csv_column_types():
+    """CSVパース時の型。辞書型は文字列として読み、バッチごとにスキーマへキャストする"""
+    return {
+        field.name: pa.string() if pa.types.is_dictionary(field.type) else field.type
+        for field in EVENT_SCHEMA
+    }
+
+
+def _cast_batches(reader):
+    for batch in reader:
+        table = pa.Table.from_batches([batch])
+        for name in OPTIONAL_COLUMNS:
+            if name not in table.column_names:
+                table = table.append_column(name, pa.nulls(table.num_rows, EVENT_SCHEMA.field(name).type))
+        yield from table.select(EVENT_SCHEMA.names).cast(EVENT_SCHEMA).to_batches()
+
+
+def _ingest_key(csv_path):
+    return f"{os.path.abspath(csv_path)} {_SCHEMA_HASH}"
+
+
+def ingest_csv(csv_path, dataset_dir, block_size=64 << 20):
+    """
+    CSVエクスポートを event_date でパーティション分割したParquetデータセットに変換する
+
+    CSVはブロック単位でストリーミング処理するため、ファイル全体をメモリに載せない。
+    新しいディレクトリに書き出してから dataset_dir と差し替えるので、既存のデータセットは丸ごと置き換わる
+    （CSVにない日付のパーティションは残らない）。
+
+    Args:
+        csv_path: 入力CSVファイル
+        dataset_dir: 出力先ディレクトリ（event_date=YYYY-MM-DD/ 以下にParquetを書き出す）
+        block_size: CSVを読み込むブロックサイズ（バイト）
+    """
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=pacsv.ConvertOptions(
+            column_types=_csv_column_types(),
+            strings_can_be_null=True,
+            timestamp_parsers=[pacsv.ISO8601],
+        ),
+    )
+    dataset_dir = os.path.normpath(dataset_dir)
+    staging_dir = f"{dataset_dir}.ingest-{time.time_ns()}"
+    try:
+        ds.write_dataset(
+            _cast_batches(reader),
+            staging_dir,
+            schema=EVENT_SCHEMA,
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template='part-{i}.parquet',
+        )
+        with open(os.path.join(staging_dir, _INGEST_MARKER), 'w') as f:
+            f.write(_ingest_key(csv_path))
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    # 書き終わったデータセットと古いデータセットをディレクトリの rename で入れ替える
+    old_dir = f"{dataset_dir}.old-{time.time_ns()}"
+    if os.path.exists(dataset_dir):
+        os.replace(dataset_dir, old_dir)
+    os.replace(staging_dir, dataset_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def ensure_dataset(csv_path, dataset_dir):
+    """
+    データセットが未作成、CSVの方が新しい、または別のCSV・古いスキーマから変換したものである場合にだけ ingest_csv を実行する
+
+    Returns:
+        str: dataset_dir
+    """
+    marker = os.path.join(dataset_dir, _INGEST_MARKER)
+    if not os.path.exists(marker) or os.path.getmtime(marker) < os.path.getmtime(csv_path):
+        ingest_csv(csv_path, dataset_dir)
+        return dataset_dir
+    with open(marker) as f:
+        if f.read().strip() != _ingest_key(csv_path):
+            ingest_csv(csv_path, dataset_dir)
+    return dataset_dir
+
+
+def _as_date(value):
+    return pd.Timestamp(value).date() if not isinstance(value, date) else value
+
+
+def read_events(dataset_dir, columns=None, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Parquetデータセットからイベントデータを読み込む
+
+    Args:
+        dataset_dir: ingest_csv の出力先
+        columns: 読み込む列（None の場合は全列）。event_date は常に含める
+        start_date, end_date: 読み込む event_date の範囲（両端含む）。範囲外のパーティションは開かない
+
+    Returns:
+        pd.DataFrame: 日付・タイムスタンプは datetime64[ns]、辞書エンコード列はカテゴリ型（カテゴリは昇順）。
+        行は event_date のパーティション順（各日付内はCSVの行順）に並ぶ
+    """
+    dataset = ds.dataset(dataset_dir, schema=EVENT_SCHEMA, format='parquet', partitioning=PARTITIONING)
+
+    if columns is not None:
+        columns = ['event_date'] + [col for col in columns if col != 'event_date']
+
+    date_filter = None
+    if start_date is not None:
+        date_filter = ds.field('event_date') >= pa.scalar(_as_date(start_date), pa.date32())
+    if end_date is not None:
+        upper = ds.field('event_date') <= pa.scalar(_as_date(end_date), pa.date32())
+        date_filter = upper if date_filter is None else date_filter & upper
+
+    table = dataset.to_table(columns=columns, filter=date_filter)
+    df = table.to_pandas(date_as_object=False, coerce_temporal_nanoseconds=True)
+    df['event_date'] = df['event_date'].astype('datetime64[ns]')
+    # 辞書の並びは出現順なので、groupby の並びが文字列列と同じになるようカテゴリを昇順に揃える
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CSVエクスポートを日付パーティション付きParquetに変換する")
+    parser.add_argument("csv_path")
+    parser.add_argument("dataset_dir")
+    args = parser.parse_args()
+
+    ingest_csv(args.csv_path, args.dataset_dir)
+    events = read_events(args.dataset_dir, columns=['session_id'])
+    print(f"✅ 変換完了: {len(events)} イベント → {args.dataset_dir}")
@@ -1,289 +1,464 @@
 """
 ダミーデータ生成スクリプト
 BigQueryのevents_flat_tblテーブル構造に対応したリアルなイベントデータを生成
+
+セッション単位で流入元・デバイス・A/Bテストのバリアント・最大到達ページ（ページごとの離脱によるファネルの減衰）・
+コンバージョンを決め、セッション内のイベントに展開する。乱数はすべてシード付きのNumPyの配列演算で作り、
+chunk_size イベントずつCSVまたはParquetに書き出すので、数千万〜億イベントでもメモリに全件を載せない。
+
+    python generate_dummy_data.py --events 10000000 --seed 0 --output data/dummy_10m.csv
+    python generate_dummy_data.py --events 100000000 --seed 0 --output data/dummy_100m --format parquet
 """
 
-import pandas as pd
-import numpy as np
+import argparse
+import os
+import time
 from datetime import datetime, timedelta
-import random
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+
+from analytics.storage import EVENT_SCHEMA, PARTITIONING
+
+# 出力先の既定値（このスクリプトと同じディレクトリ）
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dummy_data.csv")
+
+# 1回に生成・書き出しするイベント数
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# LP URL
+# ユーザーから指定されたURLに固定
+LP_URLS = ["https://shungene.lm-c.jp/tst08/tst08.html"]
+TOTAL_PAGES = 10
+
+# デバイスタイプと、次のページへ進む確率（ページごとの離脱でファネルが減衰する）
+DEVICE_TYPES = ["mobile", "desktop", "tablet"]
+DEVICE_WEIGHTS = [0.7, 0.25, 0.05]
+DEVICE_CONTINUE_RATES = [0.80, 0.85, 0.82]
+
+# UTMパラメータ: (参照元, 出現比率, メディアの候補, リファラー)
+TRAFFIC_SOURCES = [
+    ("google", 0.22, ["organic", "cpc"], "https://www.google.com/"),
+    ("yahoo", 0.10, ["organic", "cpc"], "https://www.yahoo.co.jp/"),
+    ("bing", 0.03, ["organic", "cpc"], "https://www.bing.com/"),
+    ("facebook", 0.10, ["social", "paidsocial", "referral"], "https://www.facebook.com/"),
+    ("instagram", 0.14, ["social", "paidsocial", "referral"], "https://www.instagram.com/"),
+    ("twitter", 0.09, ["social", "paidsocial", "referral"], "https://t.co/"),
+    ("youtube", 0.06, ["paidvideo", "referral"], "https://www.youtube.com/"),
+    ("smartnews", 0.06, ["display", "referral"], "https://www.smartnews.com/"),
+    ("news-app", 0.04, ["display", "referral"], "android-app://com.example.news"),
+    ("direct", 0.16, ["(none)"], None),
+]
+MEDIUMS = list(dict.fromkeys(medium for _, _, mediums, _ in TRAFFIC_SOURCES for medium in mediums))
+# リファラーが取れないセッションの割合（direct 以外）
+MISSING_REFERRER_RATE = 0.1
+UTM_CAMPAIGNS = ["spring_sale", "summer_campaign", "brand_awareness", None]
+UTM_CONTENTS = [f"ad_{i}" for i in range(1, 6)] + [None]
+
+# A/Bテスト
+AB_VARIANTS = ["A", "B"]
+AB_TEST_TARGETS = ["cta_button", "hero_image", "headline", None]
+AB_TEST_TYPES = ["presence", "creative", "layout", None]
+# バリアントBの改善効果（次のページへ進む確率への加算と、CVRの倍率）
+VARIANT_B_CONTINUE_LIFT = 0.01
+VARIANT_B_CVR_LIFT = 1.2
+
+# コンバージョン率（最終ページまで到達したセッションと、それ以外のセッション）
+FINAL_PAGE_CVR = 0.15
+BASE_CVR = 0.002
+CV_TYPES = ["primary", "micro"]
+
+# セッション内のイベント: 開始・各ページの表示のほかに、平均 EXTRA_EVENTS_BASE + 到達ページ数 × EXTRA_EVENTS_PER_PAGE 件
+EXTRA_EVENTS_BASE = 1.0
+EXTRA_EVENTS_PER_PAGE = 0.3
+EXTRA_EVENT_NAMES = ["click", "scroll", "video_play", "page_view"]
+EXTRA_EVENT_WEIGHTS = [0.45, 0.35, 0.1, 0.1]
+# 前のページより後ろのページから戻ってくる（逆行する）割合
+BACKWARD_RATE = 0.05
+
+# クリック要素
+ELEM_TAGS = ["button", "a", "div", "img"]
+ELEM_IDS = ["cta-button", "nav-link", "video-play", None]
+ELEM_CLASSES = ["btn-primary", "link", "card", None]
+
+NAVIGATION_METHODS = ["swipe", "click", "scroll", "button"]
+VIDEO_SOURCES = ["https://example.com/video1.mp4", None]
+
+# 時間帯ごとのセッション開始の比率（0時〜23時。昼休みと夜にピーク）
+HOURLY_WEIGHTS = [
+    2, 1, 1, 1, 1, 1, 2, 3, 4, 4, 4, 5,
+    7, 6, 4, 4, 4, 5, 6, 7, 8, 9, 7, 4,
+]
+
+# アラートの検知用に、セッション数とCVRが急落した日を作る（期間が ALERT_MIN_PERIOD 日を超える場合）
+ALERT_DAYS = 3
+ALERT_MIN_PERIOD = 10
+ALERT_SESSION_DROP = (0.5, 0.8)
+
+_MS = 1000
+_DAY_US = 86_400 * 1_000_000
+
+
+class _Plan:
+    """チャンクをまたいで共通のパラメータ（期間・アラート日・テストごとのp値）"""
+
+    def __init__(self, rng, num_events, num_days, end_date):
+        self.num_users = max(1, num_events // 15)
+        self.end_us = int(pd.Timestamp(end_date).value // 1000)
+        first_day = pd.Timestamp(end_date).normalize() - pd.Timedelta(days=num_days - 1)
+        self.first_day_us = int(first_day.value // 1000)
+        self.num_days = num_days
+
+        # 異常日はセッションの開始日として選ばれにくくし、その日のコンバージョンをなくす
+        self.day_weights = np.ones(num_days)
+        self.alert_days = np.zeros(num_days, dtype=bool)
+        if num_days > ALERT_MIN_PERIOD:
+            days_ago = rng.choice(np.arange(3, num_days - 3), size=min(ALERT_DAYS, num_days - 6), replace=False)
+            alert_index = num_days - 1 - days_ago
+            self.day_weights[alert_index] = 1 - rng.uniform(*ALERT_SESSION_DROP, size=len(alert_index))
+            self.alert_days[alert_index] = True
+        self.day_weights /= self.day_weights.sum()
+
+        # テスト種別×バリアントのp値。バリアントAは1.0（基準）、Bは0.01, 0.05, 0.1の周辺に偏らせる
+        p_value_ranges = np.array([(0.005, 0.02), (0.04, 0.06), (0.09, 0.11), (0.1, 1.0)])
+        targets = len(AB_TEST_TARGETS) - 1
+        picked = p_value_ranges[rng.choice(4, size=targets, p=[0.1, 0.2, 0.2, 0.5])]
+        self.p_values = np.ones((targets, len(AB_VARIANTS)))
+        self.p_values[:, AB_VARIANTS.index("B")] = rng.uniform(picked[:, 0], picked[:, 1])
+
+
+def _weights(values):
+    weights = np.asarray(values, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _dictionary(codes, categories, missing=None):
+    """コード（-1 は欠損）とカテゴリから辞書エンコードの列を作る"""
+    mask = codes < 0 if missing is None else missing | (codes < 0)
+    indices = pa.array(codes.astype(np.int32), mask=mask)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(categories, pa.string()))
+
+
+def _choice_codes(rng, categories, size, p=None):
+    """categories からの抽選結果のコード（None を除いたカテゴリでの位置。None は -1）"""
+    codes = rng.integers(len(categories), size=size) if p is None else rng.choice(len(categories), size=size, p=p)
+    present = np.cumsum([value is not None for value in categories]) - 1
+    return np.where([value is None for value in categories], -1, present)[codes]
+
+
+def _present(categories):
+    return [value for value in categories if value is not None]
+
+
+def _generate_sessions(rng, plan, count):
+    """count セッション分の属性（1セッション1要素の配列の辞書）"""
+    sessions = {}
+    sessions['user'] = rng.integers(plan.num_users, size=count)
+    sessions['ga_session_id'] = rng.integers(1_000_000, 10_000_000, size=count)
+    sessions['ga_session_number'] = np.minimum(rng.geometric(0.45, size=count), 10)
+    sessions['lp'] = rng.integers(len(LP_URLS), size=count)
+
+    day = rng.choice(plan.num_days, size=count, p=plan.day_weights)
+    hour = rng.choice(24, size=count, p=_weights(HOURLY_WEIGHTS))
+    start = plan.first_day_us + day * _DAY_US + hour * 3_600_000_000 + rng.integers(0, 3_600_000_000, size=count)
+    # 最終日の現在時刻より後になったセッションは前日の同じ時刻にする
+    late = start > plan.end_us
+    start[late] -= _DAY_US
+    day[late] -= 1
+    sessions['start_us'] = start
+    sessions['alert_day'] = plan.alert_days[np.maximum(day, 0)]
+
+    sessions['device'] = rng.choice(len(DEVICE_TYPES), size=count, p=_weights(DEVICE_WEIGHTS))
+    source = rng.choice(len(TRAFFIC_SOURCES), size=count, p=_weights([w for _, w, _, _ in TRAFFIC_SOURCES]))
+    medium_codes = [[MEDIUMS.index(medium) for medium in mediums] for _, _, mediums, _ in TRAFFIC_SOURCES]
+    medium_counts = np.array([len(codes) for codes in medium_codes])
+    medium_offsets = np.concatenate([[0], np.cumsum(medium_counts)[:-1]])
+    sessions['source'] = source
+    picked = medium_offsets[source] + (rng.random(count) * medium_counts[source]).astype(np.int64)
+    sessions['medium'] = np.concatenate(medium_codes)[picked]
+    is_direct = np.array([referrer is None for _, _, _, referrer in TRAFFIC_SOURCES])[source]
+    sessions['referrer'] = np.where(is_direct | (rng.random(count) < MISSING_REFERRER_RATE), -1, source)
+    sessions['campaign'] = _choice_codes(rng, UTM_CAMPAIGNS, count)
+    sessions['content'] = _choice_codes(rng, UTM_CONTENTS, count)
+
+    sessions['variant'] = rng.integers(len(AB_VARIANTS), size=count)
+    sessions['presence_variant'] = _choice_codes(rng, AB_VARIANTS + [None], count)
+    sessions['creative_variant'] = _choice_codes(rng, AB_VARIANTS + [None], count)
+    sessions['test_target'] = _choice_codes(rng, AB_TEST_TARGETS, count)
+    sessions['test_type'] = _choice_codes(rng, AB_TEST_TYPES, count)
+    is_b = (sessions['variant'] == AB_VARIANTS.index("B")) & (sessions['test_target'] >= 0)
+
+    # ファネル: 各ページから次のページへ進む確率で進み、進まなかったページで離脱する
+    continue_rate = np.array(DEVICE_CONTINUE_RATES)[sessions['device']] + VARIANT_B_CONTINUE_LIFT * is_b
+    sessions['max_page'] = np.minimum(rng.geometric(1 - continue_rate), TOTAL_PAGES)
+
+    cvr = np.where(sessions['max_page'] == TOTAL_PAGES, FINAL_PAGE_CVR, BASE_CVR) * np.where(is_b, VARIANT_B_CVR_LIFT, 1.0)
+    sessions['converted'] = (rng.random(count) < cvr) & ~sessions['alert_day']
+    sessions['extra_events'] = rng.poisson(EXTRA_EVENTS_BASE + EXTRA_EVENTS_PER_PAGE * sessions['max_page'])
+    # 開始 + 各ページの表示 + その他のイベント + コンバージョン
+    sessions['events'] = 1 + sessions['max_page'] + sessions['extra_events'] + sessions['converted']
+    return sessions
 
-def generate_dummy_data(num_events=5000, num_days=30):
+
+def _take_sessions(rng, plan, num_events):
+    """合計 num_events イベントになるまでセッションを作る（最後のセッションは途中までのイベントにする）"""
+    parts, total = [], 0
+    mean_events = 2 + EXTRA_EVENTS_BASE + 4 * (1 + EXTRA_EVENTS_PER_PAGE)
+    while total < num_events:
+        part = _generate_sessions(rng, plan, int((num_events - total) / mean_events * 1.1) + 16)
+        parts.append(part)
+        total += int(part['events'].sum())
+    sessions = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+    ends = np.cumsum(sessions['events'])
+    count = int(np.searchsorted(ends, num_events)) + 1
+    sessions = {key: values[:count] for key, values in sessions.items()}
+    sessions['events'][-1] -= ends[count - 1] - num_events
+    return sessions
+
+
+def _chunk_table(rng, plan, num_events) -> pa.Table:
+    """num_events イベント分のテーブル（イベント時刻の昇順）"""
+    sessions = _take_sessions(rng, plan, num_events)
+    counts = sessions['events']
+    session = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    position = np.arange(num_events) - first[session]
+
+    def per_event(key):
+        return sessions[key][session]
+
+    max_page = per_event('max_page')
+    extra_end = max_page + per_event('extra_events')
+
+    # イベント名とページ: 0番目が開始、1..最大到達ページ番目が各ページの表示、その後にその他のイベント、最後にCV
+    event_names = ["session_start", "page_view", "swipe_page"] + EXTRA_EVENT_NAMES[:-1] + ["conversion"]
+    extra_codes = np.array([event_names.index(name) for name in EXTRA_EVENT_NAMES])
+    is_extra = (position > max_page) & (position <= extra_end)
+    is_conversion = position > extra_end
+    name = np.select(
+        [position == 0, position == 1, position <= max_page, is_extra],
+        [0, 1, 2, extra_codes[rng.choice(len(EXTRA_EVENT_NAMES), size=num_events, p=_weights(EXTRA_EVENT_WEIGHTS))]],
+        default=event_names.index("conversion"),
+    )
+    page = np.select(
+        [position == 0, position <= max_page, is_conversion],
+        [1, position, max_page],
+        default=1 + (rng.random(num_events) * max_page).astype(np.int64),
+    )
+
+    # 逆行: 前のページより後ろのページから戻ってきたことにする
+    backward = (page > 1) & (page < TOTAL_PAGES) & (rng.random(num_events) < BACKWARD_RATE)
+    prev_page = np.where(backward, page + 1 + (rng.random(num_events) * (TOTAL_PAGES - page)).astype(np.int64), page - 1)
+
+    # 滞在時間・パフォーマンス。イベント時刻はセッション開始から前のイベントまでの滞在時間の合計だけ後
+    stay_ms = rng.integers(1000, 120001, size=num_events)
+    total_duration_ms = stay_ms + (rng.random(num_events) * (300001 - stay_ms)).astype(np.int64)
+    load_time_ms = rng.integers(500, 5001, size=num_events)
+    elapsed = np.cumsum(stay_ms) - stay_ms
+    timestamp_us = per_event('start_us') + (elapsed - elapsed[first][session]) * _MS
+
+    is_click = name == event_names.index("click")
+    converted = name == event_names.index("conversion")
+    variant = per_event('variant')
+    test_target = per_event('test_target')
+    p_value = plan.p_values[np.maximum(test_target, 0), variant]
+
+    lp = per_event('lp')
+    paths = [urlparse(url).path or "/" for url in LP_URLS]
+    users = pc.binary_join_element_wise(
+        "user_", pc.utf8_lpad(pa.array(sessions['user']).cast(pa.string()), width=6, padding="0"), ""
+    )
+    session_ids = pc.binary_join_element_wise(users, pa.array(sessions['ga_session_id']).cast(pa.string()), "-")
+
+    def session_dictionary(values):
+        encoded = pc.dictionary_encode(values)
+        indices = encoded.indices.to_numpy()[session]
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), encoded.dictionary)
+
+    def uniform(low, high, mask):
+        return pa.array(rng.uniform(low, high, size=num_events), mask=~mask)
+
+    sources = [source for source, _, _, _ in TRAFFIC_SOURCES]
+    referrers = [referrer or "" for _, _, _, referrer in TRAFFIC_SOURCES]
+    timestamps = pa.array(timestamp_us, pa.timestamp('us'))
+    columns = {
+        'event_date': pa.array((timestamp_us // _DAY_US).astype(np.int32), pa.date32()),
+        'event_timestamp': timestamps,
+        'event_timestamp_jst': timestamps,
+        'event_name': _dictionary(name, event_names),
+        'user_pseudo_id': session_dictionary(users),
+        'ga_session_id': pa.array(per_event('ga_session_id')),
+        'ga_session_number': pa.array(per_event('ga_session_number').astype(np.int32)),
+        'session_id': session_dictionary(session_ids),
+        'page_location': _dictionary(lp, LP_URLS),
+        'page_referrer': _dictionary(per_event('referrer'), referrers),
+        'page_path': _dictionary(lp, paths),
+        'prev_page_path': _dictionary(
+            lp * TOTAL_PAGES + prev_page - 1,
+            [f"{path}#page-{n}" for path in paths for n in range(1, TOTAL_PAGES + 1)],
+            missing=page <= 1,
+        ),
+        'page_num_dom': pa.array(page.astype(np.int32)),
+        'original_page_num': pa.array(page.astype(np.int32)),
+        'stay_ms': pa.array(stay_ms),
+        'total_duration_ms': pa.array(total_duration_ms),
+        'load_time_ms': pa.array(load_time_ms),
+        'max_page_reached': pa.array(max_page.astype(np.int32)),
+        'completion_rate': pa.array(max_page / TOTAL_PAGES),
+        'total_pages': pa.array(np.full(num_events, TOTAL_PAGES, dtype=np.int32)),
+        'click_x_rel': uniform(0.1, 0.9, is_click),
+        'click_y_rel': uniform(0.1, 0.9, is_click),
+        'elem_tag': _dictionary(_choice_codes(rng, ELEM_TAGS, num_events), ELEM_TAGS, missing=~is_click),
+        'elem_id': _dictionary(_choice_codes(rng, ELEM_IDS, num_events), _present(ELEM_IDS), missing=~is_click),
+        'elem_classes': _dictionary(_choice_codes(rng, ELEM_CLASSES, num_events), _present(ELEM_CLASSES), missing=~is_click),
+        'scroll_pct': pa.array(rng.uniform(0.1, 1.0, size=num_events)),
+        'utm_source': _dictionary(per_event('source'), sources),
+        'utm_medium': _dictionary(per_event('medium'), MEDIUMS),
+        'utm_campaign': _dictionary(per_event('campaign'), _present(UTM_CAMPAIGNS)),
+        'utm_content': _dictionary(per_event('content'), _present(UTM_CONTENTS)),
+        'device_type': _dictionary(per_event('device'), DEVICE_TYPES),
+        'direction': _dictionary(backward.astype(np.int64), ["forward", "backward"]),
+        'navigation_method': _dictionary(_choice_codes(rng, NAVIGATION_METHODS, num_events), NAVIGATION_METHODS),
+        'link_url': _dictionary(
+            _choice_codes(rng, LP_URLS + ["https://example.com/thank-you", None], num_events),
+            LP_URLS + ["https://example.com/thank-you"],
+        ),
+        'video_src': _dictionary(_choice_codes(rng, VIDEO_SOURCES, num_events), _present(VIDEO_SOURCES)),
+        'session_variant': _dictionary(variant, AB_VARIANTS),
+        'presence_test_variant': _dictionary(per_event('presence_variant'), AB_VARIANTS),
+        'creative_test_variant': _dictionary(per_event('creative_variant'), AB_VARIANTS),
+        'ab_variant': _dictionary(variant, AB_VARIANTS),
+        'ab_test_target': _dictionary(test_target, _present(AB_TEST_TARGETS)),
+        'ab_test_type': _dictionary(per_event('test_type'), _present(AB_TEST_TYPES)),
+        'cv_type': _dictionary(_choice_codes(rng, CV_TYPES, num_events), CV_TYPES, missing=~converted),
+        'p_value': pa.array(p_value, mask=test_target < 0),
+        'cv_value': uniform(1000, 50000, converted),
+    }
+    columns['value'] = columns['cv_value']
+    table = pa.table(columns).cast(EVENT_SCHEMA)
+    return table.take(pa.array(np.argsort(timestamp_us, kind='stable')))
+
+
+def iter_dummy_tables(num_events=5000, num_days=30, seed=None, end_date=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    ダミーデータを chunk_size イベントずつの pyarrow.Table で返す
+
+    同じ seed・end_date・chunk_size からは同じデータができる。セッションはチャンクをまたがず、
+    各チャンクの行はイベント時刻の昇順（全体の並びはチャンクごと）
+
+    Args:
+        num_events: 生成するイベント数
+        num_days: 過去何日分のデータを生成するか（最終日は end_date の日）
+        seed: 乱数のシード（None の場合は毎回異なるデータ）
+        end_date: 期間の終わり（省略時は現在時刻）
+        chunk_size: 1チャンクのイベント数
+
+    Yields:
+        pa.Table: EVENT_SCHEMA の列を持つテーブル
+    """
+    end_date = datetime.now() if end_date is None else end_date
+    chunks = -(-num_events // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(chunks + 1)
+    plan = _Plan(np.random.default_rng(seeds[0]), num_events, num_days, end_date)
+    for i in range(chunks):
+        size = min(chunk_size, num_events - i * chunk_size)
+        yield _chunk_table(np.random.default_rng(seeds[i + 1]), plan, size)
+
+
+def generate_dummy_data(num_events=5000, num_days=30, seed=None, end_date=None):
     """
     リアルなスワイプLPイベントデータを生成
-    
+
     Args:
         num_events: 生成するイベント数
         num_days: 過去何日分のデータを生成するか
-    
+        seed: 乱数のシード（None の場合は毎回異なるデータ）
+        end_date: 期間の終わり（省略時は現在時刻）
+
     Returns:
-        pd.DataFrame: ダミーデータ
+        pd.DataFrame: ダミーデータ（イベント時刻の昇順）
     """
-    
-    # 基準日時
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=num_days)
-    
-    # ユーザー数（セッション数の約1/3）
-    num_users = num_events // 15
-    user_ids = [f"user_{i:06d}" for i in range(num_users)]
-    
-    # LP URL
-    # ユーザーから指定されたURLに固定
-    lp_url = "https://shungene.lm-c.jp/tst08/tst08.html"
-    
-    # イベント名
-    event_names = [
-        "page_view",
-        "swipe_page",
-        "click",
-        "scroll",
-        "video_play",
-        "conversion",
-        "session_start",
-    ]
-    
-    # デバイスタイプ
-    device_types = ["mobile", "desktop", "tablet"]
-    device_weights = [0.7, 0.25, 0.05]
-    
-    # UTMパラメータ
-    traffic_sources = {
-        "google": {"mediums": ["organic", "cpc"], "referrer": "https://www.google.com/"},
-        "yahoo": {"mediums": ["organic", "cpc"], "referrer": "https://www.yahoo.co.jp/"},
-        "bing": {"mediums": ["organic", "cpc"], "referrer": "https://www.bing.com/"},
-        "facebook": {"mediums": ["social", "paidsocial", "referral"], "referrer": "https://www.facebook.com/"},
-        "instagram": {"mediums": ["social", "paidsocial", "referral"], "referrer": "https://www.instagram.com/"},
-        "twitter": {"mediums": ["social", "paidsocial", "referral"], "referrer": "https://t.co/"},
-        "youtube": {"mediums": ["paidvideo", "referral"], "referrer": "https://www.youtube.com/"},
-        "smartnews": {"mediums": ["display", "referral"], "referrer": "https://www.smartnews.com/"},
-        "news-app": {"mediums": ["display", "referral"], "referrer": "android-app://com.example.news"},
-        "direct": {"mediums": ["(none)"], "referrer": None}
-    }
-    source_keys = list(traffic_sources.keys())
-    utm_campaigns = ["spring_sale", "summer_campaign", "brand_awareness", None]
-    
-    # A/Bテストバリアント
-    ab_variants = ["A", "B"]
-    
-    # ナビゲーション方法
-    navigation_methods = ["swipe", "click", "scroll", "button"]
-    
-    # 方向
-    directions = ["forward", "backward"]
-    
-    # A/Bテストごとのp値を保持する辞書
-    test_p_values = {}
-
-    # データ生成
-    data = []
-    
-    for _ in range(num_events):
-        # ランダムな日時
-        event_timestamp = start_date + timedelta(
-            seconds=random.randint(0, int((end_date - start_date).total_seconds()))
+    tables = list(iter_dummy_tables(num_events, num_days, seed, end_date))
+    table = pa.concat_tables(tables).combine_chunks()
+    table = table.take(pc.sort_indices(table, [('event_timestamp', 'ascending')]))
+    table = table.cast(pa.schema([
+        field.with_type(pa.string()) if pa.types.is_dictionary(field.type) else field for field in table.schema
+    ]))
+    return table.to_pandas(coerce_temporal_nanoseconds=True)
+
+
+def write_dummy_data(output, num_events, num_days=30, seed=None, end_date=None, chunk_size=DEFAULT_CHUNK_SIZE, format=None):
+    """
+    ダミーデータをチャンクごとに書き出す
+
+    Args:
+        output: 出力先。CSVはファイル、Parquetは event_date で日付パーティション分割したデータセットのディレクトリ
+            （analytics.storage.read_events で読める）
+        format: "csv" または "parquet"（省略時は output の拡張子が .csv なら CSV）
+
+    Returns:
+        int: 書き出したセッション数
+    """
+    format = format or ("csv" if output.endswith(".csv") else "parquet")
+    tables = iter_dummy_tables(num_events, num_days, seed, end_date, chunk_size)
+    sessions = 0
+
+    def counted(tables):
+        nonlocal sessions
+        for table in tables:
+            sessions += pc.count_distinct(table['session_id']).as_py()
+            yield table
+
+    if format == "csv":
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with pacsv.CSVWriter(output, EVENT_SCHEMA) as writer:
+            for table in counted(tables):
+                writer.write_table(table)
+    elif format == "parquet":
+        batches = (
+            batch
+            for table in counted(tables)
+            for batch in table.to_batches()
         )
-        event_date = event_timestamp.date()
-        
-        # ユーザーとセッション
-        user_pseudo_id = random.choice(user_ids)
-        ga_session_id = random.randint(1000000, 9999999)
-        ga_session_number = random.randint(1, 10)
-        session_id = f"{user_pseudo_id}-{ga_session_id}"
-        
-        # イベント名
-        event_name = random.choice(event_names)
-        
-        # ページ情報
-        page_location = lp_url
-        page_path = page_location.split(".com")[1] if ".com" in page_location else "/"
-        page_num_dom = random.randint(1, 10)
-        original_page_num = page_num_dom
-        total_pages = 10
-        
-        # 滞在時間・パフォーマンス
-        stay_ms = random.randint(1000, 120000)  # 1秒～2分
-        total_duration_ms = random.randint(stay_ms, 300000)  # 最大5分
-        load_time_ms = random.randint(500, 5000)  # 0.5秒～5秒
-        
-        # 進行状況
-        max_page_reached = random.randint(page_num_dom, total_pages)
-        completion_rate = max_page_reached / total_pages
-        
-        # クリック情報（クリックイベントの場合のみ）
-        if event_name == "click":
-            click_x_rel = random.uniform(0.1, 0.9)
-            click_y_rel = random.uniform(0.1, 0.9)
-            elem_tag = random.choice(["button", "a", "div", "img"])
-            elem_id = random.choice(["cta-button", "nav-link", "video-play", None])
-            elem_classes = random.choice(["btn-primary", "link", "card", None])
-        else:
-            click_x_rel = None
-            click_y_rel = None
-            elem_tag = None
-            elem_id = None
-            elem_classes = None
-        
-        # スクロール
-        scroll_pct = random.uniform(0.1, 1.0)
-        
-        # UTM/トラフィック
-        utm_source = random.choice(source_keys)
-        source_info = traffic_sources[utm_source]
-        utm_medium = random.choice(source_info["mediums"])
-        utm_campaign = random.choice(utm_campaigns)
-        utm_content = random.choice([f"ad_{i}" for i in range(1, 6)] + [None])
-        device_type = random.choices(device_types, weights=device_weights)[0]
-        
-        # リファラーをUTMソースと連動させる
-        page_referrer = source_info["referrer"]
-        if utm_source != "direct" and random.random() < 0.1: # 10%の確率でリファラーが取れないケース
-            page_referrer = None
-
-        # ナビゲーション
-        direction = random.choice(directions)
-        navigation_method = random.choice(navigation_methods)
-        link_url = random.choice([page_location, "https://example.com/thank-you", None])
-        video_src = random.choice(["https://example.com/video1.mp4", None])
-        
-        # A/Bテスト
-        session_variant = random.choice(ab_variants)
-        presence_test_variant = random.choice(ab_variants + [None]) # type: ignore
-        creative_test_variant = random.choice(ab_variants + [None]) # type: ignore
-        ab_variant = session_variant
-        ab_test_target = random.choice(["cta_button", "hero_image", "headline", None])
-        ab_test_type = random.choice(["presence", "creative", "layout", None])
-
-        # p値の生成ロジック（ab_test_targetが存在する場合に限定）
-        p_value = None
-        if ab_test_target:
-            # テスト種別とバリアントの組み合わせでp値を決定
-            test_key = (ab_test_target, ab_variant)
-            if test_key not in test_p_values:
-                # 0.01, 0.05, 0.1の周辺に偏らせつつ、ランダムなp値を生成
-                p_value_options = [
-                    random.uniform(0.005, 0.02),  # ★★★
-                    random.uniform(0.04, 0.06),   # ★★
-                    random.uniform(0.09, 0.11),   # ★
-                    random.uniform(0.1, 1.0)      # -
-                ]
-                # バリアントAはp値1.0（基準）、Bにランダムなp値を割り当て
-                test_p_values[test_key] = 1.0 if ab_variant == 'A' else random.choices(p_value_options, weights=[0.1, 0.2, 0.2, 0.5])[0]
-            p_value = test_p_values[test_key]
-        
-        # コンバージョン（5%の確率）
-        is_conversion = random.random() < 0.05
-        if is_conversion and event_name == "conversion":
-            cv_type = random.choice(["primary", "micro"])
-            cv_value = random.uniform(1000, 50000)
-            value = cv_value
-        else:
-            cv_type = None
-            cv_value = None
-            value = None
-        
-        # 前ページパス
-        if page_num_dom > 1:
-            # 5%の確率で逆行を発生させる
-            if random.random() < 0.05 and page_num_dom < total_pages:
-                # 逆行: 現在のページより後のページから来たことにする
-                # 例: 現在がpage-3なら、前のページはpage-4やpage-5
-                prev_page_num = random.randint(page_num_dom + 1, total_pages)
-                prev_page_path = f"{page_path}#page-{prev_page_num}"
-            else:
-                prev_page_path = f"{page_path}#page-{page_num_dom - 1}"
-        else:
-            prev_page_path = None
-        
-        # データ追加
-        data.append({
-            "event_date": event_date,
-            "event_timestamp": event_timestamp,
-            "event_timestamp_jst": event_timestamp,
-            "event_name": event_name,
-            "user_pseudo_id": user_pseudo_id,
-            "ga_session_id": ga_session_id,
-            "ga_session_number": ga_session_number,
-            "session_id": session_id,
-            "page_location": page_location,
-            "page_referrer": page_referrer,
-            "page_path": page_path,
-            "prev_page_path": prev_page_path,
-            "page_num_dom": page_num_dom,
-            "original_page_num": original_page_num,
-            "stay_ms": stay_ms,
-            "total_duration_ms": total_duration_ms,
-            "load_time_ms": load_time_ms,
-            "max_page_reached": max_page_reached,
-            "completion_rate": completion_rate,
-            "total_pages": total_pages,
-            "click_x_rel": click_x_rel,
-            "click_y_rel": click_y_rel,
-            "elem_tag": elem_tag,
-            "elem_id": elem_id,
-            "elem_classes": elem_classes,
-            "scroll_pct": scroll_pct,
-            "utm_source": utm_source,
-            "utm_medium": utm_medium,
-            "utm_campaign": utm_campaign,
-            "utm_content": utm_content,
-            "device_type": device_type,
-            "direction": direction,
-            "navigation_method": navigation_method,
-            "link_url": link_url,
-            "video_src": video_src,
-            "session_variant": session_variant,
-            "presence_test_variant": presence_test_variant,
-            "creative_test_variant": creative_test_variant,
-            "ab_variant": ab_variant,
-            "ab_test_target": ab_test_target,
-            "ab_test_type": ab_test_type,
-            "cv_type": cv_type,
-            "p_value": p_value,
-            "cv_value": cv_value,
-            "value": value,
-        })
-    
-    # DataFrameに変換
-    df = pd.DataFrame(data)
-    
-    # --- 意図的なアラートデータを注入 ---
-    # 期間内にランダムな3日を「異常日」として設定
-    if num_days > 10:
-        alert_dates = random.sample(
-            [end_date - timedelta(days=i) for i in range(3, num_days - 3)], 
-            k=min(3, num_days - 6)
+        ds.write_dataset(
+            batches,
+            output,
+            schema=EVENT_SCHEMA,
+            format='parquet',
+            partitioning=PARTITIONING,
+            existing_data_behavior='delete_matching',
+            basename_template='part-{i}.parquet',
         )
-        for alert_date in alert_dates:
-            alert_date_str = alert_date.strftime('%Y-%m-%d')
-            
-            # セッション数を意図的に減らす (50-80%減)
-            session_drop_rate = random.uniform(0.5, 0.8)
-            num_sessions_on_alert_date = len(df[df['event_date'] == alert_date_str])
-            sessions_to_drop = int(num_sessions_on_alert_date * session_drop_rate)
-            if sessions_to_drop > 0:
-                indices_to_drop = df[df['event_date'] == alert_date_str].sample(n=sessions_to_drop).index
-                df.drop(indices_to_drop, inplace=True)
-
-            # CVRを意図的に下げる (CVイベントを削除)
-            cv_indices_on_alert_date = df[(df['event_date'] == alert_date_str) & (df['cv_type'].notna())].index
-            if not cv_indices_on_alert_date.empty:
-                df.drop(cv_indices_on_alert_date, inplace=True)
-
-    # 日付でソート
-    df = df.sort_values("event_timestamp").reset_index(drop=True)
-    
-    return df
+    else:
+        raise ValueError(f"未対応の出力形式です: {format}")
+    return sessions
 
 
 if __name__ == "__main__":
-    # ダミーデータ生成
-    df = generate_dummy_data(num_events=10000, num_days=30)
-    
-    # CSV保存
-    df.to_csv("/home/ubuntu/swipe_lp_analyzer/app/dummy_data.csv", index=False)
-    
-    print(f"✅ ダミーデータ生成完了: {len(df)} イベント")
-    print(f"📅 期間: {df['event_date'].min()} ～ {df['event_date'].max()}")
-    print(f"👥 ユーザー数: {df['user_pseudo_id'].nunique()}")
-    print(f"📊 セッション数: {df['session_id'].nunique()}")
+    parser = argparse.ArgumentParser(description="ダミーデータ（イベントデータ）を生成する")
+    parser.add_argument("--events", type=int, default=10000, help="生成するイベント数")
+    parser.add_argument("--days", type=int, default=30, help="過去何日分のデータを生成するか")
+    parser.add_argument("--seed", type=int, default=None, help="乱数のシード（指定すると同じデータを再現できる）")
+    parser.add_argument("--end-date", default=None, help="期間の終わり（例: 2025-10-23T18:00。省略時は現在時刻）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="1回に生成・書き出しするイベント数")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="出力先（.csv ならCSV、それ以外はParquetのデータセットのディレクトリ）")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=None, help="出力形式（省略時は出力先から判定）")
+    args = parser.parse_args()
+
+    end_date = datetime.fromisoformat(args.end_date) if args.end_date else datetime.now()
+    started = time.perf_counter()
+    sessions = write_dummy_data(
+        args.output, args.events, args.days, args.seed, end_date, args.chunk_size, args.format
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ ダミーデータ生成完了: {args.events:,} イベント → {args.output}")
+    print(f"📅 期間: {(end_date - timedelta(days=args.days - 1)).date()} ～ {end_date.date()}")
+    print(f"📊 セッション数: {sessions:,}")
+    print(f"⏱️ {elapsed:.1f} 秒（{args.events / elapsed:,.0f} イベント/秒）")
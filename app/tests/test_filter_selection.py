@@ -0,0 +1,40 @@
+"""
+分析ページのフィルター（ドロップダウン）の選択が、ほかのフィルターを変えて再実行しても保たれることの確認
+"""
+
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ページ -> (期間, 新規/リピート, デバイス) のドロップダウンのキー
+FILTER_KEYS = {
+    "全体サマリー": ("summary_period_selector", "summary_user_type_selector", "summary_device_selector"),
+    "広告分析": ("ad_analysis_period", "ad_analysis_user_type", "ad_analysis_device"),
+    "デモグラフィック情報": ("demographic_period", "demographic_user_type", "demographic_device"),
+}
+
+
+@pytest.mark.parametrize("page", list(FILTER_KEYS))
+def test_chained_selections_survive_rerun(page, monkeypatch):
+    monkeypatch.syspath_prepend(APP_DIR)
+    period_key, user_type_key, device_key = FILTER_KEYS[page]
+
+    at = AppTest.from_file(os.path.join(APP_DIR, "swipe_v2.py"), default_timeout=300)
+    at.query_params["page"] = page
+    at.run()
+
+    # 前のドロップダウンで絞り込むと後のドロップダウンの件数が変わるが、選択は保たれる
+    at.selectbox(key=user_type_key).select("新規").run()
+    at.selectbox(key=device_key).select("mobile").run()
+    assert at.selectbox(key=user_type_key).value == "新規"
+    assert at.selectbox(key=device_key).value == "mobile"
+
+    # 期間を変えても選択は保たれる
+    period = at.selectbox(key=period_key)
+    period.select(next(option for option in period.options if option not in (period.value, "カスタム"))).run()
+    assert not at.exception
+    assert at.selectbox(key=user_type_key).value == "新規"
+    assert at.selectbox(key=device_key).value == "mobile"
@@ -0,0 +1,73 @@
+"""
+ページのレジストリ
+各ページは views パッケージの1モジュールで、render() で本文を表示する。
+ページのモジュール（とそこで使う plotly などの重い依存）は最初にそのページを表示するときに import し、
+以降の再実行では読み込み済みのモジュールをそのまま使う
+"""
+
+import importlib
+from typing import NamedTuple
+
+import streamlit as st
+
+
+class PageSpec(NamedTuple):
+    """
+    サイドバーのメニュー項目とページのモジュール
+
+    uses_dataset が True のページは render(snapshot) にデータセットのスナップショットを受け取る。
+    False のページ（ヘルプ）は render() で表示し、データセットの読み込みもしない
+    """
+    title: str
+    module: str
+    uses_dataset: bool = True
+
+
+# デフォルトのページ（URLに何もない場合）
+DEFAULT_PAGE = "使用ガイド"
+
+# グルーピングされたメニュー項目（サイドバーに上から順に表示する）
+MENU_GROUPS = {
+    "AIアナリスト": [
+        PageSpec("AIによる分析・考察", "ai_analysis"),
+    ],
+    "基本分析": [
+        PageSpec("リアルタイムビュー", "realtime"),
+        PageSpec("全体サマリー", "summary"),
+        PageSpec("時系列分析", "timeseries"),
+        PageSpec("デモグラフィック情報", "demographic"),
+        PageSpec("アラート", "alerts"),
+    ],
+    "LP最適化分析": [
+        PageSpec("ページ分析", "page_analysis"),
+        PageSpec("A/Bテスト分析", "ab_test"),
+    ],
+    "詳細分析": [
+        PageSpec("広告分析", "ad_analysis"),
+        PageSpec("インタラクション分析", "interaction"),
+        PageSpec("動画・スクロール分析", "video_scroll"),
+        PageSpec("瞬フォーム分析", "form_analysis"),
+    ],
+    "ヘルプ": [
+        PageSpec("LPOの基礎知識", "lpo_basics", uses_dataset=False),
+        PageSpec("専門用語解説", "glossary", uses_dataset=False),
+        PageSpec("FAQ", "faq", uses_dataset=False),
+    ],
+}
+
+# ページタイトル → PageSpec
+PAGES = {page.title: page for pages in MENU_GROUPS.values() for page in pages}
+
+
+def load_page(page: PageSpec):
+    """ページのモジュールを返す（初回だけ import する）"""
+    return importlib.import_module(f"{__name__}.{page.module}")
+
+
+# --- ページ遷移関数 ---
+def navigate_to(page_name):
+    """指定されたページに遷移する"""
+    try:
+        st.query_params["page"] = page_name
+    except AttributeError:
+        st.experimental_set_query_params(page=page_name)
@@ -0,0 +1,365 @@
+"""
+A/Bテスト分析: バリアント別のCVRと有意差、CVRの時系列推移
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from analytics import FilterSpec, ab_test_metrics
+from views.common import faq_panel, filter_events, get_row_cache
+
+
+def render(snapshot):
+    """A/Bテスト分析ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    filter_cols_1 = st.columns(4)
+    st.markdown('<div class="sub-header">A/Bテスト分析</div>', unsafe_allow_html=True)
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True)
+
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        # 期間選択
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="ab_test_period")
+
+    with filter_cols_1[1]:
+        # LP選択
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="ab_test_lp",
+            disabled=not lp_options
+        )
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="ab_test_device")
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="ab_test_user_type")
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="ab_test_conversion_status")
+    
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="ab_test_channel")
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="ab_test_source_medium") # ラベルは変更済み
+    
+    enable_comparison = False
+    # 期間設定
+    today = df['event_date'].max().date()
+    
+    if selected_period == "今日":
+        start_date = today
+        end_date = today
+    elif selected_period == "昨日":
+        start_date = today - timedelta(days=1)
+        end_date = today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date = today - timedelta(days=6)
+        end_date = today
+    elif selected_period == "過去14日間":
+        start_date = today - timedelta(days=13)
+        end_date = today
+    elif selected_period == "過去30日間":
+        start_date = today - timedelta(days=29)
+        end_date = today
+    elif selected_period == "今月":
+        start_date = today.replace(day=1)
+        end_date = today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = last_month_end.replace(day=1)
+        end_date = last_month_end
+    elif selected_period == "全期間":
+        start_date = df['event_date'].min().date()
+        end_date = df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="ab_test_start_date")
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="ab_test_end_date")
+
+    st.markdown("---")
+
+    # データフィルタリング（期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用）
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # 比較機能は無効化
+    comparison_df = None
+
+    # データが空の場合の処理
+    if filtered_df.empty:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+
+    # テスト種別×バリアント別の統計（バリアントAとのCVR差分と有意差を含む）と日別のCVR推移
+    ab_stats, cvr_data = ab_test_metrics(snapshot, filter_spec, get_row_cache())
+    ab_stats = ab_stats.rename(columns={
+        'ab_test_target': 'テスト種別',
+        'ab_variant': 'バリアント',
+        'sessions': 'セッション数',
+        'avg_stay_ms': '平均滞在時間(ms)',
+        'avg_page_reached': '平均到達ページ数',
+        'avg_completion_rate': '平均完了率',
+        'conversions': 'コンバージョン数',
+        'fv_retained': 'FV残存数',
+        'final_cta_reached': '最終CTA到達数',
+        'p_value': 'p値',
+        'conversion_rate': 'コンバージョン率',
+        'fv_retention_rate': 'FV残存率',
+        'final_cta_rate': '最終CTA到達率',
+        'cvr_diff': 'CVR差分(pt)',
+        'significance': '有意差',
+        'confidence': '有意性',  # バブルチャート用
+    })
+    ab_stats['平均滞在時間(秒)'] = ab_stats['平均滞在時間(ms)'] / 1000
+
+    # A/Bテスト比較
+    st.markdown("#### A/Bテスト比較")
+    st.markdown('<div class="graph-description">各バリアント（AとB）の主要な指標を比較し、どちらが優れているかを評価します。</div>', unsafe_allow_html=True)
+    display_cols = ['セッション数', 'コンバージョン率', 'CVR差分(pt)', '有意差', 'p値', 'FV残存率', '最終CTA到達率', '平均到達ページ数', '平均滞在時間(秒)'] # type: ignore
+    
+    # 'control' バリアントを除外して表示用のDataFrameを作成
+    ab_stats_for_display = ab_stats[ab_stats['バリアント'] != 'control'].copy()
+    
+    # バリアントBの行をハイライトする関数
+    def highlight_variant_b(row):
+        return ['background-color: #fffbe6'] * len(row) if row.name[1] == 'B' else [''] * len(row)
+
+    # マルチインデックスを設定して表示
+    display_df = ab_stats_for_display.set_index(['テスト種別', 'バリアント'])
+    if not display_df.empty:
+        st.dataframe(display_df[display_cols].style.format({
+            'セッション数': '{:,.0f}',
+            'コンバージョン率': '{:.2f}%',
+            'CVR差分(pt)': lambda x: f'{x:+.2f}pt' if pd.notna(x) and x != 0 else '---',
+            'p値': '{:.4f}',
+            'FV残存率': '{:.2f}%',
+            '最終CTA到達率': '{:.2f}%',
+            '平均到達ページ数': '{:.1f}',
+            '平均滞在時間(秒)': '{:.1f}'
+        }).apply(highlight_variant_b, axis=1), use_container_width=True)
+    else:
+        st.info("表示するA/Bテストのデータがありません。")
+    
+    # CVR向上率×有意性のバブルチャート
+    # 'control' バリアントを除外し、バリアント'B'のみを対象とする
+    ab_bubble = ab_stats[ab_stats['バリアント'] == 'B'].copy()
+
+    # チャートタイトルと説明 (プルダウンは削除)
+    st.markdown("#### CVR向上率×有意性バブルチャート")
+    st.markdown('<div class="graph-description">CVR差分（X軸）と有意性（Y軸）を可視化。バブルサイズはサンプルサイズを表します。右上（高CVR差分×高有意性）が最も優れたバリアントです。</div>', unsafe_allow_html=True)
+
+    if not ab_bubble.empty:
+        fig = px.scatter(ab_bubble, 
+                        x='CVR差分(pt)',
+                        y='有意性',
+                        size='セッション数',
+                        text='バリアント', # バブルに表示するテキスト
+                        color='テスト種別', # テスト種別で色分け
+                        custom_data=['テスト種別', 'コンバージョン率', 'p値', '有意差'] # hovertemplateで使用するデータを渡す
+                        )
+        
+        # 有意水準の参考線を追加
+        fig.add_hline(y=0.95, line_dash="dash", line_color="green", annotation_text="p<0.05 (★★)", annotation_position="bottom right")
+        fig.add_hline(y=0.99, line_dash="dash", line_color="red", annotation_text="p<0.01 (★★★)", annotation_position="bottom right") # type: ignore
+        fig.add_vline(x=0, line_dash="dash", line_color="gray")
+
+        # X軸の範囲を調整して、常にx=0の線が見えるようにする
+        x_min = ab_bubble['CVR差分(pt)'].min()
+        x_max = ab_bubble['CVR差分(pt)'].max()
+        range_x = [None, None]
+        if x_max < 0:
+            range_x[1] = 0.5 # 少し余白を持たせる
+        if x_min > 0:
+            range_x[0] = -0.5 # 少し余白を持たせる
+        # マウスオーバー時の表示内容とスタイルをカスタマイズ
+        fig.update_traces(
+            textposition='top center',
+            hovertemplate=(
+                "<b>%{text}</b><br>" +
+                "テスト種別: %{customdata[0]}<br>" +
+                "CVR差分(pt): %{x:+.2f}pt<br>" +
+                "有意性: %{y:.2f}<br>" +
+                "コンバージョン率: %{customdata[1]:.2f}%<br>" +
+                "p値: %{customdata[2]:.4f}<extra></extra>"
+            )
+        )
+        fig.update_layout(height=500,
+                         hoverlabel=dict(bordercolor='#002060'), # ホバーの枠線色
+                         xaxis_title='CVR差分 (pt)', dragmode=False,
+                         xaxis_range=range_x,
+                         yaxis_title='有意性 (1 - p値)',
+                         legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+        
+        # 背景色と注釈を追加
+        fig.add_shape(type="rect", xref="paper", yref="paper", x0=0.5, y0=0.5, x1=1, y1=1, fillcolor="rgba(0, 128, 0, 0.1)", layer="below", line_width=0)
+        fig.add_annotation(xref="paper", yref="paper", x=0.75, y=0.75, text="<b>最良ゾーン</b><br>CVR向上<br class='mobile-br'>有意差あり", showarrow=False, font=dict(color="green", size=14), align="center", xanchor="center", yanchor="middle")
+
+        fig.add_shape(type="rect", xref="paper", yref="paper", x0=0, y0=0.5, x1=0.5, y1=1, fillcolor="rgba(255, 0, 0, 0.1)", layer="below", line_width=0)
+        fig.add_annotation(xref="paper", yref="paper", x=0.25, y=0.75, text="<b>悪化ゾーン</b><br>CVR悪化<br class='mobile-br'>有意差あり", showarrow=False, font=dict(color="red", size=14), align="center", xanchor="center", yanchor="middle")
+
+        fig.add_shape(type="rect", xref="paper", yref="paper", x0=0.5, y0=0, x1=1, y1=0.5, fillcolor="rgba(255, 165, 0, 0.1)", layer="below", line_width=0)
+        fig.add_annotation(xref="paper", yref="paper", x=0.75, y=0.25, text="<b>有望ゾーン</b><br>CVR向上<br class='mobile-br'>有意差なし", showarrow=False, font=dict(color="orange", size=14), align="center", xanchor="center", yanchor="middle")
+
+        fig.add_shape(type="rect", xref="paper", yref="paper", x0=0, y0=0, x1=0.5, y1=0.5, fillcolor="rgba(128, 128, 128, 0.1)", layer="below", line_width=0)
+        fig.add_annotation(xref="paper", yref="paper", x=0.25, y=0.25, text="<b>判断保留ゾーン</b><br>CVR悪化<br class='mobile-br'>有意差なし", showarrow=False, font=dict(color="grey", size=14), align="center", xanchor="center", yanchor="middle")
+
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_ab_bubble')
+    else:
+        st.info("バブルチャートを表示するためのバリアント「B」のデータがありません。")
+        
+    # A/Bテスト時系列推移
+    st.markdown("#### A/Bテスト CVR 時系列推移")
+    st.markdown('<div class="graph-description">各A/Bテストのバリアントごとの日次のコンバージョン率（CVR）の推移を可視化します。</div>', unsafe_allow_html=True)
+
+    # テスト種別選択（テスト種別の切り替えはこのグラフだけを再実行する）
+    @st.fragment
+    def ab_cvr_timeseries_chart(cvr_data):
+        test_types = cvr_data['ab_test_target'].unique().tolist()
+
+        _, col2 = st.columns([5, 1])
+        with col2:
+            selected_test_type = st.selectbox('テスト種別を選択', test_types, key="ab_test_cvr_ts_select")
+
+        # グラフの作成
+        fig_cvr_timeseries = go.Figure()
+
+        # カラーパレット
+        color_map = {
+            'control': 'grey',
+            'A': 'blue',
+            'B': 'red'
+        }
+
+        filtered_cvr_data = cvr_data[cvr_data['ab_test_target'] == selected_test_type]
+
+        for test_type, group in filtered_cvr_data.groupby('ab_test_target', observed=True):
+            for variant in group['ab_variant'].unique():
+                variant_data = group[group['ab_variant'] == variant]
+                fig_cvr_timeseries.add_trace(go.Scatter(
+                    x=variant_data['event_date'],
+                    y=variant_data['cvr'],
+                    mode='lines+markers',
+                    name=f"{test_type} - {variant}",
+                    line=dict(color=color_map.get(variant, 'black'))
+                ))
+
+        fig_cvr_timeseries.update_layout(
+            xaxis_title="日付",
+            yaxis_title="コンバージョン率 (%)",
+            yaxis_ticksuffix="%",
+            legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5),
+            hovermode="x unified",
+            height=500,
+            dragmode=False
+        )
+        st.plotly_chart(fig_cvr_timeseries, use_container_width=True)
+
+    ab_cvr_timeseries_chart(cvr_data)
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">A/Bテストの結果に基づき、AIが統計的な評価と次のアクションを提案します。</div>', unsafe_allow_html=True)
+
+    # AI分析の表示状態を管理
+    if 'ab_test_ai_open' not in st.session_state:
+        st.session_state.ab_test_ai_open = False
+
+    if st.button("AI分析を実行", key="ab_test_ai_btn", type="primary", use_container_width=True):
+        st.session_state.ab_test_ai_open = True
+
+    if st.session_state.ab_test_ai_open:
+        with st.container():
+            with st.spinner("AIがA/Bテスト結果を分析中..."):
+                if not ab_stats.empty and len(ab_stats) >= 2:
+                    winner = ab_stats.sort_values('コンバージョン率', ascending=False).iloc[0]
+                    baseline = ab_stats.iloc[0]
+                    
+                    st.markdown("#### 1. テスト結果の評価")
+                    st.info(f"""
+                    今回のA/Bテストの結果、**「{winner['バリアント']}」** が最も高いパフォーマンスを示しました。
+                    - **勝者**: {winner['バリアント']} (CVR: {winner['コンバージョン率']:.2f}%)
+                    - **ベースライン**: {baseline['バリアント']} (CVR: {baseline['コンバージョン率']:.2f}%)
+                    - **CVR差分**: {winner['CVR差分(pt)']:.2f}pt
+                    - **統計的有意差**: {winner['有意差']} (p値: {winner['p値']:.4f})
+                    
+                    p値が0.05未満の場合、この結果が偶然である可能性は低く、信頼性が高いと判断できます。
+                    """)
+
+                    st.markdown("#### 2. 今後のアクション提案")
+                    st.warning(f"""
+                    **「{winner['バリアント']}」** のパターンを本採用することを強く推奨します。
+                    
+                    **次のステップ:**
+                    1. **勝者パターンの実装**: エンジニアリングチームと連携し、勝者パターン「{winner['バリアント']}」を全てのユーザーに適用してください。
+                    2. **効果測定**: 実装後、再度パフォーマンスをモニタリングし、期待通りの効果が出ているか確認します。
+                    3. **次のテスト計画**: 今回のテストで得られた知見（例：「{winner['バリアント']}」のどの要素が良かったか）を基に、さらなる改善のための新しいA/Bテストを計画しましょう。
+                    """)
+                else:
+                    st.warning("比較するバリアントが2つ未満のため、詳細な分析は実行できません。")
+            if st.button("AI分析を閉じる", key="ab_test_ai_close"):
+                st.session_state.ab_test_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    def answer_ab_winner():
+        if not ab_stats.empty:
+            winner = ab_stats.sort_values('コンバージョン率', ascending=False).iloc[0]
+            st.info(f"**「{winner['バリアント']}」** がCVR {winner['コンバージョン率']:.2f}%で最も良い結果でした。")
+
+    def answer_ab_reliability():
+        if not ab_stats.empty:
+            winner = ab_stats.sort_values('コンバージョン率', ascending=False).iloc[0]
+            if winner['p値'] < 0.05:
+                st.info(f"はい、信頼できる可能性が高いです。勝者バリアントのp値は{winner['p値']:.4f}であり、統計的有意差の基準である0.05を下回っています。")
+            else:
+                st.warning(f"まだ信頼できるとは言えません。p値が{winner['p値']:.4f}と0.05を上回っているため、この差が偶然である可能性を否定できません。もう少しテスト期間を延長してサンプルサイズを増やすことを推奨します。")
+
+    def answer_ab_next_test():
+        if not ab_stats.empty:
+            winner = ab_stats.sort_values('コンバージョン率', ascending=False).iloc[0]
+            st.info(f"今回の勝者「{winner['バリアント']}」の要素をベースに、さらに改善できる点をテストしましょう。例えば、CTAボタンの文言を変える、フォームの項目を減らす、などの新しい仮説でテストを計画するのが良いでしょう。")
+
+    faq_panel('ab_test_faq_toggle', [
+        ("どのバリアントが最も良かったですか？", "faq_ab_1", answer_ab_winner),
+        ("このテスト結果は信頼できますか？", "faq_ab_2", answer_ab_reliability),
+        ("p値とは何ですか？", "faq_ab_3",
+         "p値は「観測された差が偶然である確率」を示します。一般的にp値が0.05（5%）未満の場合、「統計的に有意な差がある」と判断し、その結果は信頼できると考えます。"),
+        ("次のA/Bテストは何をすべき？", "faq_ab_4", answer_ab_next_test),
+    ])
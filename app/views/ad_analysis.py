@@ -0,0 +1,293 @@
+"""
+広告分析: キャンペーン・広告コンテンツ別のパフォーマンス
+"""
+
+from datetime import timedelta
+
+import plotly.express as px
+import streamlit as st
+
+from analytics import FilterSpec, safe_rate, segment_metrics
+from views.common import count_sessions, faq_panel, option_caption
+
+
+def render(snapshot):
+    """広告分析ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    st.markdown('<div class="sub-header">広告分析</div>', unsafe_allow_html=True)
+
+    # --- ページ上部の共通フィルター ---
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True)
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="ad_analysis_period")
+
+    # 期間設定
+    today = df['event_date'].max().date()
+    if selected_period == "今日":
+        start_date, end_date = today, today
+    elif selected_period == "昨日":
+        start_date, end_date = today - timedelta(days=1), today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date, end_date = today - timedelta(days=6), today
+    elif selected_period == "過去14日間":
+        start_date, end_date = today - timedelta(days=13), today
+    elif selected_period == "過去30日間":
+        start_date, end_date = today - timedelta(days=29), today
+    elif selected_period == "今月":
+        start_date, end_date = today.replace(day=1), today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date, end_date = last_month_end.replace(day=1), last_month_end
+    elif selected_period == "全期間":
+        start_date, end_date = df['event_date'].min().date(), df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        c1, c2 = st.columns(2)
+        with c1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="ad_analysis_start")
+        with c2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="ad_analysis_end")
+
+    # ドロップダウンの件数は、期間とそれより前のドロップダウンで選んだ条件で絞り込んだセッション数
+    option_spec = FilterSpec(start_date, end_date)
+
+    with filter_cols_1[1]:
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="ad_analysis_lp",
+            disabled=not lp_options
+        )
+        st.caption(option_caption(snapshot, option_spec, 'page_location', lp_options))
+        option_spec = option_spec._replace(page_location=selected_lp)
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="ad_analysis_device")
+        st.caption(option_caption(snapshot, option_spec, 'device_type', device_options))
+        option_spec = option_spec._replace(device_type=selected_device)
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="ad_analysis_user_type")
+        st.caption(option_caption(snapshot, option_spec, 'user_type', user_type_options))
+        option_spec = option_spec._replace(user_type=selected_user_type)
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="ad_analysis_conversion_status")
+        st.caption(option_caption(snapshot, option_spec, 'conversion_status', conversion_status_options))
+        option_spec = option_spec._replace(conversion_status=selected_conversion_status)
+
+    with filter_cols_2[1]:
+        # 広告関連のチャネルのみを抽出
+        ad_channels = ['Paid Search', 'Paid Social', 'Paid Video', 'Display', 'Other']
+        channel_options = ["すべて"] + [ch for ch in df['channel'].unique() if ch in ad_channels]
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="ad_analysis_channel")
+        st.caption(option_caption(snapshot, option_spec, 'channel', channel_options))
+        option_spec = option_spec._replace(channel=selected_channel)
+
+    with filter_cols_2[2]:
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="ad_analysis_source_medium")
+        st.caption(option_caption(snapshot, option_spec, 'source_medium', source_medium_options))
+
+    # --- データフィルタリング ---
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+
+    # --- KPIカード（セッション数・CV数はビットマップインデックスの件数から求める） ---
+    total_sessions = count_sessions(snapshot, filter_spec)
+    total_conversions = count_sessions(snapshot, filter_spec, conversion_status="コンバージョン")
+    kpi_cols = st.columns(3)
+    kpi_cols[0].metric("セッション数", f"{total_sessions:,}")
+    kpi_cols[1].metric("CV数", f"{total_conversions:,}")
+    kpi_cols[2].metric("CVR", f"{safe_rate(total_conversions, total_sessions) * 100:.2f}%")
+
+    st.markdown("---")
+
+    # --- 分析対象の選択 ---
+    st.markdown('<div class="sub-header">分析軸の選択</div>', unsafe_allow_html=True)
+    st.markdown('<div class="graph-description">「キャンペーン別」または「広告コンテンツ別」にパフォーマンスを分析します。</div>', unsafe_allow_html=True)
+
+    analysis_target = st.radio(
+        "分析の切り口を選択してください",
+        ('キャンペーン別', '広告コンテンツ別'),
+        horizontal=True,
+        key="ad_analysis_target"
+    )
+
+    st.markdown("---") # type: ignore
+
+    # --- 分析テーブル表示 ---
+    if analysis_target == 'キャンペーン別':
+        st.markdown("#### キャンペーン別 パフォーマンス")
+        segment_col = 'utm_campaign'
+        segment_name = 'キャンペーン'
+    else:
+        st.markdown("#### 広告コンテンツ別 パフォーマンス")
+        segment_col = 'utm_content'
+        segment_name = '広告コンテンツ'
+
+    # セグメント別統計を計算（ロールアップキューブのセッション・CV・FV残存・最終CTA到達・エンゲージ（滞在時間30秒以上）を合計する）
+    segment_stats = segment_metrics(snapshot, filter_spec, segment_col).rename(columns={
+        segment_col: segment_name,
+        'sessions': 'セッション数',
+        'clicks': 'クリック数',
+        'avg_stay_ms': '平均滞在時間',
+        'avg_page_reached': '平均到達ページ',
+        'conversions': 'CV数',
+        'fv_retained': 'FV残存数',
+        'final_cta_reached': '最終CTA到達数',
+        'engaged': 'エンゲージセッション数',
+        'conversion_rate': 'CVR',
+        'click_rate': 'CTR',
+        'fv_retention_rate': 'FV残存率',
+        'final_cta_rate': '最終CTA到達率',
+        'engagement_rate': 'エンゲージメント率',
+    })
+
+    # データが空の場合の処理
+    if segment_stats.empty:
+        st.info("選択された条件に該当する広告データがありません。")
+        st.stop()
+
+    segment_stats['平均滞在時間'] = segment_stats['平均滞在時間'] / 1000
+
+    # テーブル表示
+    display_cols = [
+        segment_name, 'セッション数', 'CV数', 'CVR', 'クリック数', 'CTR', 
+        'FV残存率', '最終CTA到達率', '平均到達ページ', '平均滞在時間', 'エンゲージメント率'
+    ]
+    st.dataframe(segment_stats[display_cols].style.format({
+        'セッション数': '{:,.0f}', 'CV数': '{:,.0f}', 'CVR': '{:.2f}%',
+        'クリック数': '{:,.0f}', 'CTR': '{:.2f}%', 'FV残存率': '{:.2f}%',
+        '最終CTA到達率': '{:.2f}%', '平均到達ページ': '{:.1f}',
+        '平均滞在時間': '{:.1f}秒', 'エンゲージメント率': '{:.2f}%',
+    }), use_container_width=True, hide_index=True)
+    
+    # --- 指標選択（指標の切り替えはグラフ部分だけを再実行する） ---
+    @st.fragment
+    def segment_metric_charts(segment_stats, segment_name):
+        st.markdown("##### グラフに表示する指標を選択")
+        all_metrics = [
+            'セッション数', 'CV数', 'CVR', 'クリック数', 'CTR',
+            'FV残存率', '最終CTA到達率', '平均到達ページ', '平均滞在時間', 'エンゲージメント率'
+        ]
+        selected_metrics = st.multiselect(
+            "最大2つまで選択できます",
+            all_metrics,
+            default=['CVR', 'セッション数'],
+            max_selections=2,
+            label_visibility="collapsed"
+        )
+
+        # グラフ表示
+        if selected_metrics:
+            graph_cols = st.columns(len(selected_metrics))
+            for i, metric in enumerate(selected_metrics):
+                with graph_cols[i]:
+                    # 単位を決定
+                    unit = ''
+                    if '%' in metric or '率' in metric:
+                        unit = '%'
+                    elif '時間' in metric:
+                        unit = '秒'
+
+                    # グラフを作成
+                    fig = px.line(
+                        segment_stats,
+                        x=segment_name,
+                        y=metric,
+                        title=f'{segment_name}別{metric}',
+                        markers=True
+                    )
+                    fig.update_layout(dragmode=False, yaxis_title=metric)
+                    fig.update_traces(hovertemplate=f'%{{x}}<br>{metric}: %{{y:,.2f}}{unit}<extra></extra>')
+                    st.plotly_chart(fig, use_container_width=True, key=f'ad_analysis_chart_{i}')
+        else:
+            st.info("グラフを表示するには、上のプルダウンから少なくとも1つの指標を選択してください。")
+
+    segment_metric_charts(segment_stats, segment_name)
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">広告のキャンペーンやコンテンツ別のパフォーマンスに基づき、AIが現状の評価と改善のための考察を提示します。</div>', unsafe_allow_html=True)
+
+    # AI分析の表示状態を管理
+    if 'ad_analysis_ai_open' not in st.session_state:
+        st.session_state.ad_analysis_ai_open = False
+
+    if st.button("AI分析を実行", key="ad_analysis_ai_btn", type="primary", use_container_width=True):
+        st.session_state.ad_analysis_ai_open = True
+
+    if st.session_state.ad_analysis_ai_open:
+        with st.container():
+            with st.spinner("AIがセグメントデータを分析中..."):
+                if not segment_stats.empty and 'CVR' in segment_stats.columns:
+                    best_segment_row = segment_stats.loc[segment_stats['CVR'].idxmax()]
+                    worst_segment_row = segment_stats.loc[segment_stats['CVR'].idxmin()]
+                    best_segment = {'name': best_segment_row[segment_name], 'cvr': best_segment_row['CVR']}
+                    worst_segment = {'name': worst_segment_row[segment_name], 'cvr': worst_segment_row['CVR']}
+                else:
+                    best_segment, worst_segment = (None, None)
+                
+                st.markdown("#### 1. 現状の評価")
+                st.info(f"""
+                {analysis_target}では、パフォーマンスに顕著な差が見られます。
+                - **最もパフォーマンスが高いセグメント**: **{best_segment['name']}** (CVR: {best_segment['cvr']:.2f}%)
+                - **最もパフォーマンスが低いセグメント**: **{worst_segment['name']}** (CVR: {worst_segment['cvr']:.2f}%) # type: ignore
+                
+                特に **{worst_segment['name']}** のセグメントは、他のセグメントと比較してCVRが低く、改善の機会が大きい領域です。 # type: ignore
+                """)
+
+                st.markdown("#### 2. 今後の考察と改善案")
+                st.warning(f"""
+                **{worst_segment['name']}** セグメントのパフォーマンスが低い原因を特定し、対策を講じるべきです。 # type: ignore
+                - **{analysis_target}が「デバイス別」の場合**: {worst_segment['name']}での表示崩れや操作性の問題がないか確認が必要です。レスポンシブデザインの見直しや、読み込み速度の最適化を検討してください。
+                - **{analysis_target}が「チャネル別」の場合**: {worst_segment['name']}からの流入ユーザーとLPの訴求内容が一致していない可能性があります。広告のターゲティングやクリエイティブ、またはLPのファーストビューを見直してください。
+                
+                逆に、**{best_segment['name']}** は非常に効果的なセグメントです。このセグメントへの広告予算の増額や、類似ユーザーへのアプローチ拡大を検討する価値があります。
+                """)
+            if st.button("AI分析を閉じる", key="ad_analysis_ai_close"):
+                st.session_state.ad_analysis_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    def answer_best_segment():
+        if not segment_stats.empty and 'CVR' in segment_stats.columns:
+            best_segment = segment_stats.loc[segment_stats['CVR'].idxmax()]
+            st.info(f"**{best_segment[segment_name]}** です。コンバージョン率が **{best_segment['CVR']:.2f}%** と最も高いパフォーマンスを示しています。")
+
+    def answer_worst_segment():
+        if not segment_stats.empty and 'CVR' in segment_stats.columns:
+            worst_segment = segment_stats.loc[segment_stats['CVR'].idxmin()]
+            st.info(f"**{worst_segment[segment_name]}** のパフォーマンスが低い原因として、{analysis_target}が「デバイス別」なら「表示崩れや操作性の問題」、{analysis_target}が「チャネル別」なら「広告ターゲティングとLP内容のミスマッチ」などが考えられます。")
+
+    faq_panel('segment_faq_toggle', [
+        (f"パフォーマンスが最も良い{segment_name}は？", "faq_segment_1", answer_best_segment),
+        (f"パフォーマンスが最も悪い{segment_name}の原因は？", "faq_segment_2", answer_worst_segment),
+        ("パフォーマンスが良いセグメントに集中すべき？", "faq_segment_3",
+         "はい、短期的には最も効果的なアプローチです。パフォーマンスが良いセグメント（例：特定の広告チャネルやデバイス）への予算配分を増やすことで、全体のコンバージョン数を効率的に伸ばすことができます。"),
+        ("セグメント毎にLPを変えるべき？", "faq_segment_4",
+         "はい、中長期的には非常に有効な施策です。例えば、PCユーザーには詳細な情報を、スマホユーザーには要点を絞ったコンテンツを見せるなど、セグメントに合わせてLPをパーソナライズすることで、CVRの大幅な向上が期待できます。"),
+    ])
@@ -0,0 +1,162 @@
+"""
+アラート: 日別KPIの急変の検知
+"""
+
+import pandas as pd
+import streamlit as st
+
+from analytics.filters import ALL
+from views import navigate_to
+from views.common import current_alerts
+
+
+# 指標ごとの表示: 指標 -> (短い名前, 名前, (減ったとき, 増えたとき), (急に減ったとき, 急に増えたとき), 値の書式, 移動先ボタンの文言, 移動先のページ)
+ALERT_METRIC_LABELS = {
+    'cvr': ('CVR', 'コンバージョン率', ('低下', '上昇'), ('急落', '急上昇'), '{:.2%}', '時系列分析で確認', '時系列分析'),
+    'sessions': ('セッション', 'セッション数', ('減少', '増加'), ('急減', '急増'), '{:,.0f}', '全体サマリで確認', '全体サマリー'),
+    'fv_retention_rate': ('FV残存率', 'FV残存率', ('低下', '上昇'), ('急落', '急上昇'), '{:.2%}', 'ページ分析で確認', 'ページ分析'),
+    'final_cta_rate': ('最終CTA到達率', '最終CTA到達率', ('低下', '上昇'), ('急落', '急上昇'), '{:.2%}', 'ページ分析で確認', 'ページ分析'),
+    'avg_load_time_ms': ('読込時間', '平均読込時間', ('短縮', '増加'), ('大幅に短縮', '急増'), '{:,.0f}ms', 'ページ分析で確認', 'ページ分析'),
+}
+# 比較の種類ごとの表示: 比較 -> (説明文での表現, 基準値の名前)
+ALERT_COMPARISON_LABELS = {
+    'dod': ('前日比で', '前日'),
+    'vs_ma7': ('過去7日間平均より', '過去7日平均'),
+}
+# セグメントの切り口の表示名
+ALERT_SEGMENT_LABELS = {'device_type': 'デバイス', 'channel': 'チャネル', 'page_location': 'LP'}
+LEVEL_LABELS = {'high': '高', 'medium': '中'}
+
+
+def alert_message(alert):
+    """analytics.evaluate_alerts の1行を表示用の辞書にする"""
+    short, name, changes, sharp_changes, value_format, action, page = ALERT_METRIC_LABELS[alert['metric']]
+    phrase, baseline = ALERT_COMPARISON_LABELS[alert['comparison']]
+    increased = int(alert['change'] > 0)
+    if alert['level'] == 'high':
+        title = f"{short}が{sharp_changes[increased]}"
+        description = f"{name}が{phrase} {abs(alert['change']):.1%} 大幅に{changes[increased]}しました。"
+    else:
+        title = f"{short}が{changes[increased]}"
+        description = f"{name}が{phrase} {abs(alert['change']):.1%} {changes[increased]}しています。"
+    return {
+        'level': alert['level'], 'title': title,
+        'description': f"**{description}**",
+        'details': f"{baseline}: {value_format.format(alert['baseline'])}, 当日: {value_format.format(alert['current'])}",
+        'action': action, 'page': page,
+        'key': f"alert_{alert['level']}_{alert['metric']}_{alert['comparison']}",
+    }
+
+
+def segment_label(alert):
+    """セグメントの切り口の値を「 / 」でつないだ表示名"""
+    return " / ".join(str(alert[dim]) for dim in ALERT_SEGMENT_LABELS if alert.get(dim, ALL) != ALL)
+
+
+def render(snapshot):
+    """アラートページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    st.markdown('<div class="sub-header">アラート</div>', unsafe_allow_html=True)
+    st.markdown('<div class="graph-description">主要指標の急な変化や異常を自動で検知し、お知らせします。この分析は、日次の全体パフォーマンスに基づいています。</div>', unsafe_allow_html=True)
+
+    # --- デモ用アラート（高） ---
+    st.markdown("#### 重要度：高")
+    with st.container():
+        col1, col2, col3 = st.columns([1, 4, 1.5])
+        with col1:
+            st.error("CVRが急落")
+        with col2:
+            st.markdown("**【デモ】コンバージョン率が前日比で 55.2% 大幅に低下しました。**")
+            st.markdown(f"<small>前日: 3.50%, 本日: 1.57%</small>", unsafe_allow_html=True)
+        with col3:
+            st.button("時系列分析で確認", key=f"alert_demo_cvr", use_container_width=True, on_click=navigate_to, args=('時系列分析',))
+    with st.container():
+        col1, col2, col3 = st.columns([1, 4, 1.5])
+        with col1:
+            st.error("セッションが急減")
+        with col2:
+            st.markdown("**【デモ】セッション数が前日比で 60.1% 大幅に減少しました。**")
+            st.markdown(f"<small>前日: 1,250, 本日: 498</small>", unsafe_allow_html=True)
+        with col3:
+            st.button("全体サマリで確認", key=f"alert_demo_session", use_container_width=True, on_click=navigate_to, args=('全体サマリー',))
+    st.markdown("---")
+
+    # --- デモ用アラート（中） ---
+    st.markdown("#### 重要度：中")
+    with st.container():
+        col1, col2, col3 = st.columns([1, 4, 1.5])
+        with col1:
+            st.warning("CVRが低下（モバイル）")
+        with col2:
+            st.markdown("**【デモ】モバイルデバイスのコンバージョン率が過去7日間平均より 35.8% 低下しています。**")
+            st.markdown(f"<small>過去7日平均: 2.85%, 本日: 1.83%</small>", unsafe_allow_html=True)
+        with col3:
+            st.button("デモグラフィック情報で確認", key=f"alert_demo_mobile_cvr", use_container_width=True, on_click=navigate_to, args=('デモグラフィック情報',))
+    with st.container():
+        col1, col2, col3 = st.columns([1, 4, 1.5])
+        with col1:
+            st.warning("流入が減少（SNS）")
+        with col2:
+            st.markdown("**【デモ】Organic Socialチャネルからの流入が過去7日間平均より 42.0% 減少しています。**")
+            st.markdown(f"<small>過去7日平均: 350セッション/日, 本日: 203セッション</small>", unsafe_allow_html=True)
+        with col3:
+            st.button("広告分析で確認", key=f"alert_demo_social_inflow", use_container_width=True, on_click=navigate_to, args=('広告分析',))
+    st.markdown("---")
+    # --- デモ用アラートここまで ---
+
+    # BigQueryのv_alertsビューと同様の計算（日次KPIの前日比・7日移動平均比）で全体と各セグメントの急変を検知した結果は、
+    # バックグラウンドのスケジューラーがデータの更新ごとに完了した日の分を保存しているので、ここでは評価済みの最新日の分を読むだけ
+    detected = current_alerts()
+
+    if detected is not None:
+        is_total = (detected[list(ALERT_SEGMENT_LABELS)] == ALL).all(axis=1)
+        alerts = [alert_message(alert) for alert in detected[is_total].to_dict('records')]
+
+        # アラートを表示
+        high_alerts = [a for a in alerts if a['level'] == 'high']
+        medium_alerts = [a for a in alerts if a['level'] == 'medium']
+
+        # デモ専用なので、実績値アラートがない場合のメッセージは不要
+
+        if high_alerts:
+            st.markdown("#### 重要度：高（実績値）")
+            for alert in high_alerts:
+                with st.container(): # type: ignore
+                    col1, col2, col3 = st.columns([1, 4, 1.5])
+                    with col2:
+                        st.markdown(alert['description'])
+                        st.markdown(f"<small>{alert['details']}</small>", unsafe_allow_html=True)
+                    with col3:
+                        st.button(alert['action'], key=alert['key'], use_container_width=True, on_click=navigate_to, args=(alert['page'],))
+            st.markdown("---")
+
+        if medium_alerts: # type: ignore
+            st.markdown("#### 重要度：中（実績値）")
+            for alert in medium_alerts:
+                with st.container(): # type: ignore
+                    col1, col2, col3 = st.columns([1, 4, 1.5])
+                    with col2:
+                        st.markdown(alert['description'])
+                        st.markdown(f"<small>{alert['details']}</small>", unsafe_allow_html=True)
+                    with col3:
+                        st.button(alert['action'], key=alert['key'], use_container_width=True, on_click=navigate_to, args=(alert['page'],))
+            st.markdown("---")
+
+        # セグメント（デバイス・チャネル・LPとその組み合わせ）ごとのアラートは一覧で表示する
+        segment_alerts = detected[~is_total].to_dict('records')
+        if segment_alerts:
+            st.markdown("#### セグメント別（実績値）")
+            rows = []
+            for alert in segment_alerts:
+                message = alert_message(alert)
+                rows.append({
+                    '重要度': LEVEL_LABELS.get(alert['level'], alert['level']),
+                    'セグメント': segment_label(alert),
+                    'アラート': message['title'],
+                    '内容': message['description'].strip('*'),
+                    '値': message['details'],
+                })
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+            st.markdown("---")
+
+    else: # type: ignore
+        st.info("アラートを生成するための十分なデータがありません（最低8日分のデータが必要です）。")
@@ -0,0 +1,252 @@
+"""
+分析ページで共有するデータアクセスと表示部品
+データセットのスナップショット（サーバープロセスで共有）の読み込み・更新、フィルター結果とKPIのキャッシュ、
+比較期間の計算、よくある質問のパネルなど、複数のページから使うものをまとめる。
+データを使わないページ（ヘルプ）はこのモジュールを import しない
+"""
+
+import os
+from datetime import timedelta
+
+import streamlit as st
+
+from analytics import (
+    LRUCache,
+    RealtimeWindow,
+    SnapshotRefresher,
+    count_rows,
+    kpi_metrics,
+    option_counts,
+    select_cube,
+    select_events,
+    select_sessions,
+)
+from analytics.alert_scheduler import ALERT_STORE_DIR, AlertScheduler, AlertStore, FileSink, WebhookSink
+from analytics.datasource import BIGQUERY_DATASET_DIR, DUMMY_DATA_PATH, DUMMY_DATASET_DIR, DataSource
+from analytics.filters import ALL
+
+# 各ページで使う列（それ以外の列はParquetから読み込まない）
+EVENT_COLUMNS = [
+    'event_date', 'event_timestamp', 'event_name', 'user_pseudo_id', 'ga_session_number',
+    'session_id', 'page_location', 'page_referrer', 'page_path', 'page_num_dom',
+    'stay_ms', 'load_time_ms', 'max_page_reached', 'completion_rate', 'elem_classes',
+    'scroll_pct', 'utm_source', 'utm_medium', 'utm_campaign', 'utm_content',
+    'device_type', 'direction', 'video_src', 'ab_variant', 'ab_test_target', 'cv_type', 'p_value',
+]
+
+# BigQueryのイベントテーブル（"project.dataset.table"）。設定されている場合はダミーデータの代わりに使う
+BIGQUERY_EVENTS_TABLE = os.environ.get("BIGQUERY_EVENTS_TABLE")
+# BigQueryへの差分取得の間隔（秒）
+BIGQUERY_SYNC_TTL = 3600
+# イベントコレクター（python -m analytics.collector）の書き出し先。設定されている場合はダミーデータの代わりに使う
+COLLECTOR_DATASET_DIR = os.environ.get("COLLECTOR_DATASET_DIR")
+# イベントコレクターの書き出しを確認する間隔（秒）
+COLLECTOR_CHECK_INTERVAL = 10
+# ダミーデータ（CSV）の更新を確認する間隔（秒）
+DATA_CHECK_INTERVAL = 60
+# "1" の場合、ユニークユーザー数をHyperLogLogの推定値ではなくセッションファクトの nunique で正確に数える（低速）
+EXACT_DISTINCT_COUNTS = os.environ.get("EXACT_DISTINCT_COUNTS") == "1"
+# アラートの通知先のWebhook。未設定の場合は ALERT_STORE_DIR/outbox.jsonl に追記する
+ALERT_WEBHOOK_URL = os.environ.get("ALERT_WEBHOOK_URL")
+# "1" の場合、アラートの評価は別プロセスのワーカー（python -m analytics.alert_scheduler）が行い、ダッシュボードは保存済みのアラートを読むだけにする
+ALERT_WORKER = os.environ.get("ALERT_WORKER") == "1"
+
+# イベントデータの取得元（BigQuery・イベントコレクター・ダミーデータの順に、設定されているものを使う）
+DATA_SOURCE = DataSource(
+    DUMMY_DATA_PATH, DUMMY_DATASET_DIR,
+    bigquery_table=BIGQUERY_EVENTS_TABLE,
+    bigquery_dir=BIGQUERY_DATASET_DIR,
+    collector_dir=COLLECTOR_DATASET_DIR,
+    columns=tuple(EVENT_COLUMNS),
+)
+
+def data_fingerprint():
+    """データの更新を検知するためのキー（DataSource.fingerprint の戻り値）"""
+    return DATA_SOURCE.fingerprint()
+
+def load_data():
+    """イベントデータを読み込む（DataSource.load の戻り値）"""
+    return DATA_SOURCE.load()
+
+def build_dataset_snapshot(fingerprint, previous):
+    """
+    分析用データ（派生列付与済み）・セッションファクト・ロールアップキューブ・日付インデックスをまとめて作る
+    BigQuery・イベントコレクターのデータは追記のみなので、ロールアップキューブは前のスナップショットの最終日付近だけを集計し直す
+    """
+    return DATA_SOURCE.build(fingerprint, previous)
+
+# データセットはサーバープロセスで1つだけ持ち、全セッションで共有する（セッションごとの複製は作らない）。
+# 更新の確認と次のバージョンの組み立てはバックグラウンドのスレッドで行い、できあがったら参照を差し替えるので、
+# 利用者の操作で再集計を待つことはない（初回の読み込みのみ最初に分析ページを開いたときに行う）。
+# 共有データは読み取り専用として扱い、各ページはフィルター結果や assign で作った新しいDataFrameにだけ列を追加する。
+# Copy-on-Write はエントリーポイント（swipe_v2.py）で有効にしているので、共有データのスライスや列の参照に書き込んでも元のデータは変わらない。
+@st.cache_resource(show_spinner="データを読み込んでいます...")
+def get_snapshot_refresher():
+    """データセットのスナップショットを保持・更新するオブジェクト（サーバープロセスで共有）"""
+    if BIGQUERY_EVENTS_TABLE:
+        interval = BIGQUERY_SYNC_TTL
+    elif COLLECTOR_DATASET_DIR:
+        interval = COLLECTOR_CHECK_INTERVAL
+    else:
+        interval = DATA_CHECK_INTERVAL
+    return SnapshotRefresher(data_fingerprint, build_dataset_snapshot, interval).start()
+
+@st.cache_resource
+def get_row_cache():
+    """
+    フィルター条件に一致する行位置のキャッシュ（サーバープロセスで共有）
+    キーは (スナップショットのバージョン, テーブル名, FilterSpec) なので、同じ条件ならページをまたいで再利用され、
+    データが更新されると古い結果は使われない
+    """
+    return LRUCache(max_entries=256, max_bytes=256 << 20)
+
+@st.cache_resource
+def get_kpi_cache():
+    """フィルター条件ごとのKPIのキャッシュ（サーバープロセスで共有）"""
+    return LRUCache(max_entries=1024, max_bytes=16 << 20)
+
+@st.cache_resource
+def get_realtime_window():
+    """
+    リアルタイムビューの直近数時間の1分ごとの集計（サーバープロセスで共有）
+    表示のたびにスナップショットの新しいイベントだけを加える
+    """
+    return RealtimeWindow()
+
+def current_snapshot():
+    """
+    現在のデータセットのスナップショット
+    再実行の開始時に1回だけ取得してページに渡し、その再実行の間はそれだけを使う
+    （途中で新しいスナップショットに差し替わっても、表示中のページのデータは混ざらない）。
+    user_type / conversion_status / channel / source_medium などの派生列は analytics.enrich_events で付与済み。
+    ALERT_WORKER でなければ、データの読み込みと一緒にアラートのスケジューラーも開始する
+    （どのページを開いても、アラートページを開かなくてもバックグラウンドで評価・通知する）
+    """
+    refresher = get_snapshot_refresher()
+    if not ALERT_WORKER:
+        get_alert_scheduler()
+    return refresher.snapshot
+
+@st.cache_resource
+def get_alert_scheduler():
+    """
+    アラートを評価して ALERT_STORE_DIR に保存・通知するスケジューラー（サーバープロセスで共有）
+    データの新しいバージョンごとに、前回評価した日以降だけをバックグラウンドのスレッドで評価する
+    """
+    refresher = get_snapshot_refresher()
+    sink = WebhookSink(ALERT_WEBHOOK_URL) if ALERT_WEBHOOK_URL else FileSink(os.path.join(ALERT_STORE_DIR, "outbox.jsonl"))
+    return AlertScheduler(lambda: refresher.snapshot, AlertStore(ALERT_STORE_DIR), sink, refresher.interval).start()
+
+def current_alerts():
+    """
+    保存済みの最新日のアラート（AlertStore.latest の戻り値）
+    ALERT_WORKER でなければ、まだ開始していない場合はこのプロセスのスケジューラーを開始する（最初の評価が終わるまで待つ）
+    """
+    if not ALERT_WORKER:
+        get_alert_scheduler()
+    return AlertStore(ALERT_STORE_DIR).latest()
+
+def filter_events(snapshot, spec):
+    """共通フィルターを適用したイベントデータ"""
+    return select_events(snapshot, spec, get_row_cache())
+
+def filter_sessions(snapshot, spec):
+    """共通フィルターを適用したセッションファクト（KPIカードとブレークダウンはこちらを集計する）"""
+    return select_sessions(snapshot, spec, get_row_cache())
+
+def filter_cube(snapshot, spec):
+    """
+    共通フィルターに一致するロールアップキューブの行
+    （KPI・日別・属性別の集計用。時間帯や完了率などキューブにない指標はファクト・イベントから計算する）
+    """
+    return select_cube(snapshot, spec)
+
+def get_kpis(snapshot, spec):
+    """
+    フィルター条件（期間を含む）のKPIをロールアップキューブの合計から返す
+    (スナップショットのバージョン, FilterSpec) ごとにキャッシュするため、同じ条件の再表示や比較の切り替えは再計算しない
+    戻り値の辞書はキャッシュと共有しているので変更しないこと
+    """
+    return kpi_metrics(snapshot, spec, get_kpi_cache())
+
+def count_sessions(snapshot, spec, **selections):
+    """
+    フィルター条件に一致するセッション数（ビットマップインデックスで数えるので、データを取り出さない）
+    selections で条件を重ねられる（例: conversion_status="コンバージョン" でCV数）
+    """
+    return count_rows(snapshot, 'sessions', spec, **selections)
+
+def count_events(snapshot, spec):
+    """フィルター条件に一致するイベント数（ビットマップインデックスで数えるので、データを取り出さない）"""
+    return count_rows(snapshot, 'events', spec)
+
+def option_caption(snapshot, spec, column, options):
+    """
+    ドロップダウンの選択肢ごとのセッション数（ドロップダウンの下に st.caption で表示する）
+    spec（期間と、これより前のドロップダウンで選んだ条件）で絞り込んだ件数を表示する。"すべて" は column で絞り込まない件数。
+    selectbox はラベル（format_func の戻り値）からウィジェットのIDを作るので、件数はラベルに入れない
+    （件数が変わるたびに別のウィジェットになり、選択が "すべて" に戻ってしまう）
+    """
+    counts = option_counts(snapshot, spec, column)
+    total = count_sessions(snapshot, spec._replace(**{column: None}))
+    return "、".join(f"{value}（{total if value == ALL else counts.get(value, 0):,}）" for value in options)
+
+# 比較期間を求める関数
+def get_comparison_period(current_start, current_end, comparison_type):
+    """
+    比較期間の (開始日, 終了日) を取得（データは比較期間を指定した FilterSpec で取り出す）
+    comparison_type: 'previous_period', 'previous_week', 'previous_month', 'previous_year'
+    """
+    period_length_days = (current_end - current_start).days + 1 # 両端含む日数
+
+    if comparison_type == 'previous_period':
+        comp_end = current_start - timedelta(days=1)
+        comp_start = comp_end - timedelta(days=period_length_days - 1)
+    elif comparison_type == 'previous_week':
+        comp_end = current_end - timedelta(weeks=1)
+        comp_start = current_start - timedelta(weeks=1)
+    elif comparison_type == 'previous_month':
+        comp_end = current_end - timedelta(days=30)
+        comp_start = current_start - timedelta(days=30)
+    elif comparison_type == 'previous_year':
+        comp_end = current_end - timedelta(days=365)
+        comp_start = current_start - timedelta(days=365)
+    else:
+        return None
+
+    return comp_start, comp_end
+
+def toggle_faq(state_key, number):
+    """FAQの回答 number の表示を切り替え、ほかの回答は閉じる"""
+    toggle = st.session_state[state_key]
+    opened = not toggle.get(number, False)
+    for other in toggle:
+        toggle[other] = False
+    toggle[number] = opened
+
+@st.fragment
+def faq_panel(state_key, items):
+    """
+    「このページの分析について質問する」のFAQパネル
+    fragment なので、質問ボタンを押してもページ全体ではなくこのパネルだけが再実行される
+
+    Args:
+        state_key: 開閉状態（{番号: 表示中か}）を保存する st.session_state のキー
+        items: (質問, ボタンのkey, 回答) のリスト。1番目から順に左右の列へ交互に並べる。
+            回答は st.info で表示する文字列、(st.warning などの表示関数, 文字列) のタプル、
+            または回答を表示する引数なしの関数（データによって表示が変わる場合。開いたときだけ呼ぶ）。None なら表示しない
+    """
+    if state_key not in st.session_state:
+        st.session_state[state_key] = {number: False for number in range(1, len(items) + 1)}
+
+    faq_cols = st.columns(2)
+    for number, (question, key, answer) in enumerate(items, start=1):
+        with faq_cols[(number - 1) % 2]:
+            st.button(question, key=key, use_container_width=True, on_click=toggle_faq, args=(state_key, number))
+            if not st.session_state[state_key].get(number, False) or answer is None:
+                continue
+            if callable(answer):
+                answer()
+            else:
+                show, text = answer if isinstance(answer, tuple) else (st.info, answer)
+                show(text)
@@ -0,0 +1,370 @@
+"""
+デモグラフィック情報: 年齢・性別・地域別のパフォーマンス
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from analytics import FilterSpec, add_rates
+from views.common import count_events, count_sessions, faq_panel, filter_events, option_caption
+
+
+def render(snapshot):
+    """デモグラフィック情報ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    filter_cols_1 = st.columns(4)
+    st.markdown('<div class="sub-header">デモグラフィック情報</div>', unsafe_allow_html=True)
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True) # type: ignore
+
+    # --- フィルター設定 ---
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        period_options = {"過去7日間": 7, "過去30日間": 30, "過去90日間": 90, "カスタム期間": None}
+        selected_period = st.selectbox("期間を選択", list(period_options.keys()), index=1, key="demographic_period")
+
+    enable_comparison = False
+
+    # カスタム期間の場合
+    if selected_period == "カスタム期間":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="demographic_start_date")
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="demographic_end_date")
+    else:
+        days = period_options[selected_period]
+        end_date = df['event_date'].max()
+        start_date = end_date - timedelta(days=days)
+
+    # ドロップダウンの件数は、期間とそれより前のドロップダウンで選んだ条件で絞り込んだセッション数
+    option_spec = FilterSpec(start_date, end_date)
+
+    with filter_cols_1[1]:
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="demographic_lp",
+            disabled=not lp_options
+        )
+        st.caption(option_caption(snapshot, option_spec, 'page_location', lp_options))
+        option_spec = option_spec._replace(page_location=selected_lp)
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="demographic_device")
+        st.caption(option_caption(snapshot, option_spec, 'device_type', device_options))
+        option_spec = option_spec._replace(device_type=selected_device)
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="demographic_user_type")
+        st.caption(option_caption(snapshot, option_spec, 'user_type', user_type_options))
+        option_spec = option_spec._replace(user_type=selected_user_type)
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="demographic_conversion_status")
+        st.caption(option_caption(snapshot, option_spec, 'conversion_status', conversion_status_options))
+        option_spec = option_spec._replace(conversion_status=selected_conversion_status)
+
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="demographic_channel")
+        st.caption(option_caption(snapshot, option_spec, 'channel', channel_options))
+        option_spec = option_spec._replace(channel=selected_channel)
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="demographic_source_medium") # ラベルは変更済み
+        st.caption(option_caption(snapshot, option_spec, 'source_medium', source_medium_options))
+
+    st.markdown("---")
+
+    # データフィルタリング（期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用）
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+
+    # 比較機能は無効化
+    comparison_df = None
+
+    # データが空の場合の処理（ビットマップインデックスの件数で判定し、空ならイベントを取り出さない）
+    if count_events(snapshot, filter_spec) == 0:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # このページで必要なKPIを計算（セッション数はビットマップインデックスの件数）
+    total_sessions = count_sessions(snapshot, filter_spec)
+
+    st.markdown("ユーザーの属性情報（年齢、性別、地域、デバイス）を分析します。")
+
+    # 年齢層別分析
+    with st.expander("年齢層別分析", expanded=False):
+        st.markdown('<div class="graph-description">年齢層ごとのセッション数、コンバージョン率、平均滞在時間を表示します。</div>', unsafe_allow_html=True)
+        # 年齢層のダミーデータを 'age_group' 列として追加（BigQueryに実データがあればこの処理は不要）
+        if 'age_group' not in filtered_df.columns:
+            age_bins = [18, 25, 35, 45, 55, 65, 100]
+            age_labels = ['18-24', '25-34', '35-44', '45-54', '55-64', '65+']
+            # 'age' 列がない場合はダミーの年齢を生成
+            if 'age' not in filtered_df.columns:
+                filtered_df['age'] = np.random.randint(18, 80, size=len(filtered_df))
+            filtered_df['age_group'] = pd.cut(filtered_df['age'], bins=age_bins, labels=age_labels, right=False)
+
+        # 年齢層別に集計
+        age_sessions = filtered_df.groupby('age_group')['session_id'].nunique()
+        age_cv = filtered_df[filtered_df['cv_type'].notna()].groupby('age_group')['session_id'].nunique()
+        age_stay = filtered_df.groupby('age_group')['stay_ms'].mean() / 1000
+
+        age_demo_df = pd.DataFrame({ # type: ignore
+            'セッション数': age_sessions,
+            'CV数': age_cv,
+            '平均滞在時間 (秒)': age_stay
+        }).fillna(0).reset_index().rename(columns={'age_group': '年齢層'}) # type: ignore
+        add_rates(age_demo_df, {'CVR (%)': ('CV数', 'セッション数')})
+
+        st.dataframe(age_demo_df.style.format({
+            'セッション数': '{:,.0f}',
+            'CV数': '{:,.0f}',
+            'CVR (%)': '{:.1f}%',
+            '平均滞在時間 (秒)': '{:.1f}'
+        }), use_container_width=True, hide_index=True)
+
+        fig = px.bar(age_demo_df, x='年齢層', y='CVR (%)', text='CVR (%)')
+        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        fig.update_layout(height=400, showlegend=False, xaxis_title='年齢層', yaxis_title='CVR (%)', dragmode=False)
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_age_cvr')
+
+    with st.expander("性別分析", expanded=False):
+        st.markdown('<div class="graph-description">性別ごとのセッション数、コンバージョン率、平均滞在時間を表示します。</div>', unsafe_allow_html=True)
+        # 性別のダミーデータを 'gender' 列として追加（BigQueryに実データがあればこの処理は不要）
+        if 'gender' not in filtered_df.columns:
+            filtered_df['gender'] = np.random.choice(['男性', '女性', 'その他/未回答'], size=len(filtered_df), p=[0.52, 0.45, 0.03])
+
+        # 性別で集計
+        gender_sessions = filtered_df.groupby('gender', observed=True)['session_id'].nunique()
+        gender_cv = filtered_df[filtered_df['cv_type'].notna()].groupby('gender', observed=True)['session_id'].nunique()
+        gender_stay = filtered_df.groupby('gender', observed=True)['stay_ms'].mean() / 1000
+
+        gender_demo_df = pd.DataFrame({ # type: ignore
+            'セッション数': gender_sessions,
+            'CV数': gender_cv,
+            '平均滞在時間 (秒)': gender_stay
+        }).fillna(0).reset_index().rename(columns={'gender': '性別'}) # type: ignore
+        add_rates(gender_demo_df, {'CVR (%)': ('CV数', 'セッション数')})
+
+        st.dataframe(gender_demo_df.style.format({
+            'セッション数': '{:,.0f}',
+            'CV数': '{:,.0f}',
+            'CVR (%)': '{:.1f}%',
+            '平均滞在時間 (秒)': '{:.1f}'
+        }), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.pie(gender_demo_df, values='セッション数', names='性別', title='性別割合')
+            fig.update_layout(height=400, dragmode=False)
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_gender_pie')
+        with col2:
+            fig = px.bar(gender_demo_df, x='性別', y='CVR (%)', text='CVR (%)')
+            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+            fig.update_layout(height=400, showlegend=False, xaxis_title='性別', yaxis_title='CVR (%)', dragmode=False)
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_gender_cvr')
+    
+    # 地域別分析
+    with st.expander("地域別分析", expanded=False):
+        st.markdown('<div class="graph-description">都道府県ごとのセッション数、コンバージョン率を表示します。</div>', unsafe_allow_html=True)
+        
+        # 地域別ダミーデータ（サマリー表用） - これはBigQueryに地域データがない場合の代替として残します
+        # BigQueryに地域データがある場合は、以下も動的生成に切り替えます
+        region_demo_data = {
+            '地域': ['東京都', '大阪府', '神奈川県', '愛知県', '福岡県', '北海道', 'その他'],
+            'セッション数': [int(total_sessions * 0.25), int(total_sessions * 0.15), int(total_sessions * 0.10), int(total_sessions * 0.08), int(total_sessions * 0.07), int(total_sessions * 0.06), int(total_sessions * 0.29)],
+            'CVR (%)': [3.8, 3.5, 3.2, 3.1, 3.4, 2.9, 3.0]
+        }
+        region_demo_df = pd.DataFrame(region_demo_data)
+        st.dataframe(region_demo_df.style.format({
+            'セッション数': '{:,.0f}',
+            'CVR (%)': '{:.1f}'
+        }), use_container_width=True, hide_index=True)
+
+        st.markdown("---")
+        st.markdown("##### 都道府県別 CVRマップ")
+
+        # GeoJSONデータを読み込む
+        try:
+            geojson_url = "https://raw.githubusercontent.com/dataofjapan/land/master/japan.geojson"
+            import json
+            import requests
+            
+            @st.cache_data
+            def get_geojson():
+                res = requests.get(geojson_url)
+                return res.json()
+
+            japan_geojson = get_geojson()
+
+            # GeoJSONの各featureに、キーとして使える都道府県名（'東京', '大阪'など）を追加
+            for feature in japan_geojson["features"]:
+                pref_name_full = feature["properties"]["nam_ja"]
+                # '北海道'はそのまま、他は'都','府','県'を削除
+                feature["properties"]["pref_key"] = pref_name_full if pref_name_full == '北海道' else pref_name_full[:-1]
+
+            # 表示用データフレームにもキー列を追加
+            region_demo_df_for_map = region_demo_df.copy()
+            region_demo_df_for_map['pref_key'] = region_demo_df_for_map['地域'].apply(
+                lambda x: x if x == '北海道' else x[:-1] if x not in ['その他'] else 'その他'
+            )
+
+            # 地図用のデータフレームを作成
+            map_df = pd.DataFrame({
+                'pref_key': [f["properties"]["pref_key"] for f in japan_geojson["features"]]
+            })
+
+            # CVRデータをマージ
+            map_df = map_df.merge(region_demo_df_for_map[['pref_key', 'CVR (%)']].rename(columns={'CVR (%)': 'コンバージョン率'}), on='pref_key', how='left')
+
+            # 表にない都道府県は 'その他' のCVRで埋める
+            other_cvr = region_demo_df[region_demo_df['地域'] == 'その他']['CVR (%)'].iloc[0]
+            map_df['コンバージョン率'] = map_df['コンバージョン率'].fillna(other_cvr)
+
+            # 地図を作成
+            fig_map = px.choropleth_mapbox(
+                map_df,
+                geojson=japan_geojson,
+                locations='pref_key', # locationsをキー列に変更
+                featureidkey="properties.pref_key", # featureidkeyをキー列に変更
+                color='コンバージョン率',
+                color_continuous_scale="Blues",
+                range_color=(map_df['コンバージョン率'].min(), map_df['コンバージョン率'].max()),
+                mapbox_style="carto-positron",
+                zoom=4.5,
+                center={"lat": 36.2048, "lon": 138.2529},
+                opacity=0.7,
+                labels={'コンバージョン率': 'CVR (%)'},
+                hover_name='pref_key' # ホバー時に都道府県名を表示
+            )
+            fig_map.update_layout(
+                margin={"r":0,"t":0,"l":0,"b":0},
+                height=600,
+                coloraxis_colorbar=dict(
+                    title="CVR (%)",
+                    tickvals=[map_df['コンバージョン率'].min(), map_df['コンバージョン率'].max()],
+                    ticktext=[f"{map_df['コンバージョン率'].min():.1f}%", f"{map_df['コンバージョン率'].max():.1f}%"]
+                )
+            )
+            
+            st.plotly_chart(fig_map, use_container_width=True)
+
+        except Exception as e:
+            st.error(f"地図の描画に失敗しました: {e}")
+    
+    # デバイス別分析
+    with st.expander("デバイス別分析", expanded=False):
+        st.markdown('<div class="graph-description">デバイスごとのセッション数、コンバージョン率、平均滞在時間を表示します。</div>', unsafe_allow_html=True)
+        # デバイス別に集計
+        device_sessions = filtered_df.groupby('device_type', observed=True)['session_id'].nunique()
+        device_cv = filtered_df[filtered_df['cv_type'].notna()].groupby('device_type', observed=True)['session_id'].nunique()
+        device_stay = filtered_df.groupby('device_type', observed=True)['stay_ms'].mean() / 1000
+
+        device_demo_df = pd.DataFrame({ # type: ignore
+            'セッション数': device_sessions,
+            'CV数': device_cv,
+            '平均滞在時間 (秒)': device_stay
+        }).fillna(0).reset_index().rename(columns={'device_type': 'デバイス'}) # type: ignore
+        add_rates(device_demo_df, {'CVR (%)': ('CV数', 'セッション数')})
+
+        st.dataframe(device_demo_df.style.format({
+            'セッション数': '{:,.0f}',
+            'CV数': '{:,.0f}',
+            'CVR (%)': '{:.1f}%',
+            '平均滞在時間 (秒)': '{:.1f}'
+        }), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.pie(device_demo_df, values='セッション数', names='デバイス', title='デバイス別セッション数')
+            fig.update_layout(height=400, dragmode=False)
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_device_pie')
+        with col2:
+            fig = px.bar(device_demo_df, x='デバイス', y='CVR (%)', text='CVR (%)')
+            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+            fig.update_layout(height=400, showlegend=False, xaxis_title='デバイス', yaxis_title='CVR (%)', dragmode=False)
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_device_cvr')
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">ユーザー属性（デモグラフィック）ごとの行動の違いを分析し、ターゲットユーザーの解像度を高めます。</div>', unsafe_allow_html=True)
+    
+    # AI分析の表示状態を管理
+    if 'demographic_ai_open' not in st.session_state:
+        st.session_state.demographic_ai_open = False
+
+    if st.button("AI分析を実行", key="demographic_ai_btn", type="primary", use_container_width=True):
+        st.session_state.demographic_ai_open = True
+
+    if st.session_state.demographic_ai_open:
+        with st.container():
+            with st.spinner("AIがデモグラフィックデータを分析中..."):
+                best_age_group = age_demo_df.loc[age_demo_df['CVR (%)'].idxmax()] if not age_demo_df.empty else {'年齢層': '不明', 'CVR (%)': 0}
+                
+                st.markdown("#### 1. 現状の評価")
+                st.info(f"""
+                ユーザー属性によって、LPに対する反応が異なることが分かります。
+                - **コアターゲット層**: **{best_age_group['年齢層']}** のCVRが{best_age_group['CVR (%)']:.1f}%と最も高く、このLPの主要なターゲット層であると考えられます。
+                - **性別差**: 性別によるCVRや滞在時間に大きな差がある場合、訴求するメッセージを男女で変えるなどの施策が有効かもしれません。
+                - **地域特性**: 特定の地域からのアクセスやCVRが高い場合、その地域に特化したキャンペーンや広告展開が効果的です。
+                """)
+
+                st.markdown("#### 2. 今後の考察と改善案")
+                st.warning(f"""
+                **ペルソナの深化とターゲティングの最適化:**
+                - **ペルソナの再定義**: 最もパフォーマンスの高い「{best_age_group['年齢層']}」のユーザーが、どのようなニーズや課題を持っているのかを深く分析し、LPのメッセージングをさらに最適化します。
+                - **広告ターゲティングの改善**: パフォーマンスの高い年齢層、性別、地域に広告予算を集中させることで、広告効率（CPA）の改善が期待できます。
+                - **コンテンツのパーソナライズ**: 将来的には、アクセスしてきたユーザーの属性に応じて、表示するコンテンツ（キャッチコピーや画像）を動的に変更することで、さらなるCVR向上が見込めます。
+                """)
+            if st.button("AI分析を閉じる", key="demographic_ai_close"):
+                st.session_state.demographic_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    def answer_best_age_group():
+        if not age_demo_df.empty:
+            best_age_group = age_demo_df.loc[age_demo_df['CVR (%)'].idxmax()]
+            st.info(f"**{best_age_group['年齢層']}** です。この年齢層のCVRは{best_age_group['CVR (%)']:.1f}%と最も高くなっています。")
+
+    def answer_demographic_targeting():
+        if not age_demo_df.empty:
+            best_age_group = age_demo_df.loc[age_demo_df['CVR (%)'].idxmax()]
+            st.info(f"CVRが高い **{best_age_group['年齢層']}** や特定の性別・地域に広告のターゲティングを絞り込む、または予算を重点的に配分することで、広告の費用対効果を高めることができます。")
+
+    faq_panel('demographic_faq_toggle', [
+        ("最もCVRが高い年齢層は？", "faq_demo_1", answer_best_age_group),
+        ("この分析結果をどう広告に活かす？", "faq_demo_2", answer_demographic_targeting),
+        ("特定の地域だけCVRが高い理由は？", "faq_demo_3",
+         "地域によってCVRに差が出るのは、地域限定のキャンペーン、競合の状況、地域特有のニーズ、または広告の地域ターゲティング設定などが原因として考えられます。"),
+        ("男女でLPの訴求を変えるべき？", "faq_demo_4",
+         "もし男女でCVRやサイト内行動に大きな差が見られる場合は、訴求メッセージやデザインを男女別に最適化（パーソナライズ）することが有効です。例えば、男性には機能性を、女性には共感を呼ぶストーリーを訴求するなどの方法が考えられます。"),
+    ])
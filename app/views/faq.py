@@ -0,0 +1,80 @@
+"""
+FAQ（ヘルプ。データセットは使わない）
+"""
+
+import streamlit as st
+
+
+def render():
+    """FAQページを表示する"""
+    st.markdown('<div class="sub-header">「瞬ジェネ AIアナリスト」に関するFAQ</div>', unsafe_allow_html=True)
+
+    st.markdown("#### 【基本的な使い方・機能について】")
+    with st.expander("Q1. このアプリで何ができますか？", expanded=False):
+        st.markdown("""
+        A1. 瞬ジェネで作成したスワイプLPのパフォーマンスを多角的に分析し、改善点を見つけることができます。
+        ページごとの離脱率や、どんなユーザーがコンバージョンしているかなどを可視化し、さらにAIがデータに基づいて具体的な改善案を提案しますので、LPのパフォーマンスアップが期待できます。
+        """)
+    with st.expander("Q2. どのような課題を解決できますか？", expanded=False):
+        st.markdown("""
+        A2. このツールは、以下のような課題を解決します。
+        - GA4などのデータを見ても数字の意味がわからず改善案が浮かばない
+        - データを図解化することでLPの状況が直感的にわかるようにしたい
+        - A/Bテストの結果について本当に有意性があるのかいつも判断に迷う
+        - 関係者へ分析結果を分かりやすく共有したい
+        - LP改善を自社で行いたい
+        """)
+    with st.expander("Q3. 分析を始めるには、まず何をすれば良いですか？", expanded=False):
+        st.markdown("""
+        A3. まずは「AIによる分析・考察」ページで、分析したいLPを選び、目標値などを入力して「AI分析を実行」をクリックし、現状を把握します。
+        その後、画面左のサイドバー（スマホの場合は画面左上の「>」をタップ）から、詳細に分析したいページ（例：「全体サマリー」「ページ分析」など）を選んでください。
+        各ページの「このページの分析について質問する」をクリックすると、各ページの重要な指標となる分析結果が表示されます。
+        """)
+
+    st.markdown("#### 【AI分析機能について】")
+    with st.expander("Q4. AI分析では、どのようなことを教えてくれますか？", expanded=False):
+        st.markdown("""
+        A4. 表示されているデータから「パフォーマンスが良い点・悪い点」「最も改善すべきボトルネック」「考えられる原因」などを自動で分析します。さらに、それに基づいて「次に何をすべきか」という具体的な改善提案まで提示します。
+        """)
+    with st.expander("Q5. AIの分析結果や提案は、毎回同じものですか？", expanded=False):
+        st.markdown("""
+        A5. いいえ、毎回異なります。AIの回答は、フィルターで選択された期間やLPのデータ、そして「AIによる分析・考察」ページでユーザーが入力した目標値などに基づいて、その都度動的に生成されます。そのため、常に現状に即したパーソナルな分析結果が得られます。
+        """)
+    with st.expander("Q6. AIの分析結果や提案は、絶対的に正しいですか？", expanded=False):
+        st.markdown("""
+        A6. いいえ、そもそもLP改善で絶対的な正解はありません。あくまで参考の1つとして捉え、最終判断はユーザーご自身で行ってください。ただし、詳細なデータをもとに高度で専門的なアドバイスを受けることができますので、運用のお役に立つことは間違いありません。
+        """)
+
+    st.markdown("#### 【データについて】")
+    with st.expander("Q7. 分析に使われているデータはどこから来ていますか？", expanded=False):
+        st.markdown("""
+        A7. BigQueryと連携し、その実データを直接参照して分析する仕組みです。
+        スワイプLPを多角的に分析できるよう100以上のデータ計測が可能です。
+        """)
+    with st.expander("Q8. データはリアルタイムに更新されますか？", expanded=False):
+        st.markdown("""
+        A8. いいえ。基本的にBigQueryのデータ更新と連動しており、瞬ジェネでは1日1回、早朝に更新される仕様です。
+        「リアルタイムビュー」のみ、直近1時間程度の準リアルタイムデータを確認できます。
+        """)
+
+    st.markdown("#### 【料金・技術について】")
+    with st.expander("Q9. このアプリを利用するのに料金はかかりますか？", expanded=False):
+        st.markdown("""
+        A9. このアプリ自体の利用は無料です。
+        ただし、実データを分析するために利用するGoogle Cloud Platform (GCP) のサービス（BigQueryとGemini API）については、ご利用量に応じて料金が発生します。
+        """)
+    with st.expander("Q10. BigQueryやGemini APIの料金は、どのくらいかかりますか？", expanded=False):
+        st.markdown("""
+        A10. 小規模な利用（月間10万アクセス、1日数回の分析）であれば、GCPの無料枠で収まるか、月額数百円〜数千円程度と想定されます。
+        GCPの予算アラート機能を設定すれば、予算消化に近づいたらメールで知らせてくれますので、想定外の費用が発生するのを防ぐことができるので安心です。
+        """)
+
+    st.markdown("#### 【トラブルシューティング】")
+    with st.expander("Q11. データが表示されず、「該当するデータがありません」と表示されます。", expanded=False):
+        st.markdown("""
+        A11. フィルターでデータを絞り込みすぎている可能性があります。期間を広げたり、「デバイス」や「チャネル」のフィルターを「すべて」に戻したりして、条件をゆるめてみてください。
+        """)
+    with st.expander("Q12. ページ分析で画像のキャプチャが表示されません。", expanded=False):
+        st.markdown("""
+        A12. このアプリは、LPのHTML構造を解析して画像を取得しています。特殊な方法で画像を表示しているサイトの場合、うまく取得できないことがあります。その場合は、代替のプレースホルダー画像が表示されます。
+        """)
@@ -0,0 +1,180 @@
+"""
+専門用語解説（ヘルプ。データセットは使わない）
+"""
+
+import streamlit as st
+
+
+def render():
+    """専門用語解説ページを表示する"""
+    st.markdown('<div class="sub-header">専門用語解説</div>', unsafe_allow_html=True)
+
+    st.markdown("LP分析で使用される主要な用語を詳しく解説します。")
+    
+    # カテゴリー別に表示
+    with st.expander("基本指標（KPI）", expanded=False):
+        st.markdown("""
+        **セッション（Session）**
+        ユーザーがウェブサイトを訪れた1回の訪問。同じユーザーが複数回訪れた場合、それぞれ別のセッションとしてカウントされます。通常、30分間操作がないとセッションが終了します。
+        
+        **ユニークユーザー（Unique User）**
+        特定の期間内にサイトを訪れたユニークな個人の数。CookieやデバイスIDで識別されます。
+        
+        **ページビュー（Page View / PV）**
+        ページが表示された回数。同じページを何度も見た場合、その分だけカウントされます。
+        
+        **直帰率（Bounce Rate）**
+        1ページだけを見てサイトを離れたセッションの割合。高いほど、ユーザーがすぐに離脱していることを意味します。
+        
+        **離脱率（Exit Rate）**
+        特定のページでサイトを離れたセッションの割合。そのページがユーザージャーニーの最後になった割合を示します。
+        
+        **滞在時間（Session Duration）**
+        ユーザーがサイトに滞在した時間。長いほどエンゲージメントが高いと考えられますが、コンテンツがわかりにくい可能性もあります。
+        """)
+    
+    with st.expander("コンバージョン関連"):
+        st.markdown("""
+        **コンバージョン（Conversion / CV）**
+        ユーザーが目標とする行動（購入、問い合わせ、会員登録など）を完了したこと。LPの最終目標です。
+        
+        **コンバージョン率（Conversion Rate / CVR）**
+        セッション数に対するコンバージョン数の割合。  
+        計算式: CVR = (コンバージョン数 ÷ セッション数) × 100  
+        例: 1,000セッションで50コンバージョンならCVR = 5%
+        
+        **マイクロコンバージョン（Micro Conversion）**
+        最終目標に至る前の中間目標。例: 資料ダウンロード、動画視聴、ページスクロールなど。
+        
+        **CPA（Cost Per Acquisition）**
+        1件のコンバージョンを獲得するためにかかったコスト。  
+        計算式: CPA = 広告費 ÷ コンバージョン数  
+        侎いほど効率的です。
+        
+        **ROAS（Return On Ad Spend）**
+        広告費用対効果。広告費1円あたりの売上。  
+        計算式: ROAS = 売上 ÷ 広告費 × 100  
+        例: 広告費10万円で売上50万円ならROAS = 500%
+        """)
+    
+    with st.expander("LP特有の指標"):
+        st.markdown("""
+        **ファーストビュー（First View / FV）**
+        ページを開いたときに最初に表示される画面範囲。スクロールしないで見える部分。LPで最も重要な要素で、ファーストビューで興味を引けないと即離脱されます。
+        
+        **FV残存率（FV Retention Rate）**
+        ファーストビューを見た後、次のセクションに進んだユーザーの割合。高いほどFVが効果的です。業界平均は60-80%程度。
+        
+        **スクロール率（Scroll Depth）**
+        ユーザーがページをどれだけスクロールしたかの割合。25%、50%、75%、100%で測定されることが多いです。100%はページの最後まで到達したことを意味します。
+        
+        **CTA（Call To Action）**
+        ユーザーに具体的な行動を促すボタンやリンク。「今すぐ購入」「無料で試す」「資料をダウンロード」など。LPの最重要要素です。
+        
+        **最終CTA到達率**
+        LPの最後に配置されたCTA（コンバージョンボタン）に到達したユーザーの割合。高いほどLP全体のコンテンツが効果的です。
+        
+        **ファネル（Funnel）**
+        ユーザーがLPを進む過程を段階的に表した図。各ステップでどれだけのユーザーが離脱したかを可視化し、ボトルネック（問題箇所）を特定します。
+        """)
+    
+    with st.expander("A/Bテスト・最適化"):
+        st.markdown("""
+        **A/Bテスト（A/B Testing）**
+        2つ以上の異なるバージョン（バリアント）を同時に公開し、どちらが優れているかをデータで検証する手法。例: ヘッダー画像をAパターンとBパターンで比較。
+        
+        **バリアント（Variant）**
+        A/Bテストで比較する各バージョン。Aパターン（オリジナル）、Bパターン（変更版）など。
+        
+        **統計的有意差（Statistical Significance）**
+        A/Bテストの結果が偶然ではなく、本当に差があることを示す指標。通常95%以上の信頼水準で判断します。
+        
+        **多変量テスト（Multivariate Testing / MVT）**
+        複数の要素を同時にテストする手法。例: ヘッダー画像、CTAボタンの色、コピーを同時に変えて最適な組み合わせを見つけます。
+        
+        **LPO（Landing Page Optimization）**
+        LPのコンバージョン率を高めるための最適化施策。A/Bテスト、ヒートマップ分析、ユーザーテストなどを組み合わせて実施します。
+        """)
+    
+    with st.expander("トラフィック・チャネル"):
+        st.markdown("""
+        **UTMパラメータ（UTM Parameters）**
+        URLに付加するタグで、どの広告やキャンペーンからユーザーが来たかを追跡するためのもの。
+        - **utm_source**: トラフィック元（例: google, facebook, newsletter）
+        - **utm_medium**: 媒体（例: cpc, email, social）
+        - **utm_campaign**: キャンペーン名（例: summer_sale_2024）
+        - **utm_content**: 広告コンテンツ（例: banner_a, text_link）
+        - **utm_term**: 検索キーワード（例: running+shoes）
+        
+        **チャネル（Channel）**
+        ユーザーがLPに到達した経路のカテゴリー。
+        - **Organic Search**: 自然検索（Google、Yahooなど）
+        - **Paid Search**: 有料検索広告（リスティング広告）
+        - **Organic Social**: SNSからの自然流入
+        - **Paid Social**: SNS広告
+        - **Direct**: 直接アクセス（ブックマーク、URL直打ち）
+        - **Referral**: 他サイトからのリンク
+        - **Email**: メールからの流入
+        
+        **リファラー（Referrer）**
+        ユーザーが直前に訪れていたページのURL。どこから流入してきたかを特定できます。
+        
+        **ランディングページ（Landing Page / LP）**
+        ユーザーが最初に着地したページ。広告や検索結果から誘導するために特別に設計されたページ。
+        """)
+    
+    with st.expander("セグメント・オーディエンス"):
+        st.markdown("""
+        **セグメント（Segment）**
+        特定の条件で絞り込んだユーザーグループ。例:
+        - デバイス別: スマートフォン、タブレット、PC
+        - チャネル別: Googleからのユーザー、SNSからのユーザー
+        - 行動別: 購入済みユーザー、カート放棄ユーザー
+        
+        **オーディエンス（Audience）**
+        特定の条件を満たすユーザーの集合。リターゲティング広告やパーソナライズに使用します。
+        
+        **カスタムオーディエンス（Custom Audience）**
+        独自の条件で作成したオーディエンス。例: 「滞在時間60秒以上、スクロール率75%以上、コンバージョン未完了」のユーザー。
+        
+        **リターゲティング（Retargeting）**
+        一度サイトを訪れたユーザーに対して、再度広告を表示する手法。コンバージョンしなかったユーザーを再誘導します。
+        """)
+    
+    with st.expander("パフォーマンス指標"):
+        st.markdown("""
+        **読込時間（Page Load Time）**
+        ページが完全に表示されるまでの時間。短いほどユーザー体験が良く、CVRも向上します。目標は3秒以内。
+        
+        **ファーストビュー表示時間（First Contentful Paint / FCP）**
+        ページの最初のコンテンツが表示されるまでの時間。ユーザーが「ページが読み込まれている」と感じるまでの時間。
+        
+        **インタラクティブまでの時間（Time to Interactive / TTI）**
+        ページが完全に操作可能になるまでの時間。ボタンやリンクがクリックできるようになるまでの時間。
+        
+        **クリック率（Click Through Rate / CTR）**
+        表示回数（インプレッション）に対するクリック数の割合。  
+        計算式: CTR = (クリック数 ÷ 表示回数) × 100  
+        広告やCTAボタンの効果を測定します。
+        
+        **エンゲージメント率（Engagement Rate）**
+        ユーザーがサイトでアクティブに行動した割合。クリック、スクロール、動画視聴などを含みます。
+        """)
+    
+    with st.expander("分析ツール・手法"):
+        st.markdown("""
+        **ヒートマップ（Heatmap）**
+        ユーザーのクリックやスクロール、マウスの動きを色で可視化したもの。赤い部分が最も注目されているエリア。
+        
+        **セッションリプレイ（Session Replay）**
+        ユーザーの行動を動画のように再生する機能。ユーザーがどこで迷ったか、どこで離脱したかを詳細に分析できます。
+        
+        **コホート分析（Cohort Analysis）**
+        同じ時期に訪れたユーザーグループ（コホート）の行動を時間経過で追跡する分析手法。リピート率やLTVの分析に使用します。
+        
+        **アトリビューション（Attribution）**
+        コンバージョンに至るまでの複数のタッチポイント（広告、メール、SNSなど）の貢献度を評価する手法。
+        - **ラストクリック**: 最後の接触に100%の貢献を割り当て。
+        - **ファーストクリック**: 最初の接触に100%の貢献を割り当て。
+        - **線形**: 全ての接触に均等に貢献を割り当て。
+        """)
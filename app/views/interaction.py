@@ -0,0 +1,319 @@
+"""
+インタラクション分析: 要素別のクリックとコンバージョンへの貢献度
+"""
+
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from analytics import FilterSpec, safe_rate
+from views.common import faq_panel, filter_events
+
+
+def render(snapshot):
+    """インタラクション分析ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    st.markdown('<div class="sub-header">インタラクション分析</div>', unsafe_allow_html=True)
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True) # type: ignore
+
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        # 期間選択
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="interaction_period")
+
+    with filter_cols_1[1]:
+        # LP選択
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="interaction_lp",
+            disabled=not lp_options
+        )
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="interaction_device")
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="interaction_user_type")
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="interaction_conversion_status")
+    
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="interaction_channel")
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="interaction_source_medium") # ラベルは変更済み
+    
+    enable_comparison = False
+    # 期間設定
+    today = df['event_date'].max().date()
+    
+    if selected_period == "今日":
+        start_date = today
+        end_date = today
+    elif selected_period == "昨日":
+        start_date = today - timedelta(days=1)
+        end_date = today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date = today - timedelta(days=6)
+        end_date = today
+    elif selected_period == "過去14日間":
+        start_date = today - timedelta(days=13)
+        end_date = today
+    elif selected_period == "過去30日間":
+        start_date = today - timedelta(days=29)
+        end_date = today
+    elif selected_period == "今月":
+        start_date = today.replace(day=1)
+        end_date = today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = last_month_end.replace(day=1)
+        end_date = last_month_end
+    elif selected_period == "全期間":
+        start_date = df['event_date'].min().date()
+        end_date = df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="interaction_start_date")
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="interaction_end_date")
+
+    st.markdown("---")
+
+    # データフィルタリング（期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用）
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # 比較機能は無効化
+    comparison_df = None
+
+    # データが空の場合の処理
+    if len(filtered_df) == 0:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+
+    # このページで必要なKPIを計算
+    total_sessions = filtered_df['session_id'].nunique()
+
+    # --- インタラクション要素一覧 ---
+    st.markdown("#### インタラクション要素一覧")
+    st.markdown('<div class="graph-description">LP内の各インタラクション要素について、要素が表示されたセッション数、クリック数、およびクリック率を表示します。</div>', unsafe_allow_html=True)
+
+    interactions_for_list = {
+        'CTAボタンクリック': {'condition': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('cta|btn-primary', na=False)), 'page_num': 9},
+        'フローティングバナークリック': {'condition': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('floating', na=False)), 'page_num': 1}, # 全ページで表示されると仮定
+        '離脱防止ポップアップクリック': {'condition': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('exit', na=False)), 'page_num': 1}, # 全ページで表示されると仮定
+        '動画視聴完了': {'condition': filtered_df['event_name'] == 'video_completion', 'page_num': 1} # 動画はP1にあると仮定
+    }
+
+    interaction_list_data = []
+    for name, details in interactions_for_list.items():
+        condition = details['condition']
+        page_num = details['page_num']
+
+        # クリック数または視聴開始数（イベントの行数）
+        action_count = condition.sum()
+        
+        # その行動を取ったユニークなセッション数
+        action_session_count = filtered_df[condition]['session_id'].nunique()
+
+        # 表示セッション数（要素が存在するページに到達したセッション数）
+        # page_numが1の場合は全セッションが表示機会を持つとみなす
+        if page_num == 1:
+            impression_sessions = total_sessions
+        else:
+            impression_sessions = filtered_df[filtered_df['max_page_reached'] >= page_num]['session_id'].nunique()
+
+        # クリック率（行動セッション数 / 表示セッション数）
+        rate = safe_rate(action_session_count, impression_sessions) * 100
+
+        interaction_list_data.append({
+            'インタラクション要素': name,
+            '表示セッション数': impression_sessions,
+            'クリック数または視聴完了数': action_count,
+            'クリック率または視聴完了率': rate
+        })
+
+    interaction_list_df = pd.DataFrame(interaction_list_data)
+
+    st.dataframe(interaction_list_df.style.format({
+        '表示セッション数': '{:,.0f}',
+        'クリック数または視聴完了数': '{:,.0f}',
+        'クリック率または視聴完了率': '{:.2f}%'
+    }), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+
+
+    # --- CV貢献度分析ロジック ---
+    interactions = {
+        'CTAボタンクリック': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('cta|btn-primary', na=False)),
+        'フローティングバナークリック': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('floating', na=False)),
+        '離脱防止ポップアップクリック': (filtered_df['event_name'] == 'click') & (filtered_df['elem_classes'].str.contains('exit', na=False)),
+        '動画視聴完了': filtered_df['event_name'] == 'video_completion'
+    }
+
+    contribution_data = []
+
+    for name, condition in interactions.items():
+        # インタラクションを行ったセッションID
+        interacted_session_ids = filtered_df[condition]['session_id'].unique()
+        
+        # 全セッションID
+        all_session_ids = filtered_df['session_id'].unique()
+
+        # インタラクションを行わなかったセッションID
+        non_interacted_session_ids = np.setdiff1d(all_session_ids, interacted_session_ids)
+
+        # CVしたセッションID
+        cv_session_ids = filtered_df[filtered_df['cv_type'].notna()]['session_id'].unique()
+
+        # グループA: インタラクション有り
+        interacted_cv_sessions = np.intersect1d(interacted_session_ids, cv_session_ids)
+        cvr_with_interaction = safe_rate(len(interacted_cv_sessions), len(interacted_session_ids)) * 100
+
+        # グループB: インタラクション無し
+        non_interacted_cv_sessions = np.intersect1d(non_interacted_session_ids, cv_session_ids)
+        cvr_without_interaction = safe_rate(len(non_interacted_cv_sessions), len(non_interacted_session_ids)) * 100
+
+        # CVRリフト率
+        cvr_lift = safe_rate(cvr_with_interaction - cvr_without_interaction, cvr_without_interaction) * 100
+
+        contribution_data.append({
+            'インタラクション要素': name,
+            'インタラクション有りCVR (%)': cvr_with_interaction,
+            'インタラクション無しCVR (%)': cvr_without_interaction,
+            'CVRリフト率 (%)': cvr_lift
+        })
+
+    contribution_df = pd.DataFrame(contribution_data)
+
+    # CV貢献度テーブル
+    st.markdown("#### インタラクション別 CV貢献度")
+    st.markdown('<div class="graph-description">各行動（インタラクション）の「有り/無し」でユーザーを分け、それぞれのコンバージョン率（CVR）を比較します。「CVRリフト率」が高いほど、その行動がCVに強く貢献していることを示します。</div>', unsafe_allow_html=True)
+
+    st.dataframe(contribution_df.style.format({
+        'インタラクション有りCVR (%)': '{:.2f}%',
+        'インタラクション無しCVR (%)': '{:.2f}%',
+        'CVRリフト率 (%)': '{:+.1f}%'
+    }), use_container_width=True, hide_index=True)
+
+    # CV貢献度 比較グラフ
+    st.markdown("#### CV貢献度 比較グラフ")
+    st.markdown('<div class="graph-description">各インタラクションの「有り/無し」でのCVRを棒グラフで比較します。差が大きいほど、その行動がCVに与える影響が大きいことを意味します。</div>', unsafe_allow_html=True)
+
+    # グラフ用にデータを整形
+    plot_df = contribution_df.melt(
+        id_vars=['インタラクション要素'],
+        value_vars=['インタラクション有りCVR (%)', 'インタラクション無しCVR (%)'],
+        var_name='グループ',
+        value_name='CVR'
+    )
+
+    fig = px.bar(
+        plot_df,
+        x='インタラクション要素',
+        y='CVR',
+        color='グループ',
+        barmode='group',
+        text='CVR'
+    )
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(
+        height=500,
+        yaxis_title='コンバージョン率 (%)',
+        xaxis_title='インタラクション要素',
+        legend_title='グループ',
+        dragmode=False,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    st.plotly_chart(fig, use_container_width=True, key='plotly_chart_interaction_contribution')
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">各インタラクション要素のパフォーマンスに基づき、AIがユーザーの関心と行動を分析します。</div>', unsafe_allow_html=True)
+
+    # AI分析の表示状態を管理
+    if 'interaction_ai_open' not in st.session_state:
+        st.session_state.interaction_ai_open = False
+
+    if st.button("AI分析を実行", key="interaction_ai_btn", type="primary", use_container_width=True):
+        st.session_state.interaction_ai_open = True
+
+    if st.session_state.interaction_ai_open:
+        with st.container():
+            with st.spinner("AIがインタラクションデータを分析中..."):
+                # クリック率が最も高い要素を特定
+                if not contribution_df.empty:
+                    best_lift_element = contribution_df.loc[contribution_df['CVRリフト率 (%)'].idxmax()]
+                else:
+                    best_lift_element = pd.Series({'インタラクション要素': 'N/A', 'CVRリフト率 (%)': 0})
+                
+                st.markdown("#### 1. 現状の評価")
+                st.info(f"""
+                インタラクション要素の中で、**「{best_lift_element['インタラクション要素']}」** がCVRリフト率 **{best_lift_element['CVRリフト率 (%)']:.1f}%** と最も高く、コンバージョンに最も貢献している行動と考えられます。
+                
+                この行動を取ったユーザーは、取らなかったユーザーに比べてCVRが大幅に高いことを意味します。
+                """)
+
+                st.markdown("#### 2. 今後の考察と改善案")
+                st.warning(f"""
+                **CV貢献度の高い行動を促進する:**
+                「{best_lift_element['インタラクション要素']}」という行動を、より多くのユーザーに取ってもらうための施策が有効です。例えば、このボタンをより目立たせる、配置を変える、などの改善が考えられます。
+                
+                **CV貢献度の低い行動の分析:**
+                CVRリフト率が低い、あるいはマイナスになっている行動は、ユーザーを混乱させているか、CVから遠ざけている可能性があります。その要素の必要性自体を見直すか、役割を明確にする改善が必要です。
+                """)
+            if st.button("AI分析を閉じる", key="interaction_ai_close"):
+                st.session_state.interaction_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    def answer_best_interaction():
+        if not contribution_df.empty:
+            best_lift_element = contribution_df.loc[contribution_df['CVRリフト率 (%)'].idxmax()]
+            st.info(f"コンバージョンへの貢献度が最も高いのは「**{best_lift_element['インタラクション要素']}**」です。この行動を取ったユーザーのCVRは、取らなかったユーザーに比べて **{best_lift_element['CVRリフト率 (%)']:.1f}%** 高くなっています。")
+
+    faq_panel('interaction_faq_toggle', [
+        ("最もクリックされている要素は？", "faq_interaction_1", answer_best_interaction),
+        ("CTAボタンのCTRを上げるには？", "faq_interaction_2",
+         "CTAボタンのCTRを上げるには、1) ボタンの色を背景色と対照的な目立つ色にする、2) 「資料請求」→「無料で資料をもらう」のように具体的なアクションやメリットを文言に入れる、3) ボタンのサイズを大きくする、などのA/Bテストが有効です。"),
+        ("クリック率が低い要素はどうすれば？", "faq_interaction_3",
+         "クリック率が低い要素は、まずデザイン（色、サイズ、配置）を見直して視認性を高めましょう。それでも改善しない場合は、要素の文言（コピー）がユーザーにとって魅力的か、メリットが伝わるかを再検討する必要があります。"),
+        ("デバイスによってクリック率は変わる？", "faq_interaction_4",
+         "はい、大きく変わることがあります。例えば、PCではクリックしやすくても、スマホではボタンが小さすぎて押しにくい、といった問題が考えられます。「セグメント分析」でデバイス別のパフォーマンスを確認し、最適化することが重要です。"),
+    ])
@@ -0,0 +1,65 @@
+"""
+LPOの基礎知識（ヘルプ。データセットは使わない）
+"""
+
+import streamlit as st
+
+
+def render():
+    """LPOの基礎知識ページを表示する"""
+    st.markdown('<div class="sub-header">LPOの基礎知識</div>', unsafe_allow_html=True)
+    st.markdown("ランディングページ最適化（LPO）と、その関連分野であるEFO、CROについての基礎知識を解説します。")
+
+    with st.expander("1. LPO (ランディングページ最適化) とは？"):
+        st.markdown("""
+        **LPO（Landing Page Optimization）** とは、広告や検索結果からユーザーが最初に訪れる「ランディングページ」を、コンバージョン（購入や問い合わせなど）に至りやすいように改善・最適化することです。
+
+        #### なぜLPOが重要か？
+        - **広告費の無駄をなくす**: どれだけ広告費をかけてユーザーを集めても、LPに魅力がなければすぐに離脱され、広告費が無駄になってしまいます。
+        - **CVR向上の鍵**: LPを改善することで、同じアクセス数でもより多くのコンバージョンを生み出すことができ、事業の成長に直結します。
+
+        #### LPOの具体的な手法
+        - **ファーストビューの改善**: ユーザーが最初に目にする画面（キャッチコピー、メインビジュアル）を、ターゲットに響く魅力的なものにします。
+        - **CTA（行動喚起）の最適化**: 「購入する」「問い合わせる」などのボタンの文言、色、配置を工夫し、クリックされやすくします。
+        - **コンテンツの改善**: ユーザーの悩みや欲求に応える情報を提供し、信頼性（お客様の声、実績など）を高めます。
+        - **フォームの最適化 (EFO)**: 入力フォームのストレスを減らし、離脱を防ぎます（詳細は下記）。
+        - **A/Bテストの実施**: 複数の改善パターンを試し、どちらがより効果的かをデータで判断します。
+        """)
+
+    with st.expander("2. EFO (入力フォーム最適化) とは？"):
+        st.markdown("""
+        **EFO（Entry Form Optimization）** とは、購入や問い合わせに必要な入力フォームを、ユーザーがより簡単・快適に入力完了できるように最適化することです。LPOの中でも特に重要な施策の一つです。
+
+        #### なぜEFOが重要か？
+        - **カゴ落ちを防ぐ**: 購入意欲が高いユーザーでも、フォームが複雑で面倒だと感じると、最後の最後で離脱してしまいます（カゴ落ち）。この機会損失は非常に大きい問題です。
+
+        #### EFOの具体的な手法
+        - **入力項目を最小限にする**: 不要な項目は思い切って削除します。
+        - **必須項目を明確にする**: どこが必須入力なのかを分かりやすく示します。
+        - **リアルタイムエラー表示**: 入力ミスをその場で知らせ、後戻りの手間をなくします。
+        - **入力例の表示**: プレースホルダー（薄い文字の入力例）で、何を入力すれば良いかを示します。
+        - **住所自動入力**: 郵便番号から住所を自動で入力できるようにします。
+        - **離脱防止ポップアップ**: フォームから離脱しようとしたユーザーに、再度入力を促すメッセージを表示します。
+        """)
+
+    with st.expander("3. CRO (コンバージョン率最適化) とは？"):
+        st.markdown("""
+        **CRO（Conversion Rate Optimization）** とは、ウェブサイト全体のコンバージョン率を最大化するための、包括的なアプローチです。
+
+        #### LPOやEFOとの関係
+        - **CROは「森」**: ウェブサイト全体の最適化を目指す、より大きな概念です。
+        - **LPOは「木」**: CROの一部であり、特にランディングページの改善に特化した施策です。
+        - **EFOは「枝」**: LPOの一部であり、特に入力フォームの改善に特化した施策です。
+
+        つまり、**`CRO > LPO > EFO`** という包含関係にあります。
+
+        !CRO, LPO, EFOの関係
+
+        #### CROの基本的なプロセス
+        1.  **現状分析**: この「瞬ジェネAIアナリスト」のようなツールでデータを分析し、サイト全体の課題を把握します。
+        2.  **課題発見・仮説立案**: 分析結果から「なぜCVRが低いのか？」という課題を特定し、「〇〇を改善すればCVRが上がるはずだ」という仮説を立てます。
+        3.  **施策の実行**: 仮説に基づいて、LPOやEFOなどの具体的な改善施策（A/Bテストなど）を実行します。
+        4.  **効果測定・学習**: 施策の結果をデータで評価し、成功すれば本格導入、失敗すればその原因から学び、次の改善に繋げます。
+
+        このサイクルを継続的に回していくことが、CROの成功の鍵となります。
+        """)
@@ -0,0 +1,100 @@
+"""
+リアルタイムビュー: 直近1時間のセッションとイベント
+"""
+
+import plotly.express as px
+import streamlit as st
+
+from views.common import current_snapshot, faq_panel, get_realtime_window
+
+# KPIと推移を自動で更新する間隔（秒）
+REALTIME_REFRESH_SECONDS = 30
+
+
+@st.fragment(run_every=REALTIME_REFRESH_SECONDS)
+def realtime_panel():
+    """
+    直近1時間のKPIと10分ごとの推移
+    fragment なので REALTIME_REFRESH_SECONDS 秒ごとにこの部分だけを再実行し、その時点のスナップショットの新しいイベントを
+    リングバッファ（1分ごとの集計）に加えてから、直近1時間分のスロットだけで集計する
+    """
+    window = get_realtime_window()
+    window.sync(current_snapshot())
+    kpis = window.summary(minutes=60)
+
+    if kpis is not None:
+        # KPI表示
+        st.markdown("#### 直近1時間のモニタリング")
+        st.markdown("直近1時間で急な変化や異常がないかを確認します")
+        kpi_cols = st.columns(5)
+        kpi_cols[0].metric("セッション数", f"{kpis['sessions']:,}")
+        kpi_cols[1].metric("平均到達ページ数", f"{kpis['avg_pages']:.1f}")
+        kpi_cols[2].metric("平均滞在時間", f"{kpis['avg_stay_sec']:.1f}秒")
+        kpi_cols[3].metric("FV残存率", f"{kpis['fv_retention']:.1f}%")
+        kpi_cols[4].metric("平均読込時間", f"{kpis['avg_load_ms']:.0f}ms")
+
+        st.markdown("---")
+
+        # 分単位の推移
+        st.markdown("#### 直近1時間のセッション数推移（10分単位）")
+        st.markdown("直近1時間のセッション数を、10分ごとに集計して表示します")
+
+        rt_trend = window.trend(minutes=60, bin_minutes=10)
+        rt_trend.columns = ['時刻', 'セッション数']
+
+        fig = px.area(rt_trend, x='時刻', y='セッション数', markers=True)
+        fig.update_layout(height=400, yaxis_title='セッション数', dragmode=False)
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_23')
+    else:
+        st.info("直近1時間のデータがありません")
+
+
+def render(snapshot):
+    """リアルタイムビューページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    st.markdown('<div class="sub-header">リアルタイムビュー</div>', unsafe_allow_html=True)
+
+    realtime_panel()
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">リアルタイムのデータ変動を監視し、異常検知や突発的な機会の発見をサポートします。</div>', unsafe_allow_html=True)
+
+    # AI分析の表示状態を管理
+    if 'realtime_ai_open' not in st.session_state:
+        st.session_state.realtime_ai_open = False
+
+    if st.button("AI分析を実行", key="realtime_ai_btn", type="primary", use_container_width=True):
+        st.session_state.realtime_ai_open = True
+
+    if st.session_state.realtime_ai_open:
+        with st.container():
+            with st.spinner("AIがリアルタイムデータを分析中..."):
+                st.markdown("#### 1. 現状の評価")
+                st.info("""
+                リアルタイムビューでは、直近1時間のサイト活動を監視しています。セッション数が通常時と比較して急増または急減していないかを確認することが重要です。
+                - **セッション数の急増**: メディア掲載やインフルエンサーによる紹介など、外部からの突発的な流入の可能性があります。
+                - **セッション数の急減**: サイトの障害や広告配信の停止など、何らかの問題が発生している可能性があります。
+                """)
+
+                st.markdown("#### 2. 今後のアクション")
+                st.warning("""
+                - **機会の活用**: セッション数が急増している場合、その原因を特定し、SNSで言及を広めたり、関連コンテンツをトップに表示するなどして、機会を最大化しましょう。
+                - **問題の早期発見**: セッション数がゼロに近い、または急減している場合は、サイトが正常に表示されるか、広告キャンペーンが正しく配信されているかを直ちに確認してください。
+                """)
+            if st.button("AI分析を閉じる", key="realtime_ai_close"):
+                st.session_state.realtime_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    faq_panel('realtime_faq_toggle', [
+        ("セッション数が急に増えたらどうする？", "faq_realtime_1",
+         "まず流入元を確認しましょう。SNSでの拡散やメディア掲載が原因であれば、その機会を最大化するために公式アカウントで言及したり、関連キャンペーンを実施するのが有効です。"),
+        ("セッション数がゼロになったら？", "faq_realtime_2",
+         (st.warning, "サイトに重大な問題が発生している可能性があります。すぐにウェブサイトが正常に表示されるか、広告配信が停止していないか、ドメインやサーバーに問題がないかを確認してください。")),
+        ("このビューをどう活用する？", "faq_realtime_3",
+         "主に「異常検知」と「機会発見」のために使います。広告キャンペーン開始直後の効果測定や、サーバーダウンなどの障害の早期発見に役立ちます。"),
+        ("更新頻度はどのくらい？", "faq_realtime_4",
+         "このビューのデータは、数分から数十分程度の遅延で更新されます（実際の更新頻度はデータソースの仕様に依存します）。常に最新の状況を反映するものではない点にご注意ください。"),
+    ])
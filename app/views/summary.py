@@ -0,0 +1,793 @@
+"""
+全体サマリー: 主要KPI・日別KPI・ページパス別の指標と、選択したグラフ
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from analytics import (
+    FilterSpec,
+    add_rates,
+    daily_rollup,
+    page_funnel,
+    page_stay_distribution,
+    rollup,
+    safe_rate,
+    standard_error,
+)
+from views.common import (
+    EXACT_DISTINCT_COUNTS,
+    count_events,
+    faq_panel,
+    filter_cube,
+    filter_events,
+    filter_sessions,
+    get_comparison_period,
+    get_kpis,
+    option_caption,
+)
+
+
+def render(snapshot):
+    """全体サマリーページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+    cube_sketches = snapshot.cube_sketches
+
+    st.markdown('<div class="sub-header">全体サマリー</div>', unsafe_allow_html=True)
+    
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True)
+
+    # ページ上部にフィルターを配置
+
+    # フィルターを2行に分割
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        # 期間選択（キーを一意にするためにプレフィックスを追加）
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="summary_period_selector")
+
+    # 期間設定
+    today = df['event_date'].max().date()
+    
+    if selected_period == "今日":
+        start_date = today
+        end_date = today
+    elif selected_period == "昨日":
+        start_date = today - timedelta(days=1)
+        end_date = today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date = today - timedelta(days=6)
+        end_date = today
+    elif selected_period == "過去14日間":
+        start_date = today - timedelta(days=13)
+        end_date = today
+    elif selected_period == "過去30日間":
+        start_date = today - timedelta(days=29)
+        end_date = today
+    elif selected_period == "今月":
+        start_date = today.replace(day=1)
+        end_date = today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = last_month_end.replace(day=1)
+        end_date = last_month_end
+    elif selected_period == "全期間":
+        start_date = df['event_date'].min().date()
+        end_date = df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min())
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max())
+
+    # ドロップダウンの件数は、期間とそれより前のドロップダウンで選んだ条件で絞り込んだセッション数
+    option_spec = FilterSpec(start_date, end_date)
+
+    with filter_cols_1[1]:
+        # LP選択
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None, # 選択肢がなければindexもNone
+            key="summary_lp", # キーを明示
+            disabled=not lp_options # 選択肢がなければ操作不可
+        )
+        st.caption(option_caption(snapshot, option_spec, 'page_location', lp_options))
+        option_spec = option_spec._replace(page_location=selected_lp)
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="summary_device_selector")
+        st.caption(option_caption(snapshot, option_spec, 'device_type', device_options))
+        option_spec = option_spec._replace(device_type=selected_device)
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="summary_user_type_selector")
+        st.caption(option_caption(snapshot, option_spec, 'user_type', user_type_options))
+        option_spec = option_spec._replace(user_type=selected_user_type)
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="summary_conversion_status_selector")
+        st.caption(option_caption(snapshot, option_spec, 'conversion_status', conversion_status_options))
+        option_spec = option_spec._replace(conversion_status=selected_conversion_status)
+
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="summary_channel_selector")
+        st.caption(option_caption(snapshot, option_spec, 'channel', channel_options))
+        option_spec = option_spec._replace(channel=selected_channel)
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="summary_source_medium_selector") # ラベルは変更済み
+        st.caption(option_caption(snapshot, option_spec, 'source_medium', source_medium_options))
+
+    st.markdown("---")
+
+    # ページ上部にフィルターを配置ここまで
+    comparison_type = None # 初期化
+    # 期間フィルターのみを適用したDataFrame（テーブル表示用）
+    period_filtered_df = filter_events(snapshot, FilterSpec(start_date, end_date))
+
+    # KPIカードやグラフ用のデータフィルタリング
+    # 期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # --- データダウンロード機能 ---
+    st.markdown("##### フィルター適用後のデータをダウンロード")
+    st.markdown('<div class="graph-description">現在選択されているフィルター条件で絞り込んだ生データをCSVファイルとしてダウンロードできます。日報や週報の作成にご活用ください。</div>', unsafe_allow_html=True)
+
+    # CSVに変換する関数
+    @st.cache_data
+    def convert_df_to_csv(df_to_convert):
+        # IMPORTANT: utf-8-sig を使用してExcelでの日本語文字化けを防ぐ
+        return df_to_convert.to_csv(index=False).encode('utf-8-sig')
+
+    csv_data = convert_df_to_csv(filtered_df)
+    
+    # ダウンロードボタン
+    st.download_button(
+       label="CSV形式でダウンロード",
+       data=csv_data,
+       file_name=f"analysis_data_{pd.to_datetime(start_date).strftime('%Y%m%d')}_{pd.to_datetime(end_date).strftime('%Y%m%d')}.csv",
+       mime='text/csv',
+       use_container_width=True,
+       type="primary"
+    )
+
+    # データが空の場合の処理
+    if len(filtered_df) == 0:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+
+    # KPIカード・ブレークダウン用にロールアップキューブとセッションファクトを同じ条件で絞り込む
+    filtered_cube = filter_cube(snapshot, filter_spec)
+    filtered_sessions = filter_sessions(snapshot, filter_spec)
+
+    # 基本メトリクス計算（ロールアップキューブの合計から算出）
+    kpis = get_kpis(snapshot, filter_spec)
+    total_sessions = kpis['sessions']
+    total_conversions = kpis['conversions']
+    conversion_rate = kpis['conversion_rate']
+    total_clicks = kpis['clicks']
+    click_rate = kpis['click_rate']
+    avg_stay_time = kpis['avg_stay_time']  # 秒
+    avg_pages_reached = kpis['avg_pages_reached']
+    fv_retention_rate = kpis['fv_retention_rate']
+    final_cta_rate = kpis['final_cta_rate']
+    avg_load_time = kpis['avg_load_time']
+
+    st.markdown('<div class="sub-header">主要指標（KPI）</div>', unsafe_allow_html=True)
+
+    # 主要KPIを算出して表示
+    # 比較機能をKPIヘッダーの下に配置
+    comp_cols = st.columns([1, 1, 4]) # チェックボックス、選択ボックス、スペーサー
+    with comp_cols[0]:
+        enable_comparison = st.checkbox("比較機能を有効化", value=False, key="summary_comparison_checkbox")
+    with comp_cols[1]:
+        if enable_comparison:
+            comparison_options = {
+                "前期間": "previous_period", "前週": "previous_week",
+                "前月": "previous_month", "前年": "previous_year"
+            }
+            selected_comparison = st.selectbox("比較対象", list(comparison_options.keys()), key="summary_comparison_selector", label_visibility="collapsed")
+            comparison_type = comparison_options[selected_comparison]
+
+    # 比較データの取得
+    comparison_count = 0 # 比較期間のイベント数（ビットマップインデックスで数える）
+    comp_start = None
+    comp_end = None
+    if enable_comparison and comparison_type:
+        comparison_period = get_comparison_period(pd.Timestamp(start_date), pd.Timestamp(end_date), comparison_type)
+        if comparison_period is not None:
+            comp_start, comp_end = comparison_period
+            # 比較データにも同じフィルターを適用
+            comp_spec = filter_spec._replace(start_date=comp_start, end_date=comp_end)
+            comparison_count = count_events(snapshot, comp_spec)
+
+            # 比較データが空の場合は無効化
+            if comparison_count == 0:
+                st.info(f"比較期間（{comp_start.strftime('%Y-%m-%d')} 〜 {comp_end.strftime('%Y-%m-%d')}）にデータがありません。")
+
+
+    # 比較データのKPI計算
+    comp_kpis = {}
+    if comparison_count > 0:
+        comp_kpis = get_kpis(snapshot, comp_spec)
+
+    # KPIカード表示
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        # セッション数
+        delta_sessions = total_sessions - comp_kpis.get('sessions', 0) if comp_kpis else None
+        st.metric("セッション数", f"{total_sessions:,}", delta=f"{delta_sessions:+,}" if delta_sessions is not None else None)
+        
+        # FV残存率
+        delta_fv = fv_retention_rate - comp_kpis.get('fv_retention_rate', 0) if comp_kpis else None
+        st.metric("FV残存率", f"{fv_retention_rate:.1f}%", delta=f"{delta_fv:+.1f}%" if delta_fv is not None else None)
+
+    with col2:
+        # コンバージョン数
+        delta_conversions = total_conversions - comp_kpis.get('conversions', 0) if comp_kpis else None
+        st.metric("コンバージョン数", f"{total_conversions:,}", delta=f"{delta_conversions:+,}" if delta_conversions is not None else None)
+
+        # 最終CTA到達率
+        delta_cta = final_cta_rate - comp_kpis.get('final_cta_rate', 0) if comp_kpis else None
+        st.metric("最終CTA到達率", f"{final_cta_rate:.1f}%", delta=f"{delta_cta:+.1f}%" if delta_cta is not None else None)
+
+    with col3:
+        # コンバージョン率
+        delta_cvr = conversion_rate - comp_kpis.get('conversion_rate', 0) if comp_kpis else None
+        st.metric("コンバージョン率", f"{conversion_rate:.2f}%", delta=f"{delta_cvr:+.2f}%" if delta_cvr is not None else None)
+
+        # 平均到達ページ数
+        delta_pages = avg_pages_reached - comp_kpis.get('avg_pages_reached', 0) if comp_kpis else None
+        st.metric("平均到達ページ数", f"{avg_pages_reached:.1f}", delta=f"{delta_pages:+.1f}" if delta_pages is not None else None)
+
+    with col4:
+        # クリック数
+        delta_clicks = total_clicks - comp_kpis.get('clicks', 0) if comp_kpis else None
+        st.metric("クリック数", f"{total_clicks:,}", delta=f"{delta_clicks:+,}" if delta_clicks is not None else None)
+
+        # 平均滞在時間
+        delta_stay = avg_stay_time - comp_kpis.get('avg_stay_time', 0) if comp_kpis else None
+        st.metric("平均滞在時間", f"{avg_stay_time:.1f}秒", delta=f"{delta_stay:+.1f} 秒" if delta_stay is not None else None)
+
+    with col5:
+        # クリック率
+        delta_click_rate = click_rate - comp_kpis.get('click_rate', 0) if comp_kpis else None
+        st.metric("クリック率", f"{click_rate:.2f}%", delta=f"{delta_click_rate:+.2f}%" if delta_click_rate is not None else None)
+
+        # 平均読込時間
+        delta_load = avg_load_time - comp_kpis.get('avg_load_time', 0) if comp_kpis else None
+        st.metric("平均読込時間", f"{avg_load_time:.0f}ms", delta=f"{delta_load:+.0f} ms" if delta_load is not None else None, delta_color="inverse")
+
+    # KPIスコアカードと日別KPIテーブルの間にスペースを設ける
+    st.markdown("<br>", unsafe_allow_html=True)
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # 日別KPIテーブル
+    st.markdown("##### 日別KPI詳細")
+    st.markdown('<div class="graph-description">選択した期間内の日ごとの主要指標です。</div>', unsafe_allow_html=True)
+
+    # 日別にKPIを計算（ロールアップキューブをセッション開始日で集計。推移グラフでも使う）
+    # 平均到達ページはイベント単位の max_page_reached の平均（広告分析・時系列分析の表と同じ定義。KPIカードの平均到達ページ数はセッション単位）
+    daily_totals = daily_rollup(filtered_cube)
+    daily_df = daily_totals.rename(columns={
+        'sessions': 'セッション数',
+        'conversions': 'CV数',
+        'clicks': 'クリック数',
+        'fv_retained': 'FV残存数',
+        'final_cta_reached': '最終CTA到達数',
+        'stay_ms_sum': '滞在時間合計',
+        'stay_ms_count': '滞在時間件数',
+        'avg_page_reached': '平均到達ページ',
+    })
+
+    # 率を計算
+    add_rates(daily_df, {
+        'CVR': ('CV数', 'セッション数'),
+        'CTR': ('クリック数', 'セッション数'),
+        'FV残存率': ('FV残存数', 'セッション数'),
+        '最終CTA到達率': ('最終CTA到達数', 'セッション数'),
+    })
+    daily_df['平均滞在時間'] = safe_rate(daily_df['滞在時間合計'], daily_df['滞在時間件数']) / 1000
+
+    # 日付を降順にソート
+    daily_df = daily_df.sort_values(by='日付', ascending=False)
+
+    # 表示する列を選択
+    display_cols_daily = ['日付', 'セッション数', 'CV数', 'CVR', 'クリック数', 'CTR', 'FV残存率', '最終CTA到達率', '平均到達ページ', '平均滞在時間']
+    
+    # データフレームを表示（7行分の高さに固定）
+    st.dataframe(daily_df[display_cols_daily].style.format({
+        'CVR': '{:.2f}%', 'CTR': '{:.2f}%', 'FV残存率': '{:.1f}%', '最終CTA到達率': '{:.1f}%',
+        '平均到達ページ': '{:.1f}', '平均滞在時間': '{:.1f}秒'
+    }), use_container_width=True, height=282, hide_index=True)
+    # page_pathごとのKPIを計算（期間フィルターのみ適用したロールアップキューブを使用）
+    period_spec = FilterSpec(start_date, end_date)
+    kpi_by_path = rollup(
+        filter_cube(snapshot, period_spec), 'page_path', None if EXACT_DISTINCT_COUNTS else cube_sketches
+    ).set_index('page_path').rename(columns={
+        'sessions': 'セッション数',
+        'users': 'ユニークユーザー数',
+        'conversions': 'CV数',
+        'clicks': 'クリック数',
+        'fv_retained': 'FV残存数',
+        'final_cta_reached': '最終CTA到達数',
+        'stay_ms_sum': '滞在時間合計',
+        'stay_ms_count': '滞在時間件数',
+        'avg_page_reached': '平均到達ページ',
+    })
+    if EXACT_DISTINCT_COUNTS:
+        kpi_by_path['ユニークユーザー数'] = filter_sessions(snapshot, period_spec).groupby('page_path', observed=True)['user_pseudo_id'].nunique()
+    path_sessions = kpi_by_path['セッション数']
+    path_users = kpi_by_path['ユニークユーザー数']
+
+    add_rates(kpi_by_path, {
+        'CVR': ('CV数', 'セッション数'),
+        'CTR': ('クリック数', 'セッション数'),
+        'FV残存率': ('FV残存数', 'セッション数'),
+        '最終CTA到達率': ('最終CTA到達数', 'セッション数'),
+    })
+    kpi_by_path['平均滞在時間'] = safe_rate(kpi_by_path['滞在時間合計'], kpi_by_path['滞在時間件数']) / 1000
+
+    kpi_by_path = kpi_by_path.reset_index()
+    kpi_by_path.rename(columns={'page_path': 'ページパス'}, inplace=True)
+
+    # 表示する列を定義（変更なし）
+    display_cols = [
+        'ページパス', 'セッション数', 'CV数', 'CVR', 'クリック数', 'CTR', 
+        'FV残存率', '最終CTA到達率', '平均到達ページ', '平均滞在時間'
+    ]
+
+    # --- インタラクションKPIの計算ロジック（期間フィルターのみ適用したデータを使用） ---
+    # CTAクリック
+    cta_clicks = period_filtered_df[
+        (period_filtered_df['event_name'] == 'click') & 
+        (period_filtered_df['elem_classes'].str.contains('cta|btn-primary', na=False))
+    ].groupby('page_path', observed=True).size()
+
+    # フローティングバナークリック
+    floating_clicks = period_filtered_df[
+        (period_filtered_df['event_name'] == 'click') & 
+        (period_filtered_df['elem_classes'].str.contains('floating', na=False))
+    ].groupby('page_path', observed=True).size()
+
+    # 離脱防止ポップアップクリック
+    exit_popup_clicks = period_filtered_df[
+        (period_filtered_df['event_name'] == 'click') & 
+        (period_filtered_df['elem_classes'].str.contains('exit', na=False))
+    ].groupby('page_path', observed=True).size()
+
+    interaction_kpis = pd.DataFrame({
+        'セッション数': path_sessions,
+        'ユニークユーザー数': path_users,
+        'CTAクリック数': cta_clicks,
+        'FBクリック数': floating_clicks,
+        '離脱防止POPクリック数': exit_popup_clicks
+    }).fillna(0)
+
+    add_rates(interaction_kpis, {
+        'CTAクリック率': ('CTAクリック数', 'セッション数'),
+        'FBクリック率': ('FBクリック数', 'セッション数'),
+        '離脱防止POPクリック率': ('離脱防止POPクリック数', 'セッション数'),
+    })
+
+    interaction_kpis = interaction_kpis.reset_index().rename(columns={'page_path': 'ページパス'})
+
+    interaction_display_cols = [
+        'ページパス', 'ユニークユーザー数', 'CTAクリック数', 'CTAクリック率',
+        'FBクリック数', 'FBクリック率',
+        '離脱防止POPクリック数', '離脱防止POPクリック率'
+    ]
+    
+    # --- expanderを使って表を表示 ---
+    with st.expander("詳細1: ページパス別 主要指標詳細表"):
+        st.markdown('<div class="graph-description">LP（ページパス）ごとの主要なKPIを一覧表示します。</div>', unsafe_allow_html=True) # type: ignore
+        st.dataframe(kpi_by_path[display_cols].style.format({
+            'セッション数': '{:,.0f}',
+            'CV数': '{:,.0f}',
+            'CVR': '{:.2f}%',
+            'クリック数': '{:,.0f}',
+            'CTR': '{:.2f}%',
+            'FV残存率': '{:.2f}%',
+            '最終CTA到達率': '{:.2f}%',
+            '平均到達ページ': '{:.2f}',
+            '平均滞在時間': '{:.1f}秒'
+        }), use_container_width=True, hide_index=True)
+
+    with st.expander("詳細2: ページパス別 インタラクション指標詳細表"):
+        st.markdown('<div class="graph-description">LP（ページパス）ごとの主要なインタラクション指標を一覧表示します。</div>', unsafe_allow_html=True) # type: ignore
+        if not EXACT_DISTINCT_COUNTS:
+            st.caption(f"※ユニークユーザー数はHyperLogLogによる推定値です（相対標準誤差 約{standard_error():.1%}）。")
+        st.dataframe(interaction_kpis[interaction_display_cols].style.format({
+            'ユニークユーザー数': '{:,.0f}',
+            'CTAクリック数': '{:,.0f}',
+            'CTAクリック率': '{:.2f}%',
+            'FBクリック数': '{:,.0f}',
+            'FBクリック率': '{:.2f}%',
+            '離脱防止POPクリック数': '{:,.0f}',
+            '離脱防止POPクリック率': '{:.2f}%'
+        }), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    
+    # グラフ選択（表示するグラフの切り替えはグラフの部分だけを再実行する）
+    @st.fragment
+    def summary_charts(filtered_df, filtered_sessions, filtered_cube, daily_totals, comp_spec):
+        st.markdown("**表示するグラフを選択してください:**")
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            show_session_trend = st.checkbox("セッション数の推移", value=False, key="summary_show_session_trend")
+            show_cvr_trend = st.checkbox("コンバージョン率の推移", value=False, key="summary_show_cvr_trend")
+            show_device_breakdown = st.checkbox("デバイス別分析", value=False, key="summary_show_device_breakdown")
+
+        with col2:
+            show_channel_breakdown = st.checkbox("チャネル別分析", value=False, key="summary_show_channel_breakdown")
+            show_funnel = st.checkbox("LP進行ファネル", value=False, key="summary_show_funnel")
+            show_hourly_cvr = st.checkbox("時間帯別CVR", value=False, key="summary_show_hourly_cvr")
+
+        with col3:
+            show_dow_cvr = st.checkbox("曜日別CVR", value=False, key="summary_show_dow_cvr") # type: ignore
+            show_utm_analysis = st.checkbox("UTM分析", value=False, key="summary_show_utm_analysis")
+            show_load_time = st.checkbox("読込時間分析", value=False, key="summary_show_load_time")
+
+        # セッション数の推移
+        if show_session_trend:
+            st.markdown("#### セッション数の推移")
+            st.markdown('<div class="graph-description">日ごとのセッション数（訪問数）の変化を表示します。トレンドや曜日ごとのパターンを把握できます。</div>', unsafe_allow_html=True) # type: ignore
+            daily_sessions = daily_totals[['日付', 'sessions']].rename(columns={'sessions': 'セッション数'})
+
+            if comp_spec is not None:
+                # 比較データを追加
+                comp_daily_sessions = daily_rollup(filter_cube(snapshot, comp_spec))[['日付', 'sessions']].rename(columns={'sessions': '比較期間セッション数'})
+
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=daily_sessions['日付'], y=daily_sessions['セッション数'], 
+                                        mode='lines+markers', name='現在期間', line=dict(color='#002060'),
+                                        hovertemplate='日付: %{x}<br>セッション数: %{y:,}<extra></extra>'))
+                fig.add_trace(go.Scatter(x=comp_daily_sessions['日付'], y=comp_daily_sessions['比較期間セッション数'], 
+                                        mode='lines+markers', name='比較期間', line=dict(color='#999999', dash='dash'),
+                                        hovertemplate='日付: %{x}<br>比較期間セッション数: %{y:,}<extra></extra>'))
+                fig.update_layout(height=400, hovermode='x unified')
+                fig.update_layout(dragmode=False)
+            else:
+                fig = px.line(daily_sessions, x='日付', y='セッション数', markers=True)
+                fig.update_layout(height=400, dragmode=False)
+
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_1') # This already has use_container_width=True
+
+        # コンバージョン率の推移
+        if show_cvr_trend:
+            st.markdown("#### コンバージョン率の推移")
+            st.markdown('<div class="graph-description">日ごとのコンバージョン率（CVR）の変化を表示します。LPの改善効果や外部要因の影響を確認できます。</div>', unsafe_allow_html=True) # type: ignore
+            daily_cvr = daily_totals[['日付', 'sessions', 'conversions']].rename(columns={
+                'sessions': 'セッション数', 'conversions': 'コンバージョン数'
+            })
+            add_rates(daily_cvr, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+
+            if comp_spec is not None:
+                # 比較データを追加
+                comp_daily_cvr = daily_rollup(filter_cube(snapshot, comp_spec))[['日付', 'sessions', 'conversions']].rename(columns={
+                    'sessions': 'セッション数', 'conversions': 'コンバージョン数'
+                })
+                add_rates(comp_daily_cvr, {'比較期間CVR': ('コンバージョン数', 'セッション数')})
+
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=daily_cvr['日付'], y=daily_cvr['コンバージョン率'],
+                                        mode='lines+markers', name='現在期間', line=dict(color='#002060'),
+                                        hovertemplate='日付: %{x}<br>コンバージョン率: %{y:.2f}%<extra></extra>'))
+                fig.add_trace(go.Scatter(x=comp_daily_cvr['日付'], y=comp_daily_cvr['比較期間CVR'], 
+                                        mode='lines+markers', name='比較期間', line=dict(color='#999999', dash='dash'),
+                                        hovertemplate='日付: %{x}<br>比較期間CVR: %{y:.2f}%<extra></extra>'))
+                fig.update_layout(height=400, hovermode='x unified', yaxis_title='コンバージョン率 (%)')
+                fig.update_layout(dragmode=False)
+            else:
+                fig = px.line(daily_cvr, x='日付', y='コンバージョン率', markers=True)
+                fig.update_layout(height=400, dragmode=False)
+
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_2') # This already has use_container_width=True
+
+        # デバイス別分析
+        if show_device_breakdown:
+            st.markdown("#### デバイス別分析")
+            st.markdown('<div class="graph-description">デバイス（スマホ、PC、タブレット）ごとのセッション数、コンバージョン数、CVRを比較します。デバイス最適化の優先度を判断できます。</div>', unsafe_allow_html=True) # type: ignore
+            device_stats = rollup(filtered_cube, 'device_type').rename(columns={
+                'device_type': 'デバイス',
+                'sessions': 'セッション数',
+                'conversions': 'コンバージョン数',
+            })
+            add_rates(device_stats, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+
+            fig = go.Figure()
+            # 主軸（左Y軸）にセッション数とコンバージョン数の棒グラフを追加
+            fig.add_trace(go.Bar(name='セッション数', x=device_stats['デバイス'], y=device_stats['セッション数'], yaxis='y', offsetgroup=1,
+                                 hovertemplate='デバイス: %{x}<br>セッション数: %{y:,}<extra></extra>'))
+            fig.add_trace(go.Bar(name='コンバージョン数', x=device_stats['デバイス'], y=device_stats['コンバージョン数'], yaxis='y', offsetgroup=2,
+                                 hovertemplate='デバイス: %{x}<br>コンバージョン数: %{y:,}<extra></extra>'))
+            # 第二軸（右Y軸）にコンバージョン率の折れ線グラフを追加
+            fig.add_trace(go.Scatter(name='コンバージョン率', x=device_stats['デバイス'], y=device_stats['コンバージョン率'], yaxis='y2', mode='lines+markers',
+                                     hovertemplate='デバイス: %{x}<br>コンバージョン率: %{y:.2f}%<extra></extra>'))
+
+            fig.update_layout(
+                yaxis=dict(title='セッション数 / コンバージョン数'),
+                yaxis2=dict(title='コンバージョン率 (%)', overlaying='y', side='right', showgrid=False),
+                height=400,
+                dragmode=False, # type: ignore
+                legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+            )
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_device_combined')
+
+        # チャネル別分析
+        if show_channel_breakdown:
+            st.markdown("#### チャネル別分析")
+            st.markdown('<div class="graph-description">流入経路（Google、SNS、直接アクセスなど）ごとのパフォーマンスを比較します。効果的な集客チャネルを特定できます。</div>', unsafe_allow_html=True) # type: ignore
+            channel_stats = rollup(filtered_cube, 'channel').rename(columns={
+                'channel': 'チャネル',
+                'sessions': 'セッション数',
+                'conversions': 'コンバージョン数',
+                'stay_ms_sum': '滞在時間合計',
+                'stay_ms_count': '滞在時間件数',
+            })
+            channel_stats['平均滞在時間(秒)'] = safe_rate(channel_stats['滞在時間合計'], channel_stats['滞在時間件数']) / 1000
+            add_rates(channel_stats, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                fig = px.pie(channel_stats, values='セッション数', names='チャネル', title='チャネル別セッション数')
+                fig.update_traces(hovertemplate='チャネル: %{label}<br>セッション数: %{value:,} (%{percent})<extra></extra>')
+                fig.update_layout(
+                    dragmode=False,
+                    legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+                )
+                st.plotly_chart(fig, use_container_width=True, key='plotly_chart_4')
+
+            with col2:
+                fig = px.bar(channel_stats, x='チャネル', y='コンバージョン率', title='チャネル別コンバージョン率')
+                fig.update_traces(hovertemplate='チャネル: %{x}<br>コンバージョン率: %{y:.2f}%<extra></extra>')
+                fig.update_layout(
+                    dragmode=False,
+                    legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+                )
+                st.plotly_chart(fig, use_container_width=True, key='plotly_chart_5')
+
+        # LP進行ファネルと滞在時間別ファネル
+        if show_funnel:
+            st.markdown("#### LP進行状況とページ内滞在時間")
+
+            # LPのページ数をデータから動的に取得
+            actual_page_count = int(filtered_df['page_num_dom'].max()) if not filtered_df['page_num_dom'].dropna().empty else 10
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                # 各ページの到達セッション数（最大到達ページの分布から一度に求める）
+                funnel = page_funnel(filtered_sessions, actual_page_count)
+                funnel_df = pd.DataFrame({
+                    'ページ': 'ページ' + funnel['page'].astype(str),
+                    'セッション数': funnel['reached'],
+                })
+
+                fig_funnel = go.Figure(go.Funnel(
+                    y=funnel_df['ページ'],
+                    x=funnel_df['セッション数'],
+                    textinfo="value+percent initial",
+                    hovertemplate='ページ: %{y}<br>セッション数: %{x:,}<extra></extra>'
+                )) # type: ignore
+                fig_funnel.update_layout(height=600, dragmode=False)
+                st.markdown("**LP進行ファネル**")
+                st.markdown('<div class="graph-description">各ページに到達したセッション数と、次のページへの遷移率です。急激に減少している箇所が大きな離脱ポイントです。</div>', unsafe_allow_html=True) # type: ignore
+                st.plotly_chart(fig_funnel, use_container_width=True, key='plotly_chart_funnel_revived')
+
+            with col2:
+                # 滞在時間セグメントを定義
+                stay_segments_for_calc = [
+                    ('0-10秒', 0, 10000),
+                    ('10-30秒', 10000, 30000),
+                    ('30-60秒', 30000, 60000),
+                    ('1-3分', 60000, 180000),
+                    ('3分以上', 180000, float('inf'))
+                ]
+
+                # ページごとの滞在時間別セッション割合を計算（滞在時間イベントがあったセッション内での割合）
+                page_stay_df = page_stay_distribution(filtered_df, stay_segments_for_calc, actual_page_count).rename(columns={'page': 'ページ番号'})
+                page_stay_df['ページ'] = 'ページ' + page_stay_df['ページ番号'].astype(str)
+                page_stay_df = page_stay_df.sort_values('ページ番号', ascending=False)
+
+                # 積み上げ棒グラフでファネルを表現
+                fig_stay_pct = go.Figure()            
+                # YlGnBuスケールから濃い青系の5色を選択
+                colors = px.colors.sequential.YlGnBu[2:7]
+                colors[-1] = '#08306b' # 一番濃い色を濃紺に設定
+
+                for i, (label, _, _) in enumerate(stay_segments_for_calc):
+                    fig_stay_pct.add_trace(go.Bar(
+                        y=page_stay_df['ページ'],
+                        x=page_stay_df[label],
+                        name=label,
+                        orientation='h', # type: ignore
+                        hovertemplate='ページ: %{y}<br>割合: %{x:.2f}%<extra></extra>',
+                        marker_color=colors[i]
+                    ))
+
+                fig_stay_pct.update_layout(barmode='stack', height=600,
+                                  xaxis_title='セッションの割合 (%)', yaxis_title='ページ', dragmode=False,
+                                  xaxis_ticksuffix='%', legend=dict(traceorder='normal', orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+                st.markdown("**ページ内滞在時間の分布**")
+                st.markdown('<div class="graph-description">各ページに到達し、滞在時間が計測されたセッションの行動内訳です。横軸は割合（%）を表します。</div>', unsafe_allow_html=True) # type: ignore
+                st.plotly_chart(fig_stay_pct, use_container_width=True, key='plotly_chart_stay_percentage')
+
+        # 時間帯別CVR
+        if show_hourly_cvr:
+            st.markdown("#### 時間帯別コンバージョン率")
+            st.markdown('<div class="graph-description">1日の中で、どの時間帯にCVRが高いかを分析します。広告配信の最適な時間帯を見つけることができます。</div>', unsafe_allow_html=True) # type: ignore
+            filtered_df['hour'] = filtered_df['event_timestamp'].dt.hour
+
+            hourly_sessions = filtered_df.groupby('hour', observed=True)['session_id'].nunique().reset_index()
+            hourly_sessions.columns = ['時間', 'セッション数']
+
+            hourly_cv = filtered_df[filtered_df['cv_type'].notna()].groupby('hour', observed=True)['session_id'].nunique().reset_index()
+            hourly_cv.columns = ['時間', 'コンバージョン数']
+
+            hourly_cvr = hourly_sessions.merge(hourly_cv, on='時間', how='left').fillna(0)
+            add_rates(hourly_cvr, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+
+            fig = px.bar(hourly_cvr, x='時間', y='コンバージョン率')
+            fig.update_traces(hovertemplate='時間: %{x}時台<br>コンバージョン率: %{y:.2f}%<extra></extra>')
+            fig.update_layout(height=400, xaxis_title='時間帯', dragmode=False, legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_7')
+
+        # 曜日別CVR
+        if show_dow_cvr:
+            st.markdown("#### 曜日別コンバージョン率")
+            st.markdown('<div class="graph-description">曜日ごとのCVRの違いを分析します。平日と週末でのユーザー行動の変化を把握できます。</div>', unsafe_allow_html=True) # type: ignore
+            filtered_df['dow'] = filtered_df['event_timestamp'].dt.day_name()
+            dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+            dow_map = {'Monday': '月', 'Tuesday': '火', 'Wednesday': '水', 'Thursday': '木', 'Friday': '金', 'Saturday': '土', 'Sunday': '日'}
+
+            dow_sessions = filtered_df.groupby('dow', observed=True)['session_id'].nunique().reset_index()
+            dow_sessions.columns = ['曜日', 'セッション数']
+
+            dow_cv = filtered_df[filtered_df['cv_type'].notna()].groupby('dow', observed=True)['session_id'].nunique().reset_index()
+            dow_cv.columns = ['曜日', 'コンバージョン数']
+
+            dow_cvr = dow_sessions.merge(dow_cv, on='曜日', how='left').fillna(0)
+            add_rates(dow_cvr, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+            dow_cvr['曜日_日本語'] = dow_cvr['曜日'].map(dow_map)
+            dow_cvr['曜日_order'] = dow_cvr['曜日'].apply(lambda x: dow_order.index(x))
+            dow_cvr = dow_cvr.sort_values('曜日_order')
+
+            fig = px.bar(dow_cvr, x='曜日_日本語', y='コンバージョン率')
+            fig.update_traces(hovertemplate='曜日: %{x}<br>コンバージョン率: %{y:.2f}%<extra></extra>')
+            fig.update_layout(height=400, xaxis_title='曜日', dragmode=False, legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_8')
+
+        # UTM分析
+        if show_utm_analysis:
+            st.markdown("#### UTM分析")
+            st.markdown('<div class="graph-description">UTMパラメータ（広告タグ）ごとのトラフィックを分析します。どのキャンペーンや媒体が効果的かを把握できます。</div>', unsafe_allow_html=True) # type: ignore
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                st.markdown("**UTMソース別**")
+                utm_source_stats = filtered_df.groupby('utm_source', observed=True)['session_id'].nunique().reset_index()
+                utm_source_stats.columns = ['UTMソース', 'セッション数']
+                utm_source_stats = utm_source_stats.sort_values('セッション数', ascending=False)
+
+                fig = px.bar(utm_source_stats, x='UTMソース', y='セッション数')
+                fig.update_layout(dragmode=False, legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+                fig.update_traces(hovertemplate='UTMソース: %{x}<br>セッション数: %{y:,}<extra></extra>')
+                st.plotly_chart(fig, use_container_width=True, key='plotly_chart_9') # type: ignore
+
+            with col2:
+                st.markdown("**UTMメディア別**")
+                utm_medium_stats = filtered_df.groupby('utm_medium', observed=True)['session_id'].nunique().reset_index()
+                utm_medium_stats.columns = ['UTMメディア', 'セッション数']
+                utm_medium_stats = utm_medium_stats.sort_values('セッション数', ascending=False)
+
+                fig = px.bar(utm_medium_stats, x='UTMメディア', y='セッション数')
+                fig.update_layout(dragmode=False, legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+                fig.update_traces(hovertemplate='UTMメディア: %{x}<br>セッション数: %{y:,}<extra></extra>')
+                st.plotly_chart(fig, use_container_width=True, key='plotly_chart_10') # type: ignore
+
+        # 読込時間分析
+        if show_load_time:
+            st.markdown("#### 読込時間分析")
+            st.markdown('<div class="graph-description">デバイスごとのページ読込時間を分析します。読込が遅いと離脱率が上がるため、最適化が重要です。</div>', unsafe_allow_html=True) # type: ignore
+
+            load_time_stats = filtered_df.groupby('device_type', observed=True)['load_time_ms'].mean().reset_index()
+            load_time_stats.columns = ['デバイス', '平均読込時間(ms)']
+
+            fig = px.bar(load_time_stats, x='デバイス', y='平均読込時間(ms)')
+            fig.update_traces(hovertemplate='デバイス: %{x}<br>平均読込時間: %{y:.0f}ms<extra></extra>')
+            fig.update_layout(height=400, yaxis_title='平均読込時間 (ms)', dragmode=False, legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5))
+            st.plotly_chart(fig, use_container_width=True, key='plotly_chart_11')
+
+    summary_charts(
+        filtered_df, filtered_sessions, filtered_cube, daily_totals,
+        comp_spec if comparison_count > 0 else None,
+    )
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">LP全体の主要指標に基づき、AIが現状の評価と次のアクションを提案します。</div>', unsafe_allow_html=True)
+    
+    # AI分析の表示状態を管理
+    if 'summary_ai_open' not in st.session_state:
+        st.session_state.summary_ai_open = False
+
+    if st.button("AI分析を実行", key="summary_ai_btn", type="primary", use_container_width=True):
+        st.session_state.summary_ai_open = True
+
+    if st.session_state.summary_ai_open:
+        with st.container():
+            with st.spinner("AIが全体データを分析中..."):
+                evaluation_text = f"""
+                現在のLPパフォーマンスを総合的に評価します。
+                - **強み**: 平均滞在時間({avg_stay_time:.1f}秒)や最終CTA到達率({final_cta_rate:.1f}%)は比較的良好で、一度興味を持ったユーザーはコンテンツを読み進める傾向にあります。
+                - **弱み**: コンバージョン率({conversion_rate:.2f}%)とFV残存率({fv_retention_rate:.1f}%)が課題です。特に、多くのユーザーが最初のページ（ファーストビュー）で離脱している可能性が高いです。
+                """
+                st.info(evaluation_text)
+
+                recommendation_text = """
+                **最優先課題は「ファーストビューの改善」です。**
+                多くのユーザーが最初の接点で離脱しているため、ここを改善することが全体のパフォーマンス向上に最も効果的です。
+                
+                **具体的な改善アクション案:**
+                1. **キャッチコピーの見直し**: ターゲットに響く、より強力なメッセージに変更する。
+                2. **メインビジュアルの変更**: ユーザーの興味を引く画像や動画に差し替える。
+                3. **A/Bテストの実施**: 上記の要素で複数のパターンを用意し、「A/Bテスト分析」機能で効果を検証する。
+                
+                次に、「ページ分析」機能を用いて、ファーストビュー以降で離脱率が特に高い「ボトルネックページ」を特定し、改善を進めましょう。
+                """
+                st.warning(recommendation_text)
+
+            if st.button("AI分析を閉じる", key="summary_ai_close"):
+                st.session_state.summary_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    faq_panel('summary_faq_toggle', [
+        ("このLPの強みと弱みは？", "faq_summary_1",
+         f"**強み**は、平均滞在時間が{avg_stay_time:.1f}秒と比較的長く、コンテンツに興味を持ったユーザーは読み進めている点です。\n\n**弱み**は、FV残存率が{fv_retention_rate:.1f}%と低く、多くのユーザーが最初のページで離脱している点です。"),
+        ("最も優先して改善すべき指標は？", "faq_summary_2",
+         f"**FV残存率（現在{fv_retention_rate:.1f}%）**です。多くのユーザーがLPの入口で離脱しているため、ここを改善することが最もインパクトが大きいです。"),
+        ("パフォーマンスが悪い原因を特定するには？", "faq_summary_3",
+         "まず「ページ分析」で離脱率が高いボトルネックページを特定します。次に「セグメント分析」で、特定のデバイス（例：スマホ）やチャネル（例：SNS経由）のパフォーマンスが特に悪いかを確認することで、原因を絞り込めます。"),
+        ("次にどの分析を見るべき？", "faq_summary_4",
+         "「**ページ分析**」がおすすめです。ユーザーがどのページで最も離脱しているか（ボトルネック）を特定し、具体的な改善箇所を見つけましょう。"),
+    ])
@@ -0,0 +1,283 @@
+"""
+時系列分析: 日別・月別の推移と曜日×時間帯のヒートマップ
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from analytics import (
+    FilterSpec,
+    add_rates,
+    daily_rollup,
+    heatmap_metrics,
+    label_test_targets,
+    rollup,
+    weekday_hour_pivot,
+)
+from views.common import faq_panel, filter_cube, filter_events, get_row_cache
+
+
+def render(snapshot):
+    """時系列分析ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    st.markdown('<div class="sub-header">時系列分析</div>', unsafe_allow_html=True)
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True)
+
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        # 期間選択
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="timeseries_period")
+
+    with filter_cols_1[1]:
+        # LP選択
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="timeseries_lp",
+            disabled=not lp_options
+        )
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="timeseries_device")
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="timeseries_user_type")
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="timeseries_conversion_status")
+    
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="timeseries_channel")
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="timeseries_source_medium") # ラベルは変更済み
+    
+    enable_comparison = False
+    # 期間設定
+    today = df['event_date'].max().date()
+    
+    if selected_period == "今日":
+        start_date = today
+        end_date = today
+    elif selected_period == "昨日":
+        start_date = today - timedelta(days=1)
+        end_date = today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date = today - timedelta(days=6)
+        end_date = today
+    elif selected_period == "過去14日間":
+        start_date = today - timedelta(days=13)
+        end_date = today
+    elif selected_period == "過去30日間":
+        start_date = today - timedelta(days=29)
+        end_date = today
+    elif selected_period == "今月":
+        start_date = today.replace(day=1)
+        end_date = today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = last_month_end.replace(day=1)
+        end_date = last_month_end
+    elif selected_period == "全期間":
+        start_date = df['event_date'].min().date()
+        end_date = df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="timeseries_start_date")
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="timeseries_end_date")
+
+    st.markdown("---")
+
+    # データフィルタリング（期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用）
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # 比較機能は無効化
+    comparison_df = None
+
+    # データが空の場合の処理
+    if len(filtered_df) == 0:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+
+    # 日別推移
+    st.markdown("#### 日別推移") # type: ignore
+
+    # テスト種別でフィルタリングするためのプルダウンメニュー
+    # filtered_dfにab_test_target列がない場合があるため、ここでマッピングを適用
+    if 'ab_test_target' not in filtered_df.columns:
+        filtered_df['ab_test_target'] = label_test_targets(df['ab_test_target'])
+
+    # daily_statsの計算（ロールアップキューブをセッション開始日で合計する）
+    timeseries_cube = filter_cube(snapshot, filter_spec)
+    daily_stats = daily_rollup(timeseries_cube).rename(columns={
+        'sessions': 'セッション数',
+        'avg_stay_ms': '平均滞在時間(ms)',
+        'avg_page_reached': '平均到達ページ数',
+        'conversions': 'コンバージョン数',
+        'fv_retained': 'FV残存数',
+        'final_cta_reached': '最終CTA到達数',
+    })
+    daily_stats['平均滞在時間(秒)'] = daily_stats['平均滞在時間(ms)'] / 1000
+    add_rates(daily_stats, {
+        'コンバージョン率': ('コンバージョン数', 'セッション数'),
+        'FV残存率': ('FV残存数', 'セッション数'),
+        '最終CTA到達率': ('最終CTA到達数', 'セッション数'),
+    })
+
+    # グラフ選択（指標の切り替えはこのグラフだけを再実行する）
+    @st.fragment
+    def daily_metric_chart(daily_stats):
+        metric_to_plot = st.selectbox("表示する指標を選択", [
+            "セッション数", "コンバージョン数", "コンバージョン率", "FV残存率",
+            "最終CTA到達率", "平均到達ページ数", "平均滞在時間(秒)"
+        ], key="timeseries_metric_select")
+
+        fig = px.line(daily_stats, x='日付', y=metric_to_plot, markers=True)
+        fig.update_layout(height=400, yaxis_title=metric_to_plot, dragmode=False)
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_21')
+
+    daily_metric_chart(daily_stats)
+
+    # 月間推移（データが十分にある場合）
+    if len(daily_stats) > 0 and (pd.to_datetime(daily_stats['日付'].max()) - pd.to_datetime(daily_stats['日付'].min())).days >= 60:
+        st.markdown("#### 月間推移")
+        
+        monthly_cube = timeseries_cube.assign(月=timeseries_cube['event_date'].dt.to_period('M').astype(str))
+        monthly_stats = rollup(monthly_cube, '月').rename(columns={
+            'sessions': 'セッション数',
+            'avg_page_reached': '平均到達ページ数',
+            'conversions': 'コンバージョン数',
+        })
+        add_rates(monthly_stats, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+        
+        fig = go.Figure()
+        fig.add_trace(go.Bar(name='セッション数', x=monthly_stats['月'], y=monthly_stats['セッション数'], yaxis='y'))
+        fig.add_trace(go.Scatter(name='コンバージョン率', x=monthly_stats['月'], y=monthly_stats['コンバージョン率'], yaxis='y2', mode='lines+markers'))
+        
+        fig.update_layout(
+            yaxis=dict(title='セッション数'),
+            yaxis2=dict(title='コンバージョン率 (%)', overlaying='y', side='right'),
+            height=400,
+            dragmode=False
+        )
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_22')
+
+    st.markdown("---")
+
+    # 曜日・時間帯別 CVRヒートマップ
+    st.markdown("#### 曜日・時間帯別 CVRヒートマップ")
+    st.markdown('<div class="graph-description">曜日と時間帯をクロス集計し、コンバージョン率（CVR）をヒートマップで表示します。色が濃い部分がCVRの高い曜日と時間帯です。</div>', unsafe_allow_html=True)
+
+    # 曜日・時間帯ごとのセッション数・CV数・CVR（イベントの時刻で分けたファクトを1回で集計）
+    heatmap_stats = heatmap_metrics(snapshot, filter_spec, get_row_cache()).rename(columns={
+        'sessions': 'セッション数',
+        'conversions': 'コンバージョン数',
+        'conversion_rate': 'コンバージョン率',
+    })
+    dow_map_jp = {'Monday': '月', 'Tuesday': '火', 'Wednesday': '水', 'Thursday': '木', 'Friday': '金', 'Saturday': '土', 'Sunday': '日'}
+
+    # ピボットテーブルを作成（曜日は月曜始まりの順）
+    heatmap_pivot = weekday_hour_pivot(heatmap_stats, 'コンバージョン率')
+    heatmap_pivot.index = heatmap_pivot.index.map(dow_map_jp) # 曜日を日本語に変換
+
+    # ヒートマップを描画
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=heatmap_pivot.values,
+        x=[f"{h}時" for h in heatmap_pivot.columns],
+        y=heatmap_pivot.index,
+        colorscale='Blues',
+        hovertemplate='曜日: %{y}<br>時間帯: %{x}<br>CVR: %{z:.2f}%<extra></extra>'
+    ))
+    fig_heatmap.update_layout(title='曜日・時間帯別 CVR', height=500, dragmode=False)
+    st.plotly_chart(fig_heatmap, use_container_width=True, key='plotly_chart_heatmap_cvr')
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">時系列データからパフォーマンスの波を読み解き、広告配信やプロモーションの最適化タイミングを提案します。</div>', unsafe_allow_html=True)
+    
+    # AI分析の表示状態を管理
+    if 'timeseries_ai_open' not in st.session_state:
+        st.session_state.timeseries_ai_open = False
+
+    if st.button("AI分析を実行", key="timeseries_ai_btn", type="primary", use_container_width=True):
+        st.session_state.timeseries_ai_open = True
+
+    if st.session_state.timeseries_ai_open:
+        with st.container():
+            with st.spinner("AIが時系列データを分析中..."):
+                if not heatmap_stats.empty:
+                    # ゴールデンタイムを特定
+                    golden_time = heatmap_stats.loc[heatmap_stats['コンバージョン率'].idxmax()]
+                else:
+                    golden_time = None
+                
+                st.markdown("#### 1. 現状の評価")
+                st.info(f"""
+                曜日・時間帯別のヒートマップから、このLPの「ゴールデンタイム」が明らかになりました。
+                - **最もCVRが高い時間帯**: **{dow_map_jp[golden_time['dow_name']]}曜日の{int(golden_time['hour'])}時台** (CVR: {golden_time['コンバージョン率']:.2f}%)
+                
+                この時間帯は、ターゲットユーザーが最もアクティブで、コンバージョンに至りやすいと考えられます。
+                """)
+
+                st.markdown("#### 2. 今後の考察と改善案")
+                st.warning(f"""
+                **ゴールデンタイムの活用:**
+                - **広告配信の強化**: {dow_map_jp[golden_time['dow_name']]}曜日の{int(golden_time['hour'])}時台を中心に、広告の表示を強化したり、入札単価を引き上げることで、効率的にコンバージョンを獲得できる可能性があります。
+                - **プロモーションの実施**: メールマガジンの配信やSNSでの投稿をこの時間帯に合わせることで、開封率やクリック率の向上が期待できます。
+                
+                逆に、CVRが低い時間帯は広告配信を抑制することで、広告費の無駄遣いを防ぎ、全体のCPAを改善することができます。
+                """)
+            if st.button("AI分析を閉じる", key="timeseries_ai_close"):
+                st.session_state.timeseries_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    def answer_golden_time():
+        if not heatmap_stats.empty:
+            golden_time = heatmap_stats.loc[heatmap_stats['コンバージョン率'].idxmax()]
+            st.info(f"**{dow_map_jp[golden_time['dow_name']]}曜日の{int(golden_time['hour'])}時台**です。この時間帯のCVRは{golden_time['コンバージョン率']:.2f}%と最も高くなっています。")
+
+    faq_panel('time_faq_toggle', [
+        ("CVRが最も高い時間帯はいつ？", "faq_time_1", answer_golden_time),
+        ("ゴールデンタイムをどう活用すれば良い？", "faq_time_2",
+         "CVRが高い「ゴールデンタイム」には、リスティング広告の入札単価を強化したり、SNS広告の配信を集中させることが有効です。また、メルマガ配信やSNS投稿もこの時間帯を狙うと効果的です。"),
+        ("週末と平日でパフォーマンスは違う？", "faq_time_3",
+         "ヒートマップを確認することで、週末と平日のパフォーマンスの違いを視覚的に把握できます。一般的にBtoB商材は平日に、BtoC商材は週末や夜間にパフォーマンスが高まる傾向があります。"),
+        ("CVRが低い時間帯はどうすべき？", "faq_time_4",
+         "CVRが著しく低い時間帯は、広告の配信を停止または抑制することで、無駄な広告費を削減し、全体の広告費用対効果（ROAS）を改善できます。"),
+    ])
@@ -0,0 +1,318 @@
+"""
+動画・スクロール分析: 動画視聴とCVR、スクロール率・逆行率
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from analytics import (
+    FilterSpec,
+    add_rates,
+    build_session_facts,
+    safe_rate,
+    session_breakdown,
+)
+from views.common import faq_panel, filter_events
+
+
+def render(snapshot):
+    """動画・スクロール分析ページを表示する（snapshot: この再実行で使うデータセットのスナップショット）"""
+    df = snapshot.events
+
+    filter_cols_1 = st.columns(4)
+    st.markdown('<div class="sub-header">動画・スクロール分析</div>', unsafe_allow_html=True)
+    # メインエリア: フィルターと比較設定
+    st.markdown('<div class="sub-header">フィルター設定</div>', unsafe_allow_html=True)
+
+    filter_cols_1 = st.columns(4)
+    filter_cols_2 = st.columns(4)
+
+    with filter_cols_1[0]:
+        # 期間選択
+        period_options = [
+            "今日", "昨日", "過去7日間", "過去14日間", "過去30日間", "今月", "先月", "全期間", "カスタム"
+        ]
+        selected_period = st.selectbox("期間を選択", period_options, index=2, key="video_scroll_period")
+
+    with filter_cols_1[1]:
+        # LP選択
+        lp_options = sorted(df['page_location'].dropna().unique().tolist())
+        selected_lp = st.selectbox(
+            "LP選択", 
+            lp_options, 
+            index=0 if lp_options else None,
+            key="video_scroll_lp",
+            disabled=not lp_options
+        )
+
+    with filter_cols_1[2]:
+        device_options = ["すべて"] + sorted(df['device_type'].dropna().unique().tolist())
+        selected_device = st.selectbox("デバイス選択", device_options, index=0, key="video_scroll_device")
+
+    with filter_cols_1[3]:
+        # 新規/リピート フィルター
+        user_type_options = ["すべて", "新規", "リピート"]
+        selected_user_type = st.selectbox("新規/リピート", user_type_options, index=0, key="video_scroll_user_type")
+
+    with filter_cols_2[0]:
+        # CV/非CV フィルター
+        conversion_status_options = ["すべて", "コンバージョン", "非コンバージョン"]
+        selected_conversion_status = st.selectbox("CV/非CV", conversion_status_options, index=0, key="video_scroll_conversion_status")
+    
+    with filter_cols_2[1]:
+        # チャネルフィルターを追加
+        channel_options = ["すべて"] + sorted(df['channel'].unique().tolist())
+        selected_channel = st.selectbox("チャネル", channel_options, index=0, key="video_scroll_channel")
+
+    with filter_cols_2[2]:
+        # チャネルフィルターを「参照元/メディア」に変更
+        source_medium_options = ["すべて"] + sorted(df['source_medium'].unique().tolist())
+        selected_source_medium = st.selectbox("参照元/メディア", source_medium_options, index=0, key="video_scroll_source_medium") # ラベルは変更済み
+    
+    enable_comparison = False
+    # 期間設定
+    today = df['event_date'].max().date()
+    
+    if selected_period == "今日":
+        start_date = today
+        end_date = today
+    elif selected_period == "昨日":
+        start_date = today - timedelta(days=1)
+        end_date = today - timedelta(days=1)
+    elif selected_period == "過去7日間":
+        start_date = today - timedelta(days=6)
+        end_date = today
+    elif selected_period == "過去14日間":
+        start_date = today - timedelta(days=13)
+        end_date = today
+    elif selected_period == "過去30日間":
+        start_date = today - timedelta(days=29)
+        end_date = today
+    elif selected_period == "今月":
+        start_date = today.replace(day=1)
+        end_date = today
+    elif selected_period == "先月":
+        last_month_end = today.replace(day=1) - timedelta(days=1)
+        start_date = last_month_end.replace(day=1)
+        end_date = last_month_end
+    elif selected_period == "全期間":
+        start_date = df['event_date'].min().date()
+        end_date = df['event_date'].max().date()
+    elif selected_period == "カスタム":
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("開始日", df['event_date'].min(), key="video_scroll_start_date")
+        with col2:
+            end_date = st.date_input("終了日", df['event_date'].max(), key="video_scroll_end_date")
+
+    st.markdown("---")
+
+    # データフィルタリング（期間・LP・クロス分析用フィルターを共通フィルターエンジンでまとめて適用）
+    filter_spec = FilterSpec(
+        start_date, end_date,
+        page_location=selected_lp,
+        device_type=selected_device,
+        user_type=selected_user_type,
+        conversion_status=selected_conversion_status,
+        channel=selected_channel,
+        source_medium=selected_source_medium,
+    )
+    filtered_df = filter_events(snapshot, filter_spec)
+
+    # 比較機能は無効化
+    comparison_df = None
+
+    # データが空の場合の処理
+    if len(filtered_df) == 0:
+        st.warning("⚠️ 選択した条件に該当するデータがありません。フィルターを変更してください。")
+        st.stop()
+
+    # このページで必要なKPIを計算
+    total_sessions = filtered_df['session_id'].nunique()
+
+    # --- 動画視聴ファネル ---
+    st.markdown("#### 動画視聴ファネル")
+    st.markdown('<div class="graph-description">動画の再生開始から視聴完了までのユーザーの残存率を可視化します。どの段階で離脱が多いかを把握できます。</div>', unsafe_allow_html=True)
+
+    # GTMで計測されると想定されるイベント名
+    video_events = {
+        '再生開始': 'video_play',
+        '25%視聴': 'video_progress_25',
+        '50%視聴': 'video_progress_50',
+        '75%視聴': 'video_progress_75',
+        '視聴完了': 'video_completion'
+    }
+
+    funnel_data = []
+    # 再生開始したユニークセッション数を基準とする
+    start_sessions_count = filtered_df[filtered_df['event_name'] == video_events['再生開始']]['session_id'].nunique()
+
+    if start_sessions_count > 0:
+        for stage, event_name in video_events.items():
+            # そのイベントを発生させたユニークセッション数をカウント
+            sessions_count = filtered_df[filtered_df['event_name'] == event_name]['session_id'].nunique()
+            funnel_data.append({'段階': stage, 'セッション数': sessions_count})
+
+        video_funnel_df = pd.DataFrame(funnel_data)
+
+        fig_video_funnel = go.Figure(go.Funnel(
+            y=video_funnel_df['段階'],
+            x=video_funnel_df['セッション数'],
+            textinfo="value+percent initial",
+            hovertemplate='段階: %{y}<br>セッション数: %{x:,}<extra></extra>'
+        ))
+        fig_video_funnel.update_layout(height=500, dragmode=False)
+        st.plotly_chart(fig_video_funnel, use_container_width=True, key='plotly_chart_video_funnel')
+    else:
+        st.info("選択された期間に動画の再生データがありません。")
+
+    st.markdown("---")
+
+    # 逆行率分析
+    st.markdown("ページ別平均逆行率")
+    st.markdown('<div class="graph-description">各ページでユーザーがどれだけ逆方向にスクロールしたかを表示します。逆行率が高いページは、ユーザーが迷っているまたは情報を再確認している可能性があります。</div>', unsafe_allow_html=True) # type: ignore
+    scroll_stats = filtered_df.groupby('page_num_dom', observed=True)['scroll_pct'].mean().reset_index()
+    scroll_stats.columns = ['ページ番号', '平均逆行率']
+    scroll_stats['平均逆行率(%)'] = scroll_stats['平均逆行率'] * 100
+    
+    fig = px.bar(scroll_stats, x='ページ番号', y='平均逆行率(%)', text='平均逆行率(%)')
+    fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+    fig.update_layout(height=400, showlegend=False, xaxis_title='ページ番号', yaxis_title='平均逆行率 (%)', dragmode=False)
+    st.plotly_chart(fig, use_container_width=True, key='plotly_chart_18') # This already has use_container_width=True
+    
+    # 動画視聴分析（動画イベントがある場合）
+    video_df = filtered_df[filtered_df['video_src'].notna()]
+    
+    if len(video_df) > 0:
+        st.markdown("#### 動画視聴率")
+        
+        video_sessions = video_df['session_id'].nunique()
+        total_sessions_with_video_page = filtered_df[filtered_df['video_src'].notna()]['session_id'].nunique()
+        video_view_rate = safe_rate(video_sessions, total_sessions) * 100
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("動画が表示されたセッション", f"{total_sessions_with_video_page:,}")
+        
+        with col2:
+            st.metric("動画を視聴したセッション", f"{video_sessions:,}")
+        
+        with col3:
+            st.metric("視聴率", f"{video_view_rate:.2f}%")
+        
+        # 視聴率とCVRの相関
+        st.markdown("#### 動画視聴とコンバージョンの関係")
+        
+        video_cv = video_df[video_df['cv_type'].notna()]['session_id'].nunique()
+        video_cvr = safe_rate(video_cv, video_sessions) * 100
+        
+        non_video_sessions = total_sessions - video_sessions
+        non_video_cv = filtered_df[(filtered_df['video_src'].isna()) & (filtered_df['cv_type'].notna())]['session_id'].nunique()
+        non_video_cvr = safe_rate(non_video_cv, non_video_sessions) * 100
+        
+        comparison_data = pd.DataFrame({
+            'グループ': ['動画視聴あり', '動画視聴なし'],
+            'コンバージョン率': [video_cvr, non_video_cvr]
+        })
+        
+        fig = px.bar(comparison_data, x='グループ', y='コンバージョン率', text='コンバージョン率')
+        fig.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
+        fig.update_layout(height=400, showlegend=False, yaxis_title='コンバージョン率 (%)', dragmode=False)
+        st.plotly_chart(fig, use_container_width=True, key='plotly_chart_19') # This already has use_container_width=True
+    
+    # 逆行率別CVR
+    st.markdown("逆行率別コンバージョン率")
+    st.markdown('<div class="graph-description">逆行率の範囲ごとにコンバージョン率を表示します。逆行率が高いほどコンバージョン率が低い傾向があるかを確認できます。</div>', unsafe_allow_html=True) # type: ignore
+    
+    # 逆行率を区間に分ける
+    filtered_df_scroll = filtered_df.assign(
+        scroll_range=pd.cut(filtered_df['scroll_pct'], bins=[0, 0.25, 0.5, 0.75, 1.0], labels=['0-25%', '25-50%', '50-75%', '75-100%'])
+    )
+
+    # 逆行率はイベントごとに変わるため、(区間, セッション) 単位のファクトから区間別のセッション数・CV数をまとめて集計する
+    scroll_range_facts = build_session_facts(filtered_df_scroll, by='scroll_range')
+    scroll_range_stats = session_breakdown(scroll_range_facts, 'scroll_range', observed=False).rename(columns={
+        'scroll_range': '逆行率',
+        'sessions': 'セッション数',
+        'conversions': 'コンバージョン数',
+    })
+    scroll_range_stats['逆行率'] = scroll_range_stats['逆行率'].astype(str)
+    add_rates(scroll_range_stats, {'コンバージョン率': ('コンバージョン数', 'セッション数')})
+    
+    fig = px.bar(scroll_range_stats, x='逆行率', y='コンバージョン率', text='コンバージョン率')
+    fig.update_traces(texttemplate='%{text:.2f}%', textposition='outside')
+    fig.update_layout(height=400, showlegend=False, xaxis_title='逆行率', yaxis_title='コンバージョン率 (%)', dragmode=False)
+    st.plotly_chart(fig, use_container_width=True, key='plotly_chart_20') # This already has use_container_width=True
+
+    st.markdown("---")
+
+    # --- AI分析と考察 ---
+    st.markdown("### AIによる分析と考察")
+    st.markdown('<div class="graph-description">動画視聴やスクロール行動とコンバージョンの関係性を分析し、エンゲージメント向上のヒントを提示します。</div>', unsafe_allow_html=True)
+
+    # AI分析の表示状態を管理
+    if 'video_scroll_ai_open' not in st.session_state:
+        st.session_state.video_scroll_ai_open = False
+
+    if st.button("AI分析を実行", key="video_scroll_ai_btn", type="primary", use_container_width=True):
+        st.session_state.video_scroll_ai_open = True
+
+    if st.session_state.video_scroll_ai_open:
+        with st.container():
+            # AI分析で必要な変数を事前に計算
+            video_df = filtered_df[filtered_df['video_src'].notna()]
+            video_cvr = 0
+            non_video_cvr = 0
+            if len(video_df) > 0:
+                video_sessions = video_df['session_id'].nunique()
+                video_cv = video_df[video_df['cv_type'].notna()]['session_id'].nunique()
+                video_cvr = safe_rate(video_cv, video_sessions) * 100
+                non_video_sessions = total_sessions - video_sessions
+                non_video_cv = filtered_df[(filtered_df['video_src'].isna()) & (filtered_df['cv_type'].notna())]['session_id'].nunique()
+                non_video_cvr = safe_rate(non_video_cv, non_video_sessions) * 100
+
+            with st.spinner("AIがエンゲージメントデータを分析中..."):
+                st.markdown("#### 1. 現状の評価")
+                if len(video_df) > 0:
+                    st.info(f"""
+                    **動画視聴とコンバージョンの関係:**
+                    動画を視聴したユーザーのコンバージョン率は **{video_cvr:.2f}%** であり、視聴しなかったユーザーの **{non_video_cvr:.2f}%** と比較して高い傾向にあります。これは、動画コンテンツがユーザーの理解を深め、コンバージョンを促進する上で有効であることを示唆しています。
+                    """)
+                else:
+                    st.info("このLPには動画コンテンツのデータがありません。")
+
+                st.info("""
+                **スクロール行動とコンバージョンの関係:**
+                逆行率が高いページや、スクロール率が低いにもかかわらず離脱が多いページは、ユーザーがコンテンツに満足していないか、求めている情報を見つけられていない可能性があります。
+                """)
+
+                st.markdown("#### 2. 今後の考察と改善案")
+                st.warning("""
+                **動画コンテンツの活用:**
+                動画の視聴完了率や、どの部分で視聴を止めたかを分析することで、さらにコンテンツを改善できます。動画の冒頭で強いメッセージを伝え、視聴維持率を高める工夫が重要です。
+                
+                **スクロール体験の改善:**
+                - **逆行率が高いページ**: なぜユーザーが戻る必要があるのかを分析します。情報が不足している場合は補足し、ナビゲーションが分かりにくい場合は改善します。
+                - **スクロール率が低いページ**: ページの冒頭（ファーストビュー）でユーザーの興味を引き、続きを読む動機付けを与える必要があります。魅力的なキャッチコピーや画像の使用が効果的です。
+                """)
+            if st.button("AI分析を閉じる", key="video_scroll_ai_close"):
+                st.session_state.video_scroll_ai_open = False
+
+    # --- よくある質問 ---
+    st.markdown("#### このページの分析について質問する")
+    faq_panel('video_faq_toggle', [
+        ("動画はコンバージョンに貢献していますか？", "faq_video_1",
+         f"はい、貢献している可能性が高いです。動画視聴ユーザーのCVRは{video_cvr:.2f}%で、非視聴ユーザーの{non_video_cvr:.2f}%より高いです。"
+         if len(video_df) > 0 else "このLPには動画データがありません。"),
+        ("動画のどこを改善すれば良いですか？", "faq_video_2",
+         "動画の視聴維持率データを分析することが重要です。多くのユーザーが離脱する箇所を特定し、その部分のコンテンツ（メッセージ、テンポ、ビジュアル）を改善しましょう。特に最初の5秒でユーザーの心を掴むことが重要です。"),
+        ("逆行率が高いページは何が問題？", "faq_video_3",
+         "逆行率が高いのは、ユーザーが「情報不足で前のページに戻って確認している」または「ページの構成が分かりにくく迷っている」兆候です。ページ間の情報の流れを見直し、ナビゲーションを分かりやすくする必要があります。"),
+        ("スクロールされないページはどうすれば？", "faq_video_4",
+         "スクロールされないのは、ファーストビュー（FV）に魅力がない証拠です。ユーザーが「続きを読む価値がある」と感じるような、強力なキャッチコピー、魅力的な画像、権威付け（実績や推薦文など）をFVに配置することが効果的です。"),
+    ])